@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+History export benchmark
+Streams history of one website to NDJSON and reports throughput and peak
+Python memory, which should stay flat as the row count grows.
+
+Usage: python -m benchmarks.history_export [--rows 10000 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from src.database import DatabaseRepository
+from src.exports import write_history_ndjson
+
+
+def fill(db: DatabaseRepository, website_id: int, rows: int):
+    """Insert synthetic history rows"""
+    start = int(datetime(2024, 1, 1).timestamp() * 1000)
+    with db._get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO history (website_id, status, response_time, checked_at) VALUES (?, ?, ?, ?)',
+            (
+                (website_id, 1 if i % 50 else 0, 0.1 + (i % 7) / 100, start + i * 120_000)
+                for i in range(rows)
+            )
+        )
+
+
+def run(rows: int):
+    """Export rows and measure time and peak memory"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        db = DatabaseRepository(path)
+        website = db.add_website(1, "https://example.com")
+        fill(db, website.id, rows)
+        
+        with open(os.devnull, 'w') as out:
+            tracemalloc.start()
+            started = time.perf_counter()
+            count = write_history_ndjson(db.iter_website_history(website.id), out)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        
+        print(f"{count:>10} rows  {count / elapsed:>10.0f} rows/s  peak {peak / 1024:>8.0f} KiB")
+    finally:
+        os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+    
+    for rows in args.rows:
+        run(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+History backend benchmark
+Compares the SQLite history table with the mmap'd segment store and the
+run-length encoded history_runs table for appends, latest-N reads, full
+scans and uptime over a whole range.
+
+Usage: python -m benchmarks.history_store [--rows 20000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from src.database import DatabaseRepository
+from src.database.runs import RunHistoryStore
+from src.database.segments import SegmentHistoryStore
+
+
+def timed(fn, repeat: int = 1) -> float:
+    """Best wall time of fn in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+
+
+def sqlite_uptime(db: DatabaseRepository, website_id: int) -> float:
+    """Best case for SQLite: aggregate in SQL"""
+    with db._get_connection() as conn:
+        return conn.execute(
+            "SELECT AVG(status = 1) FROM history WHERE website_id = ?", (website_id,)
+        ).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        sqlite_db = DatabaseRepository(str(tmp / 'sqlite.db'))
+        store = SegmentHistoryStore(tmp / 'history')
+        segment_db = DatabaseRepository(str(tmp / 'segments.db'), history_store=store)
+        run_store = RunHistoryStore(str(tmp / 'runs.db'))
+        run_db = DatabaseRepository(str(tmp / 'runs.db'), history_store=run_store)
+        
+        results = {}
+        for name, db in (('sqlite', sqlite_db), ('segments', segment_db), ('runs', run_db)):
+            website = db.add_website(1, "https://example.com")
+            
+            def write():
+                for i in range(args.rows):
+                    if i % 20:
+                        db.add_history(website.id, 'up', 0.1 + (i % 7) / 100)
+                    else:
+                        db.add_history(website.id, 'down', None, "Timeout after 10s")
+            
+            if name == 'sqlite':
+                uptime = lambda: sqlite_uptime(db, website.id)
+            elif name == 'segments':
+                uptime = lambda: store.uptime(website.id)
+            else:
+                uptime = lambda: (run_store.get_history_arrays([website.id])['status'] == 1).mean()
+            
+            results[name] = {
+                'append (µs/row)': timed(write) * 1000 / args.rows,
+                'latest 100 (ms)': timed(lambda: db.get_website_history(website.id, 100), repeat=5),
+                'full scan (ms)': timed(lambda: sum(1 for _ in db.iter_website_history(website.id)), repeat=3),
+                'uptime (ms)': timed(uptime, repeat=5),
+            }
+        
+        results['sqlite']['size (KiB)'] = os.path.getsize(tmp / 'sqlite.db') / 1024
+        results['segments']['size (KiB)'] = dir_size(tmp / 'history') / 1024
+        results['runs']['size (KiB)'] = os.path.getsize(tmp / 'runs.db') / 1024
+    
+    print(f"{args.rows} rows")
+    print(f"{'':<18} {'sqlite':>10} {'segments':>10} {'runs':>10}")
+    for metric in results['sqlite']:
+        print(f"{metric:<18} " + ' '.join(f"{results[name][metric]:>10.2f}" for name in results))
+
+
+if __name__ == "__main__":
+    main()
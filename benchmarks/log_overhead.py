@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark
+Logs one cycle's worth of check results (mostly 'up', a few 'down') and
+reports the time spent on the calling thread, which in the bot is the
+event loop: synchronous file and stderr handlers vs. the queued, sampled
+setup of src.logs. stderr is redirected to /dev/null while measuring.
+
+Usage: python -m benchmarks.log_overhead [--sites 10000] [--down 0.01]
+"""
+
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config
+from src.logs import start_logging
+
+
+def log_cycle(logger: logging.Logger, sites: int, down: float) -> float:
+    """Log one result per site, return seconds spent"""
+    every_down = int(1 / down) if down else 0
+    started = time.perf_counter()
+    for i in range(sites):
+        if every_down and i % every_down == 0:
+            logger.warning(f"https://site{i}.example.com: down (503) - 0.12s",
+                           extra={'website_id': i, 'status': 'down'})
+        else:
+            logger.info(f"https://site{i}.example.com: up (200) - 0.12s",
+                        extra={'sample': True, 'website_id': i, 'status': 'up', 'response_time': 0.12})
+    return time.perf_counter() - started
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def count_lines(path: Path) -> int:
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=10000)
+    parser.add_argument('--down', type=float, default=0.01, help="fraction of 'down' results")
+    args = parser.parse_args()
+    
+    logger = logging.getLogger('benchmarks.checks')
+    results = []
+    
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stderr(devnull):
+        # Previous setup: file and stderr written on the calling thread
+        sync_file = Path(tmp) / 'sync.log'
+        logging.basicConfig(level=logging.INFO, format=config.LOG_FORMAT, force=True,
+                            handlers=[logging.FileHandler(sync_file), logging.StreamHandler(sys.stderr)])
+        seconds = log_cycle(logger, args.sites, args.down)
+        reset_root()
+        results.append(("sync file + stderr", seconds, seconds, count_lines(sync_file)))
+        
+        # Queued, sampled JSON; the drain time includes the listener catching up
+        queued_file = Path(tmp) / 'queued.log'
+        listener = start_logging(logging.INFO, config.LOG_FORMAT, log_file=queued_file)
+        seconds = log_cycle(logger, args.sites, args.down)
+        started = time.perf_counter()
+        listener.stop()
+        drained = seconds + time.perf_counter() - started
+        reset_root()
+        results.append(("queued + sampled", seconds, drained, count_lines(queued_file)))
+    
+    print(f"{args.sites} results, {args.down:.0%} down")
+    print(f"{'setup':<20} {'caller ms':>10} {'µs/call':>8} {'drained ms':>11} {'lines':>7}")
+    for name, seconds, drained, lines in results:
+        print(f"{name:<20} {seconds * 1000:>10.1f} {seconds / args.sites * 1e6:>8.2f} "
+              f"{drained * 1000:>11.1f} {lines:>7}")
+
+
+if __name__ == "__main__":
+    main()
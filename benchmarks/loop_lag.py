@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Event loop lag benchmark
+Runs check cycles against a temporary SQLite database (or the in-memory
+engine, to time the scheduler on its own) with a fake checker (fixed
+latency, no network) under LoopLagMonitor and reports the lag percentiles,
+i.e. how long the loop was held by synchronous work such as history writes.
+
+Usage: python -m benchmarks.loop_lag [--sites 500] [--cycles 3] [--storage sqlite|memory]
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import config
+from src.database import DatabaseRepository, MemoryRepository
+from src.monitor.checker import CheckResult
+from src.monitor.scheduler import MonitorScheduler
+from src.monitor.watchdog import LoopLagMonitor
+
+
+async def fake_check(website):
+    await asyncio.sleep(0.05)
+    return CheckResult(website.id, website.url, 'up', 0.05)
+
+
+async def run(settings: config.Settings, sites: int, cycles: int, storage: str = 'sqlite') -> dict:
+    db = MemoryRepository() if storage == 'memory' else DatabaseRepository(str(settings.database_path))
+    db.add_websites(1, (f"https://site{i}.example.com" for i in range(sites)))
+    
+    alert_manager = MagicMock()
+    alert_manager.send_alert = AsyncMock(return_value=False)
+    scheduler = MonitorScheduler(db, alert_manager, settings)
+    await scheduler.checker.close()
+    scheduler.checker = MagicMock()
+    scheduler.checker.check = fake_check
+    
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05, debug=True)
+    await monitor.start()
+    for _ in range(cycles):
+        await scheduler.check_all_websites()
+    await monitor.stop()
+    
+    return {**monitor.percentiles(), 'stalls': len(monitor.stalls)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=500)
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--storage', choices=['sqlite', 'memory'], default='sqlite')
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = config.Settings(data_dir=Path(tmp), cert_check_hours=0)
+        stats = asyncio.run(run(settings, args.sites, args.cycles, args.storage))
+    
+    print(f"{args.sites} sites, {args.cycles} cycles, {args.storage} storage, {stats['samples']} probes")
+    for key in ('p50', 'p95', 'p99', 'max'):
+        print(f"lag {key}: {stats[key] * 1000:8.1f} ms")
+    print(f"stalls over 50 ms: {stats['stalls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Profiling overhead benchmark
+Runs check cycles against a temporary SQLite database with a fake checker
+(fixed latency, no network) with profiling off and on, and reports the
+median cycle time of each.
+
+Usage: python -m benchmarks.profiling [--sites 500] [--cycles 10]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import config
+from src.database import DatabaseRepository
+from src.monitor.checker import CheckResult
+from src.monitor.scheduler import MonitorScheduler
+
+
+async def fake_check(website):
+    await asyncio.sleep(0.01)
+    return CheckResult(website.id, website.url, 'up', 0.01)
+
+
+async def run(settings: config.Settings, sites: int, cycles: int) -> dict:
+    """Median cycle time in milliseconds with profiling off and on
+    
+    Cycles alternate between the two modes on the same database so disk and
+    cache effects hit both equally.
+    """
+    db = DatabaseRepository(str(settings.database_path))
+    db.add_websites(1, (f"https://site{i}.example.com" for i in range(sites)))
+    
+    alert_manager = MagicMock()
+    alert_manager.send_alert = AsyncMock(return_value=False)
+    scheduler = MonitorScheduler(db, alert_manager, settings)
+    await scheduler.checker.close()
+    scheduler.checker = MagicMock()
+    scheduler.checker.check = fake_check
+    
+    times = {False: [], True: []}
+    for cycle in range(cycles * 2):
+        profiling = bool(cycle % 2)
+        if profiling:
+            scheduler.enable_profiling()
+        else:
+            scheduler.disable_profiling()
+        
+        started = time.perf_counter()
+        await scheduler.check_all_websites()
+        times[profiling].append((time.perf_counter() - started) * 1000)
+    
+    scheduler.disable_profiling()
+    return {profiling: statistics.median(samples) for profiling, samples in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=500)
+    parser.add_argument('--cycles', type=int, default=10)
+    args = parser.parse_args()
+    
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = config.Settings(data_dir=Path(tmp))
+        results = asyncio.run(run(settings, args.sites, args.cycles))
+    
+    overhead = (results[True] / results[False] - 1) * 100
+    print(f"{args.sites} sites, median of {args.cycles} cycles each")
+    print(f"profiling off: {results[False]:8.1f} ms/cycle")
+    print(f"profiling on:  {results[True]:8.1f} ms/cycle ({overhead:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
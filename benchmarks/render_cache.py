@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Rendered page cache benchmark
+Compares rendering a /status page from SQLite with serving it from the
+RenderCache.
+
+Usage: python -m benchmarks.render_cache [--sites 500] [--iterations 2000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from src.bot.cache import RenderCache
+from src.bot.handlers import render_page
+from src.database import DatabaseRepository
+
+
+def measure(context, iterations: int) -> float:
+    """Average microseconds per render"""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        render_page(context, 1, 'status')
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    try:
+        db = DatabaseRepository(path)
+        db.add_websites(1, [f"https://site{i}.example.com" for i in range(args.sites)])
+        
+        uncached = SimpleNamespace(bot_data={'db': db, 'render_cache': None})
+        cached = SimpleNamespace(bot_data={'db': db, 'render_cache': RenderCache()})
+        
+        print(f"uncached: {measure(uncached, args.iterations):>10.1f} µs/page")
+        print(f"cached:   {measure(cached, args.iterations):>10.1f} µs/page")
+        print(f"stats:    {cached.bot_data['render_cache'].stats()}")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+SLA report benchmark
+Times /report statistics (uptime, p50/p95/p99, outages, MTTR, MTBF) for all
+websites computed with NumPy over get_history_arrays() against the same
+figures computed by looping over History rows in Python.
+
+Usage: python -m benchmarks.report [--sites 100] [--rows 300000]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src.database import DatabaseRepository
+from src.reports import build_reports
+
+
+def fill(db: DatabaseRepository, sites: int, rows: int):
+    """Insert rows spread over sites at a 2 minute interval, with outages"""
+    ids = [db.add_website(1, f"https://site{i}.example.com").id for i in range(sites)]
+    start = int((datetime.now() - timedelta(days=29)).timestamp() * 1000)
+    per_site = rows // sites
+    with db._get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO history (website_id, status, response_time, checked_at) VALUES (?, ?, ?, ?)',
+            (
+                (website_id, 0 if i % 997 < 3 else 1, 0.05 + (i * 7919 % 1000) / 1000, start + i * 120_000)
+                for website_id in ids
+                for i in range(per_site)
+            )
+        )
+    return ids
+
+
+def python_reports(db: DatabaseRepository, website_ids, since: datetime):
+    """Per-row baseline"""
+    reports = {}
+    for website_id in website_ids:
+        history = list(db.iter_website_history(website_id, since=since))
+        latencies = sorted(h.response_time for h in history if h.response_time is not None)
+        up = sum(1 for h in history if h.status == 'up')
+        
+        outages = []
+        down_since = None
+        for h in history:
+            if h.status == 'down' and down_since is None:
+                down_since = h.checked_at
+            elif h.status == 'up' and down_since is not None:
+                outages.append((h.checked_at - down_since).total_seconds())
+                down_since = None
+        
+        quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        reports[website_id] = (
+            up / len(history), quantiles[49], quantiles[94], quantiles[98],
+            len(outages), statistics.mean(outages) if outages else None
+        )
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sites', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=300000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseRepository(os.path.join(tmp, 'report.db'))
+        ids = fill(db, args.sites, args.rows)
+        
+        started = time.perf_counter()
+        history = db.get_history_arrays(ids, since=datetime.now() - timedelta(days=30))
+        loaded = time.perf_counter()
+        build_reports(db, ids, timedelta(days=30))
+        vectorized = time.perf_counter()
+        python_reports(db, ids, datetime.now() - timedelta(days=30))
+        looped = time.perf_counter()
+    
+    total = vectorized - loaded
+    print(f"{len(history)} rows, {args.sites} sites")
+    print(f"load arrays:      {(loaded - started) * 1000:8.1f} ms")
+    print(f"numpy report:     {total * 1000:8.1f} ms (incl. load), {(total - (loaded - started)) * 1000:.1f} ms compute")
+    print(f"python loop:      {(looped - vectorized) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
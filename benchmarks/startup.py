@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark
+Measures import and first use of the checker and database layers in fresh
+interpreters, without a bot token.
+
+Usage: python -m benchmarks.startup [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = {
+    'import config': 'import config',
+    'import src.database': 'import src.database',
+    'import src.monitor': 'import src.monitor',
+    'use database': (
+        'import tempfile, os\n'
+        'from src.database import DatabaseRepository\n'
+        'fd, path = tempfile.mkstemp(suffix=".db"); os.close(fd)\n'
+        'db = DatabaseRepository(path)\n'
+        'site = db.add_website(1, "https://example.com")\n'
+        'db.add_history(site.id, "up", 0.1)\n'
+        'db.get_website_history(site.id)\n'
+        'os.unlink(path)'
+    ),
+    'use checker': (
+        'from src.monitor import WebsiteChecker\n'
+        'WebsiteChecker(timeout=1)'
+    ),
+}
+
+RUNNER = '''
+import sys, time, json
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<scenario>", "exec"))
+elapsed = time.perf_counter() - start
+heavy = [m for m in ("telegram", "httpx", "dotenv") if m in sys.modules]
+print(json.dumps({"elapsed": elapsed, "heavy": heavy}))
+'''
+
+
+def run_scenario(code: str, runs: int):
+    """Run scenario in fresh interpreters, return timings and loaded modules"""
+    env = dict(os.environ)
+    env.pop('TELEGRAM_BOT_TOKEN', None)
+    
+    timings = []
+    heavy = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', RUNNER, code],
+            cwd=PROJECT_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        timings.append(result['elapsed'])
+        heavy = result['heavy']
+    return timings, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    
+    print(f"{'scenario':<22} {'median ms':>10} {'min ms':>8}  heavy modules loaded")
+    for name, code in SCENARIOS.items():
+        timings, heavy = run_scenario(code, args.runs)
+        print(
+            f"{name:<22} {statistics.median(timings) * 1000:>10.1f} "
+            f"{min(timings) * 1000:>8.1f}  {', '.join(heavy) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
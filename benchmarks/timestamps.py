@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Timestamp encoding benchmark
+Compares the legacy history layout (ISO text timestamps, 'up'/'down' text
+statuses, sqlite3.Row) with integer epoch milliseconds and status codes
+decoded positionally by src.database.codec: table and index size, and time
+to decode rows into History objects.
+
+Usage: python -m benchmarks.timestamps [--rows 100000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from src.database.codec import HISTORY_COLUMNS, decode_history, to_epoch_ms
+from src.database.models import History
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        website_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        response_time REAL,
+        error_message TEXT,
+        checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_history_website_checked ON history(website_id, checked_at);
+    CREATE INDEX idx_history_checked_at ON history(checked_at);
+'''
+
+INTEGER_SCHEMA = '''
+    CREATE TABLE history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        website_id INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        response_time REAL,
+        error_message TEXT,
+        checked_at INTEGER NOT NULL
+    );
+    CREATE INDEX idx_history_website_checked ON history(website_id, checked_at);
+    CREATE INDEX idx_history_checked_at ON history(checked_at);
+'''
+
+
+def build(path: str, schema: str, rows: int, legacy: bool):
+    """Create a history table with rows spread over 10 websites"""
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(path)
+    conn.executescript(schema)
+    
+    def row(i):
+        checked_at = start + timedelta(seconds=12 * i, microseconds=i % 1000)
+        up = i % 20 != 0
+        if legacy:
+            return (i % 10 + 1, 'up' if up else 'down', 0.1, str(checked_at))
+        return (i % 10 + 1, 1 if up else 0, 0.1, to_epoch_ms(checked_at))
+    
+    conn.executemany(
+        'INSERT INTO history (website_id, status, response_time, checked_at) VALUES (?, ?, ?, ?)',
+        (row(i) for i in range(rows))
+    )
+    conn.commit()
+    conn.execute('VACUUM')
+    return conn
+
+
+def object_sizes(conn) -> dict:
+    """Bytes used per table/index"""
+    return dict(conn.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name').fetchall())
+
+
+def decode_legacy(conn) -> float:
+    """sqlite3.Row with ISO parsing, rows per second"""
+    conn.row_factory = sqlite3.Row
+    started = time.perf_counter()
+    rows = 0
+    for row in conn.execute('SELECT * FROM history'):
+        History(
+            id=row['id'],
+            website_id=row['website_id'],
+            status=row['status'],
+            response_time=row['response_time'],
+            error_message=row['error_message'],
+            checked_at=datetime.fromisoformat(row['checked_at'])
+        )
+        rows += 1
+    return rows / (time.perf_counter() - started)
+
+
+def decode_integer(conn) -> float:
+    """Plain tuples through the codec, rows per second"""
+    started = time.perf_counter()
+    rows = 0
+    for row in conn.execute(f'SELECT {HISTORY_COLUMNS} FROM history'):
+        decode_history(row)
+        rows += 1
+    return rows / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = build(os.path.join(tmp, 'legacy.db'), LEGACY_SCHEMA, args.rows, legacy=True)
+        integer = build(os.path.join(tmp, 'integer.db'), INTEGER_SCHEMA, args.rows, legacy=False)
+        
+        results = {}
+        for name, conn, decode in (('legacy', legacy, decode_legacy), ('integer', integer, decode_integer)):
+            sizes = object_sizes(conn)
+            results[name] = {
+                'table (KiB)': sizes['history'] / 1024,
+                'website_checked idx (KiB)': sizes['idx_history_website_checked'] / 1024,
+                'checked_at idx (KiB)': sizes['idx_history_checked_at'] / 1024,
+                'file (KiB)': os.path.getsize(os.path.join(tmp, f'{name}.db')) / 1024,
+                'decode (krows/s)': max(decode(conn) for _ in range(3)) / 1000,
+            }
+        
+        legacy.close()
+        integer.close()
+    
+    print(f"{args.rows} rows")
+    print(f"{'':<27} {'legacy':>10} {'integer':>10}")
+    for metric in results['legacy']:
+        print(f"{metric:<27} {results['legacy'][metric]:>10.1f} {results['integer'][metric]:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
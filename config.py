@@ -1,44 +1,247 @@
+import atexit
 import os
 import logging
+import secrets
+from dataclasses import dataclass, field
 from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Bot Configuration
-TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-TELEGRAM_USER_ID = os.getenv('TELEGRAM_USER_ID')
-
-if not TELEGRAM_BOT_TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
-
-# Monitoring Configuration
-CHECK_INTERVAL_MINUTES = int(os.getenv('CHECK_INTERVAL_MINUTES', '2'))
-REQUEST_TIMEOUT_SECONDS = int(os.getenv('REQUEST_TIMEOUT_SECONDS', '10'))
+from typing import Dict, Mapping, Optional, Tuple
 
 # Paths
 PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / 'data'
-DATABASE_PATH = DATA_DIR / 'monitor.db'
-LOG_FILE = DATA_DIR / 'monitor.log'
-
-# Create directories
-DATA_DIR.mkdir(exist_ok=True)
 
 # Logging Configuration
-LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
-logging.basicConfig(
-    level=getattr(logging, LOG_LEVEL),
-    format=LOG_FORMAT,
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
-
 logger = logging.getLogger(__name__)
 
-logger.info("Configuration loaded successfully")
+
+def env_flag(value: Optional[str]) -> bool:
+    """Parse a boolean environment variable"""
+    return (value or '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def parse_chat_weights(value: str) -> Dict[int, float]:
+    """Parse 'chat_id:weight,...' into a weight per chat"""
+    weights = {}
+    for item in value.split(','):
+        if item.strip():
+            chat_id, weight = item.split(':')
+            if float(weight) <= 0:
+                raise ValueError(f"CHAT_WEIGHTS: weight of {chat_id.strip()} must be positive")
+            weights[int(chat_id)] = float(weight)
+    return weights
+
+
+@dataclass
+class Settings:
+    """Application settings
+    
+    Importing this module has no side effects: settings are read from the
+    environment by load_settings() and directories and log handlers are only
+    created by setup_logging().
+    """
+    # Bot Configuration
+    telegram_bot_token: Optional[str] = None
+    telegram_user_id: Optional[str] = None
+    
+    # Webhook mode (long polling is used when webhook_url is not set)
+    webhook_url: Optional[str] = None
+    webhook_secret: str = field(default_factory=lambda: secrets.token_urlsafe(32))
+    webhook_host: str = '0.0.0.0'
+    webhook_port: int = 8000
+    
+    # Monitoring Configuration
+    check_interval_minutes: int = 2
+    request_timeout_seconds: int = 10
+    # Checks in flight at once, also the HTTP connection pool size
+    max_concurrent_checks: int = 100
+    # tcp://host:port monitors are a bare connect, so they run more often (0 = with HTTP)
+    tcp_check_interval_seconds: int = 30
+    
+    # Fair sharing between chats: weights (default 1) and optional quotas (0 = unlimited)
+    chat_weights: Dict[int, float] = field(default_factory=dict)
+    max_sites_per_chat: int = 0
+    max_checks_per_minute_per_chat: int = 0
+    
+    # Latency anomalies: 'degraded' after this many results in a row over
+    # degraded_sigma standard deviations above the site's baseline (0 disables)
+    degraded_sigma: float = 4.0
+    degraded_checks: int = 3
+    
+    # Backoff for websites that keep failing
+    backoff_failure_threshold: int = 3
+    backoff_max_interval_minutes: int = 60
+    
+    # TLS certificate expiry: hours between handshakes per host (0 disables)
+    # and days before expiry at which to warn
+    cert_check_hours: int = 24
+    cert_warning_days: Tuple[int, ...] = (30, 14, 7, 1)
+    
+    # History storage: 'sqlite' rows, 'segments' (mmap'd fixed-width records),
+    # 'runs' (one row per run of equal results, split at least this often)
+    # or 'partitioned' (a database per month, older than retention dropped)
+    history_backend: str = 'sqlite'
+    run_sample_minutes: int = 60
+    history_retention_months: int = 0
+    
+    # Storage engine: 'sqlite' or 'memory' (dicts and deques, snapshotted to disk)
+    storage_backend: str = 'sqlite'
+    snapshot_interval_seconds: int = 300
+    memory_history_per_site: int = 5040
+    
+    # Opt-in cycle profiling (also toggled at runtime with /profile)
+    profiling: bool = False
+    profile_top_n: int = 10
+    
+    # Event loop lag monitoring; debug mode captures stacks of blocking calls
+    loop_debug: bool = False
+    loop_lag_threshold_ms: int = 100
+    
+    # Paths and logging
+    data_dir: Path = DATA_DIR
+    log_level: str = 'INFO'
+    # Off under the supervisor, which writes stderr to the log file itself
+    log_to_file: bool = True
+    # JSON lines on stderr too (the file is always JSON)
+    log_json: bool = False
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backup_count: int = 5
+    # Keep one in this many routine 'up' check lines
+    log_sample_every: int = 100
+    
+    # Touched by the scheduler while it runs, watched by the supervisor
+    heartbeat_file: Optional[Path] = None
+    
+    @property
+    def database_path(self) -> Path:
+        return self.data_dir / 'monitor.db'
+    
+    @property
+    def history_dir(self) -> Path:
+        return self.data_dir / 'history'
+    
+    @property
+    def partitions_dir(self) -> Path:
+        return self.data_dir / 'partitions'
+    
+    @property
+    def snapshot_file(self) -> Path:
+        return self.data_dir / 'snapshot.json'
+    
+    @property
+    def log_file(self) -> Path:
+        return self.data_dir / 'monitor.log'
+    
+    @property
+    def profile_file(self) -> Path:
+        return self.data_dir / 'profile.jsonl'
+    
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] = None) -> 'Settings':
+        """Build settings from environment variables"""
+        env = os.environ if env is None else env
+        return cls(
+            telegram_bot_token=env.get('TELEGRAM_BOT_TOKEN'),
+            telegram_user_id=env.get('TELEGRAM_USER_ID'),
+            webhook_url=env.get('WEBHOOK_URL'),
+            webhook_secret=env.get('WEBHOOK_SECRET') or secrets.token_urlsafe(32),
+            webhook_host=env.get('WEBHOOK_HOST', '0.0.0.0'),
+            webhook_port=int(env.get('WEBHOOK_PORT', '8000')),
+            check_interval_minutes=int(env.get('CHECK_INTERVAL_MINUTES', '2')),
+            request_timeout_seconds=int(env.get('REQUEST_TIMEOUT_SECONDS', '10')),
+            max_concurrent_checks=int(env.get('MAX_CONCURRENT_CHECKS', '100')),
+            tcp_check_interval_seconds=int(env.get('TCP_CHECK_INTERVAL_SECONDS', '30')),
+            chat_weights=parse_chat_weights(env.get('CHAT_WEIGHTS', '')),
+            max_sites_per_chat=int(env.get('MAX_SITES_PER_CHAT', '0')),
+            max_checks_per_minute_per_chat=int(env.get('MAX_CHECKS_PER_MINUTE_PER_CHAT', '0')),
+            degraded_sigma=float(env.get('DEGRADED_SIGMA', '4')),
+            degraded_checks=int(env.get('DEGRADED_CHECKS', '3')),
+            backoff_failure_threshold=int(env.get('BACKOFF_FAILURE_THRESHOLD', '3')),
+            backoff_max_interval_minutes=int(env.get('BACKOFF_MAX_INTERVAL_MINUTES', '60')),
+            cert_check_hours=int(env.get('CERT_CHECK_HOURS', '24')),
+            cert_warning_days=tuple(
+                int(days) for days in env.get('CERT_WARNING_DAYS', '30,14,7,1').split(',') if days.strip()
+            ),
+            history_backend=env.get('HISTORY_BACKEND', 'sqlite').lower(),
+            run_sample_minutes=int(env.get('RUN_SAMPLE_MINUTES', '60')),
+            history_retention_months=int(env.get('HISTORY_RETENTION_MONTHS', '0')),
+            storage_backend=env.get('STORAGE_BACKEND', 'sqlite').lower(),
+            snapshot_interval_seconds=int(env.get('SNAPSHOT_INTERVAL_SECONDS', '300')),
+            memory_history_per_site=int(env.get('MEMORY_HISTORY_PER_SITE', '5040')),
+            profiling=env_flag(env.get('PROFILING')),
+            profile_top_n=int(env.get('PROFILE_TOP_N', '10')),
+            loop_debug=env_flag(env.get('LOOP_DEBUG')),
+            loop_lag_threshold_ms=int(env.get('LOOP_LAG_THRESHOLD_MS', '100')),
+            data_dir=Path(env.get('DATA_DIR', str(DATA_DIR))),
+            log_level=env.get('LOG_LEVEL', 'INFO'),
+            log_to_file=env_flag(env.get('LOG_TO_FILE', 'true')),
+            log_json=env_flag(env.get('LOG_JSON')),
+            log_max_bytes=int(env.get('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+            log_backup_count=int(env.get('LOG_BACKUP_COUNT', '5')),
+            log_sample_every=int(env.get('LOG_SAMPLE_EVERY', '100')),
+            heartbeat_file=Path(env['HEARTBEAT_FILE']) if env.get('HEARTBEAT_FILE') else None,
+        )
+    
+    def is_admin(self, user_id: int) -> bool:
+        """Check whether a Telegram user is the configured admin"""
+        return self.telegram_user_id is not None and str(user_id) == self.telegram_user_id.strip()
+    
+    def require_token(self) -> str:
+        """Get bot token, raise if it is not configured"""
+        if not self.telegram_bot_token:
+            raise ValueError("TELEGRAM_BOT_TOKEN environment variable is required")
+        return self.telegram_bot_token
+
+
+_settings: Optional[Settings] = None
+
+
+def load_settings(dotenv: bool = True) -> Settings:
+    """Load settings from the environment (and .env file) and make them current"""
+    global _settings
+    
+    if dotenv:
+        # Imported here so importing config stays cheap
+        from dotenv import load_dotenv
+        load_dotenv()
+    
+    _settings = Settings.from_env()
+    return _settings
+
+
+def get_settings() -> Settings:
+    """Get current settings, loading them on first use"""
+    if _settings is None:
+        return load_settings()
+    return _settings
+
+
+def set_settings(settings: Optional[Settings]):
+    """Replace current settings (None reloads on next use)"""
+    global _settings
+    _settings = settings
+
+
+def setup_logging(settings: Settings):
+    """Create data directory and configure queued, sampled logging
+    
+    Returns the QueueListener doing the writes, it is stopped at exit.
+    """
+    from src.logs import start_logging
+    
+    settings.data_dir.mkdir(parents=True, exist_ok=True)
+    
+    listener = start_logging(
+        getattr(logging, settings.log_level),
+        LOG_FORMAT,
+        log_file=settings.log_file if settings.log_to_file else None,
+        json_stderr=settings.log_json,
+        max_bytes=settings.log_max_bytes,
+        backup_count=settings.log_backup_count,
+        sample_every=settings.log_sample_every
+    )
+    atexit.register(listener.stop)
+    
+    logger.info("Configuration loaded successfully")
+    return listener
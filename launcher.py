@@ -1,100 +1,76 @@
 #!/usr/bin/env python3
 """
 Website Uptime Monitor - Launcher
-Spawns bot in separate process to avoid event loop issues
-"""
+Runs the bot under a supervisor that restarts it on crash or stall
 
-import subprocess
-import sys
-import os
-import signal
+Usage:
+    python launcher.py [--simple] [--stall-timeout 120]
+"""
 
-BOT_SCRIPT = '''#!/usr/bin/env python3
-import asyncio
+import argparse
 import logging
+import signal
 import sys
-import os
-
-# Add project to path
-script_dir = os.path.dirname(os.path.abspath("__file__"))
-os.chdir(script_dir)
-sys.path.insert(0, script_dir)
+from pathlib import Path
 
-from telegram.ext import Application
 import config
-from src.database import DatabaseRepository
-from src.bot import setup_handlers
-from src.monitor import AlertManager, MonitorScheduler
+from src.monitor.scheduler import HEARTBEAT_INTERVAL
+from src.logs import JsonFormatter
+from src.supervisor import Supervisor
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
-async def main():
-    logger.info("Starting bot...")
-    db = DatabaseRepository()
-    app = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
-    setup_handlers(app, db)
+PROJECT_DIR = Path(__file__).resolve().parent
     
-    alert_mgr = AlertManager(app.bot, db)
-    alert_mgr.load_previous_statuses()
-    sched = MonitorScheduler(db, alert_mgr)
     
-    asyncio.create_task(sched.start())
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the bot under a restarting supervisor")
+    parser.add_argument('--simple', action='store_true',
+                        help="run simple_bot.py instead of main.py")
+    parser.add_argument('--stall-timeout', type=float, default=120,
+                        help="restart when the scheduler heartbeat is older than this many seconds")
+    parser.add_argument('--max-log-bytes', type=int, default=10 * 1024 * 1024,
+                        help="rotate the log file at this size")
+    parser.add_argument('--log-backups', type=int, default=5,
+                        help="rotated log files to keep")
+    args = parser.parse_args(argv)
+    # The scheduler touches the heartbeat every HEARTBEAT_INTERVAL seconds
+    if args.stall_timeout < 2 * HEARTBEAT_INTERVAL:
+        parser.error(f"--stall-timeout must be at least {2 * HEARTBEAT_INTERVAL} seconds")
+    return args
     
-    logger.info("Bot ready, starting polling...")
-    await app.run_polling(
-        poll_interval=1.0,
-        drop_pending_updates=True,
-        allowed_updates=["message"]
-    )
-
-if __name__ == "__main__":
-    asyncio.run(main())
-'''
-
-def main():
-    # Get script directory
-    script_dir = os.path.dirname(os.path.abspath(__file__)) or '.'
     
-    # Write temp bot script
-    bot_path = os.path.join(script_dir, '_bot_run.py')
-    with open(bot_path, 'w') as f:
-        f.write(BOT_SCRIPT)
+def main(argv=None):
+    args = parse_args(argv)
+    settings = config.load_settings()
+    settings.data_dir.mkdir(parents=True, exist_ok=True)
     
-    # Start subprocess
-    print("Starting bot in subprocess...")
-    proc = subprocess.Popen(
-        [sys.executable, bot_path],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        cwd=script_dir,
-        preexec_fn=os.setsid
+    # The supervisor appends JSON lines to the same file the bot's output goes to
+    file_handler = logging.FileHandler(settings.log_file)
+    file_handler.setFormatter(JsonFormatter())
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format=config.LOG_FORMAT,
+        handlers=[file_handler, logging.StreamHandler()]
+    )
+
+    script = 'simple_bot.py' if args.simple else 'main.py'
+    supervisor = Supervisor(
+        [sys.executable, str(PROJECT_DIR / script)],
+        log_file=settings.log_file,
+        heartbeat_file=settings.data_dir / 'heartbeat',
+        stall_timeout=args.stall_timeout,
+        max_bytes=args.max_log_bytes,
+        backup_count=args.log_backups,
+        cwd=PROJECT_DIR
     )
     
-    print(f"Bot started with PID: {proc.pid}")
-    
-    # Handle shutdown
-    def shutdown(signum, frame):
-        print("Shutting down...")
-        try:
-            os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-        except:
-            pass
-        proc.wait()
-        sys.exit(0)
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    signal.signal(signal.SIGINT, supervisor.stop)
     
-    signal.signal(signal.SIGTERM, shutdown)
-    signal.signal(signal.SIGINT, shutdown)
+    logger.info(f"Supervising {script}, bot output in {settings.log_file}")
+    return supervisor.run()
     
-    # Stream output
-    try:
-        for line in proc.stdout:
-            print(line.decode(), end='')
-    except KeyboardInterrupt:
-        shutdown(None, None)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
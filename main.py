@@ -10,28 +10,31 @@ import sys
 from telegram.ext import Application
 
 import config
-from src.database import DatabaseRepository
+from src.database import open_storage
 from src.bot import setup_handlers
-from src.monitor import AlertManager, MonitorScheduler
+from src.bot.cache import RenderCache
+from src.bot.webhook import run_webhook
+from src.monitor import AlertManager, LoopLagMonitor, MonitorScheduler
 
 logger = logging.getLogger(__name__)
 
 
-async def main():
+async def main(settings: config.Settings):
     """Main entry point"""
     logger.info("=" * 60)
     logger.info("Starting Website Uptime Monitor")
     logger.info("=" * 60)
 
-    # Initialize database
-    db = DatabaseRepository()
-    logger.info("Database initialized")
+    # Initialize storage (SQLite, or memory with snapshots)
+    db = open_storage(settings)
+    logger.info(f"Storage initialized ({settings.storage_backend})")
 
     # Create application with built-in updater
-    application = Application.builder().token(config.TELEGRAM_BOT_TOKEN).build()
+    application = Application.builder().token(settings.require_token()).build()
 
-    # Setup handlers
-    setup_handlers(application, db)
+    # Setup handlers with a cache of rendered /list and /status pages
+    render_cache = RenderCache(ttl=settings.check_interval_minutes * 60)
+    setup_handlers(application, db, render_cache)
     logger.info("Bot handlers registered")
 
     # Create alert manager
@@ -39,23 +42,61 @@ async def main():
     alert_manager.load_previous_statuses()
 
     # Create scheduler
-    scheduler = MonitorScheduler(db, alert_manager)
+    scheduler = MonitorScheduler(db, alert_manager, settings, render_cache)
+    application.bot_data['scheduler'] = scheduler
+
+    # Measure event loop lag (and catch blocking calls in debug mode)
+    watchdog = LoopLagMonitor(
+        threshold=settings.loop_lag_threshold_ms / 1000,
+        debug=settings.loop_debug
+    )
+    await watchdog.start()
+    application.bot_data['watchdog'] = watchdog
 
     # Start scheduler in background
     scheduler_task = asyncio.create_task(scheduler.start())
 
-    # Start polling - this blocks until interrupted
-    await application.run_polling(
-        poll_interval=1.0,
-        timeout=10,
-        drop_pending_updates=True,
-        allowed_updates=["message"],
-    )
+    try:
+        # Serve webhook updates when a public URL is configured
+        if settings.webhook_url:
+            await run_webhook(
+                application,
+                url=settings.webhook_url,
+                secret_token=settings.webhook_secret,
+                host=settings.webhook_host,
+                port=settings.webhook_port,
+                allowed_updates=["message", "callback_query"],
+            )
+            return
+    
+        # Start polling - this blocks until interrupted. Application.run_polling
+        # would start its own event loop, so drive the updater inside this one
+        async with application:
+            await application.start()
+            await application.updater.start_polling(
+                poll_interval=1.0,
+                timeout=10,
+                drop_pending_updates=True,
+                allowed_updates=["message", "callback_query"],
+            )
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await application.updater.stop()
+                await application.stop()
+    finally:
+        scheduler_task.cancel()
+        await watchdog.stop()
+        # Final snapshot of the in-memory engine
+        db.close()
 
 
 if __name__ == "__main__":
+    settings = config.load_settings()
+    config.setup_logging(settings)
+    
     try:
-        asyncio.run(main())
+        asyncio.run(main(settings))
     except KeyboardInterrupt:
         logger.info("Interrupted")
     except Exception as e:
@@ -1,166 +1,189 @@
 #!/usr/bin/env python3
 """
 Website Uptime Monitor - Simple Bot
-Uses httpx for Telegram API
+Lightweight mode without python-telegram-bot: talks to the Bot API with
+httpx and runs the same checker, repository and scheduler as main.py
 """
 
 import asyncio
 import logging
-import sqlite3
-from datetime import datetime
 import httpx
-import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+import config
+from src.bot.validators import is_valid_url
+from src.bot.views import EMPTY_MESSAGE, PAGE_SIZE, render_list_page, render_status_page
+from src.database import open_storage
+from src.monitor.alerts import AlertManager
+from src.monitor.scheduler import MonitorScheduler
 
-BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-if not BOT_TOKEN:
-    raise ValueError("TELEGRAM_BOT_TOKEN not set in environment")
+POLL_TIMEOUT = 30
 
-DB_PATH = "data/monitor.db"
-CHECK_INTERVAL = 120
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def init_db():
-    os.makedirs("data", exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute('''CREATE TABLE IF NOT EXISTS users (chat_id INTEGER PRIMARY KEY)''')
-    conn.execute('''CREATE TABLE IF NOT EXISTS websites (id INTEGER PRIMARY KEY, chat_id INTEGER, url TEXT, name TEXT, enabled INTEGER DEFAULT 1, last_status TEXT, last_checked TIMESTAMP)''')
-    conn.execute('''CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY, website_id INTEGER, status TEXT, response_time REAL, checked_at TIMESTAMP)''')
-    conn.commit()
-    conn.close()
+HELP_TEXT = (
+    "📖 <b>Commands</b>\n\n"
+    "/add url - Add website\n"
+    "/remove url - Remove\n"
+    "/list - All websites\n"
+    "/status - Current status"
+)
 
 class Bot:
     def __init__(self, token):
         self.token = token
         self.base = f"https://api.telegram.org/bot{token}"
         self.offset = None
+        # One pooled client for all Telegram API calls
+        self.client = httpx.AsyncClient(timeout=POLL_TIMEOUT + 10)
+    
+    async def send_message(self, chat_id, text, parse_mode='HTML'):
+        # Same signature as telegram.Bot.send_message so AlertManager can use it
+        r = await self.client.post(f"{self.base}/sendMessage", data={'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode})
+        logger.debug(f"Send response: {r.status_code}")
+        r.raise_for_status()
     
     async def send(self, chat_id, text):
-        logger.info(f"Sending message to {chat_id}")
-        async with httpx.AsyncClient() as c:
-            try:
-                r = await c.post(f"{self.base}/sendMessage", data={'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'})
-                logger.info(f"Send response: {r.status_code}")
-            except Exception as e:
-                logger.error(f"Send error: {e}")
+        try:
+            await self.send_message(chat_id, text)
+        except Exception as e:
+            logger.error(f"Send error: {e}")
     
     async def get_updates(self):
-        async with httpx.AsyncClient() as c:
-            params = {'timeout': 2}
-            if self.offset:
-                params['offset'] = self.offset
-            try:
-                r = await c.get(f"{self.base}/getUpdates", params=params, timeout=5)
-                data = r.json()
-                logger.info(f"getUpdates: {len(data.get('result', []))} results")
-                if data.get('ok') and data.get('result'):
-                    for u in data['result']:
-                        self.offset = u['update_id'] + 1
-                    return data['result']
-            except Exception as e:
-                logger.error(f"Get updates error: {e}")
+        # Long polling: Telegram answers as soon as an update arrives
+        params = {'timeout': POLL_TIMEOUT, 'allowed_updates': '["message"]'}
+        if self.offset:
+            params['offset'] = self.offset
+        try:
+            r = await self.client.get(f"{self.base}/getUpdates", params=params)
+            data = r.json()
+            logger.debug(f"getUpdates: {len(data.get('result', []))} results")
+            if data.get('ok') and data.get('result'):
+                for u in data['result']:
+                    self.offset = u['update_id'] + 1
+                return data['result']
+        except Exception as e:
+            logger.error(f"Get updates error: {e}")
+            await asyncio.sleep(1)
         return []
+    
+    async def set_webhook(self, url, secret_token):
+        r = await self.client.post(f"{self.base}/setWebhook", data={
+            'url': url,
+            'secret_token': secret_token,
+            'allowed_updates': '["message"]',
+            'drop_pending_updates': 'true'
+        })
+        logger.info(f"setWebhook: {r.json()}")
+    
+    async def close(self):
+        await self.client.aclose()
 
-async def check(url):
-    try:
-        async with httpx.AsyncClient(timeout=10, follow_redirects=True) as c:
-            r = await c.head(url)
-            return ('up', r.elapsed.total_seconds()) if 200 <= r.status_code < 300 else ('down', None)
-    except Exception as e:
-        return ('down', str(e))
+def reply_for(db, chat_id, cmd, args):
+    """Build the reply to a command"""
+    if cmd == 'start':
+        db.add_user(chat_id)
+        return "👋 <b>Welcome!</b>\n\n/add url - Add website\n/list - Your sites\n/status - Check status\n/help - Help"
+
+    if cmd == 'help':
+        return HELP_TEXT
+    
+    if cmd == 'add':
+        url = args[0] if args else ''
+        if not url:
+            return "❌ Usage: /add https://example.com"
+        url = url if '://' in url else 'https://' + url
+        if not is_valid_url(url):
+            return "❌ Invalid URL. Use http://, https:// or tcp://host:port"
+        limit = config.get_settings().max_sites_per_chat
+        if limit and sum(db.count_user_websites(chat_id).values()) >= limit:
+            return f"❌ You have reached the limit of {limit} websites"
+        db.add_user(chat_id)
+        db.add_website(chat_id, url)
+        return f"✅ Added: {url}"
+    
+    if cmd == 'remove':
+        if not args:
+            return "❌ Usage: /remove https://example.com"
+        if db.remove_website(chat_id, args[0]):
+            return f"✅ Removed: {args[0]}"
+        return f"❌ Not found: {args[0]}"
+    
+    if cmd in ('list', 'status'):
+        # First page only, the simple bot has no navigation buttons
+        page = db.get_user_websites_page(chat_id, limit=PAGE_SIZE)
+        if not page.websites:
+            return EMPTY_MESSAGE
+        counts = db.count_user_websites(chat_id)
+        if cmd == 'list':
+            return render_list_page(page, 1, sum(counts.values()))
+        return render_status_page(page, 1, counts)
+    
+    return "❓ Unknown. Try /help"
 
-async def handle(bot, update):
+async def handle(bot, db, update):
     msg = update.get('message', {})
     chat = msg.get('chat', {})
-    text = msg.get('text', '')
+    parts = msg.get('text', '').split()
     chat_id = chat.get('id')
     
-    if not text or not chat_id:
+    if not parts or not chat_id:
         return
     
-    parts = text.split()
-    cmd = parts[0][1:].lower() if parts else ''
-    args = parts[1:]
-    
-    conn = sqlite3.connect(DB_PATH)
+    cmd = parts[0][1:].split('@')[0].lower() if parts[0].startswith('/') else ''
     
-    if cmd == 'start':
-        conn.execute('INSERT OR IGNORE INTO users (chat_id) VALUES (?)', (chat_id,))
-        conn.commit()
-        reply = "👋 <b>Welcome!</b>\n\n/add url - Add website\n/list - Your sites\n/status - Check status\n/help - Help"
-    
-    elif cmd == 'help':
-        reply = "📖 <b>Commands</b>\n\n/add url - Add website\n/remove url - Remove\n/list - All websites\n/status - Current status"
+    try:
+        reply = reply_for(db, chat_id, cmd, parts[1:])
+    except Exception as e:
+        logger.error(f"Error handling /{cmd}: {e}", exc_info=True)
+        reply = "❌ Something went wrong, please try again."
     
-    elif cmd == 'add':
-        url = args[0] if args else ''
-        if not url:
-            reply = "❌ Usage: /add https://example.com"
-        else:
-            url = url if url.startswith('http') else 'https://' + url
-            conn.execute('INSERT OR IGNORE INTO users (chat_id) VALUES (?)', (chat_id,))
-            conn.execute('INSERT OR IGNORE INTO websites (chat_id, url, name) VALUES (?, ?, ?)', (chat_id, url, url))
-            conn.commit()
-            reply = f"✅ Added: {url}"
-    
-    elif cmd == 'list':
-        cur = conn.execute('SELECT url, last_status FROM websites WHERE chat_id = ?', (chat_id,))
-        rows = cur.fetchall()
-        reply = "<b>Your Sites</b>\n\n" + "\n".join(f"{'🟢' if s=='up' else '🔴' if s=='down' else '⚪'} {u}" for u,s in rows) if rows else "No sites yet"
-    
-    elif cmd == 'status':
-        cur = conn.execute('SELECT url, last_status FROM websites WHERE chat_id = ?', (chat_id,))
-        rows = cur.fetchall()
-        reply = "<b>Status</b>\n\n" + "\n".join(f"{'🟢' if s=='up' else '🔴' if s=='down' else '⚪'} {u}" for u,s in rows) if rows else "No sites"
-    
-    else:
-        reply = "❓ Unknown. Try /help"
-    
-    conn.close()
     await bot.send(chat_id, reply)
 
-async def monitor(bot):
-    while True:
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cur = conn.execute('SELECT id, chat_id, url FROM websites WHERE enabled = 1')
-            sites = cur.fetchall()
-            conn.close()
-            
-            for sid, cid, url in sites:
-                status, resp = await check(url)
-                conn = sqlite3.connect(DB_PATH)
-                conn.execute('INSERT INTO history (website_id, status, response_time, checked_at) VALUES (?, ?, ?, ?)',
-                           (sid, status, resp if isinstance(resp, float) else None, datetime.now().isoformat()))
-                conn.execute('UPDATE websites SET last_status = ?, last_checked = ? WHERE id = ?',
-                           (status, datetime.now().isoformat(), sid))
-                conn.commit()
-                conn.close()
-                logger.info(f"Checked {url}: {status}")
-            
-            await asyncio.sleep(CHECK_INTERVAL)
-        except Exception as e:
-            logger.error(f"Monitor error: {e}")
-            await asyncio.sleep(10)
-
-async def main():
-    init_db()
-    bot = Bot(BOT_TOKEN)
-    asyncio.create_task(monitor(bot))
-    
+async def poll(bot, db):
     while True:
         try:
             updates = await bot.get_updates()
             for u in updates:
-                await handle(bot, u)
+                await handle(bot, db, u)
         except Exception as e:
             logger.error(f"Poll error: {e}")
             await asyncio.sleep(1)
 
+async def serve_webhook(bot, db, settings):
+    from src.bot.webhook import WebhookServer, webhook_path
+    
+    server = WebhookServer(lambda u: handle(bot, db, u), settings.webhook_secret,
+                           path=webhook_path(settings.webhook_url),
+                           host=settings.webhook_host, port=settings.webhook_port)
+    try:
+        await server.start()
+        await bot.set_webhook(settings.webhook_url, settings.webhook_secret)
+        await server.serve_forever()
+    finally:
+        await server.stop()
+
+async def main(settings):
+    db = open_storage(settings)
+    bot = Bot(settings.require_token())
+    
+    # Shared engine: pooled concurrent checks, one write transaction per cycle
+    alert_manager = AlertManager(bot, db)
+    alert_manager.load_previous_statuses()
+    scheduler = MonitorScheduler(db, alert_manager, settings)
+    scheduler_task = asyncio.create_task(scheduler.start())
+    
+    try:
+        if settings.webhook_url:
+            await serve_webhook(bot, db, settings)
+        else:
+            await poll(bot, db)
+    finally:
+        scheduler_task.cancel()
+        await scheduler.stop()
+        await bot.close()
+        db.close()
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    settings = config.load_settings()
+    config.setup_logging(settings)
+    asyncio.run(main(settings))
@@ -0,0 +1,215 @@
+# src/backfill.py
+"""Rebuild derived tables from raw history
+
+A backfill splits the websites into partitions of consecutive ids and hands
+them to a process pool. Each worker streams a website's history in keyset
+chunks (no read transaction stays open, so the live monitor keeps writing),
+derives the target's rows and writes them in batched transactions. The
+website's last batch also records it in backfill_progress, so an
+interrupted backfill resumes with the websites it had not finished.
+
+Only history before the start of the backfill is used. Rows derived from
+later checks are left to the live monitor: for incidents, the one still
+open at that time.
+"""
+import logging
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, TextIO
+
+from src.database import DatabaseRepository
+from src.database.codec import from_epoch_ms, now_ms, to_epoch_ms
+from src.database.models import History
+from src.database.runs import INSERT_RUNS, RUNS_INDEX, RUNS_TABLE, SAMPLE_INTERVAL_SECONDS, build_runs
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS backfill_progress (
+        target TEXT NOT NULL,
+        website_id INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        finished_at INTEGER NOT NULL,
+        PRIMARY KEY (target, website_id)
+    )
+'''
+
+# Seconds a writer waits for the live monitor's transactions
+BUSY_TIMEOUT = 30
+
+
+def derive_incidents(history: Iterable[History]) -> Iterator[tuple]:
+    """Outages of history sorted by checked_at, as incidents rows
+    
+    An outage ends at the first successful check after it; one still
+    ongoing at the end of history is skipped.
+    """
+    started = None
+    for result in history:
+        checked_at = to_epoch_ms(result.checked_at)
+        if result.status == 'down':
+            if started is None:
+                started, error_message, checks = checked_at, result.error_message, 0
+            checks += 1
+        elif started is not None:
+            yield (result.website_id, started, checked_at, error_message, checks)
+            started = None
+
+
+@dataclass(frozen=True)
+class Target:
+    """A derived table and how to rebuild one website's rows before a cutoff"""
+    setup: List[str]
+    clear: str
+    insert: str
+    derive: Callable[..., Iterator[tuple]]
+    # derive also takes the sampling interval, which must match the live write path
+    sampled: bool = False
+
+
+TARGETS = {
+    'incidents': Target(
+        setup=[],
+        clear='DELETE FROM incidents WHERE website_id = ? AND ended_at IS NOT NULL AND ended_at < ?',
+        insert='INSERT INTO incidents (website_id, started_at, ended_at, error_message, checks) VALUES (?, ?, ?, ?, ?)',
+        derive=derive_incidents,
+    ),
+    # For switching to HISTORY_BACKEND=runs, run before the switch
+    'runs': Target(
+        setup=[RUNS_TABLE, RUNS_INDEX],
+        clear='DELETE FROM history_runs WHERE website_id = ? AND started_at < ?',
+        insert=INSERT_RUNS,
+        derive=build_runs,
+        sampled=True,
+    ),
+}
+
+
+@dataclass
+class BackfillStats:
+    """Work done by a backfill or one of its partitions"""
+    websites: int = 0
+    skipped: int = 0  # finished by an earlier run
+    history_rows: int = 0
+    derived_rows: int = 0
+    
+    def add(self, other: 'BackfillStats'):
+        self.websites += other.websites
+        self.skipped += other.skipped
+        self.history_rows += other.history_rows
+        self.derived_rows += other.derived_rows
+
+
+def backfill_partition(db_path: str, target: str, website_ids: List[int], cutoff: int,
+                       chunk_size: int = 5000, batch_size: int = 5000,
+                       sample_interval: float = SAMPLE_INTERVAL_SECONDS) -> BackfillStats:
+    """Rebuild the target's rows of some websites, skipping finished ones"""
+    spec = TARGETS[target]
+    source = DatabaseRepository(db_path)
+    until = from_epoch_ms(cutoff)
+    stats = BackfillStats()
+    
+    def counted(history):
+        for result in history:
+            stats.history_rows += 1
+            yield result
+    
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    try:
+        placeholders = ', '.join('?' * len(website_ids))
+        finished = {
+            row[0] for row in conn.execute(
+                f'SELECT website_id FROM backfill_progress WHERE target = ? AND website_id IN ({placeholders})',
+                [target, *website_ids]
+            )
+        }
+        
+        for website_id in website_ids:
+            if website_id in finished:
+                stats.skipped += 1
+                continue
+            
+            history = counted(source.iter_website_history(website_id, until=until, chunk_size=chunk_size))
+            with conn:
+                conn.execute(spec.clear, (website_id, cutoff))
+            
+            rows = 0
+            batch = []
+            derived = spec.derive(history, sample_interval) if spec.sampled else spec.derive(history)
+            for row in derived:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    with conn:
+                        conn.executemany(spec.insert, batch)
+                    rows += len(batch)
+                    batch = []
+            
+            with conn:
+                conn.executemany(spec.insert, batch)
+                conn.execute(
+                    'INSERT OR REPLACE INTO backfill_progress (target, website_id, rows, finished_at) VALUES (?, ?, ?, ?)',
+                    (target, website_id, rows + len(batch), now_ms())
+                )
+            stats.websites += 1
+            stats.derived_rows += rows + len(batch)
+    finally:
+        conn.close()
+    
+    return stats
+
+
+def run_backfill(db_path: str, target: str, workers: int = 4, partition_size: int = 500,
+                 chunk_size: int = 5000, batch_size: int = 5000, restart: bool = False,
+                 sample_interval: float = SAMPLE_INTERVAL_SECONDS, out: TextIO = sys.stderr) -> BackfillStats:
+    """Backfill the target for all websites, reporting throughput to out
+    
+    sample_interval is the run length limit of the runs target in seconds.
+    """
+    spec = TARGETS[target]
+    cutoff = now_ms()
+    
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT)
+    try:
+        with conn:
+            conn.execute(PROGRESS_TABLE)
+            for ddl in spec.setup:
+                conn.execute(ddl)
+            if restart:
+                conn.execute('DELETE FROM backfill_progress WHERE target = ?', (target,))
+            website_ids = [row[0] for row in conn.execute('SELECT id FROM websites ORDER BY id')]
+    finally:
+        conn.close()
+    
+    partitions = [website_ids[i:i + partition_size] for i in range(0, len(website_ids), partition_size)]
+    stats = BackfillStats()
+    started = time.perf_counter()
+    
+    def report(done: int):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"[{done}/{len(partitions)}] {stats.websites} websites ({stats.skipped} already done), "
+            f"{stats.history_rows} history rows -> {stats.derived_rows} {target} rows, "
+            f"{stats.history_rows / elapsed:,.0f} rows/s",
+            file=out
+        )
+    
+    args = (db_path, target)
+    if workers <= 1:
+        for done, partition in enumerate(partitions, 1):
+            stats.add(backfill_partition(*args, partition, cutoff, chunk_size, batch_size, sample_interval))
+            report(done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(backfill_partition, *args, partition, cutoff, chunk_size, batch_size, sample_interval)
+                for partition in partitions
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                stats.add(future.result())
+                report(done)
+    
+    logger.info(f"Backfilled {target} for {stats.websites} websites in {time.perf_counter() - started:.1f}s")
+    return stats
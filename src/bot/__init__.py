@@ -1,4 +1,11 @@
 # src/bot/__init__.py
-from .handlers import setup_handlers
 
 __all__ = ['setup_handlers']
+
+
+def __getattr__(name):
+    # Handlers import python-telegram-bot, load them only when asked for
+    if name == 'setup_handlers':
+        from .handlers import setup_handlers
+        return setup_handlers
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,83 @@
+# src/bot/cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+
+class RenderCache:
+    """LRU cache of rendered bot pages, invalidated per chat
+    
+    Entries are dropped when a chat's websites change (status transition,
+    add or remove) and expire after ttl seconds so times like "last checked"
+    never lag more than one check interval.
+    """
+    
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._keys_by_chat: Dict[int, Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, chat_id: int, key: Hashable) -> Optional[Any]:
+        """Get cached value, None on miss"""
+        entry = self._entries.get((chat_id, key))
+        
+        if entry is not None:
+            value, stored_at = entry
+            if self.ttl is None or self.clock() - stored_at < self.ttl:
+                self._entries.move_to_end((chat_id, key))
+                self.hits += 1
+                return value
+            self._remove((chat_id, key))
+        
+        self.misses += 1
+        return None
+    
+    def put(self, chat_id: int, key: Hashable, value: Any):
+        """Store value, evicting least recently used entries"""
+        self._entries[(chat_id, key)] = (value, self.clock())
+        self._entries.move_to_end((chat_id, key))
+        self._keys_by_chat.setdefault(chat_id, set()).add(key)
+        
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+    
+    def invalidate(self, chat_id: int):
+        """Drop all cached pages of a chat"""
+        keys = self._keys_by_chat.pop(chat_id, None)
+        if not keys:
+            return
+        for key in keys:
+            self._entries.pop((chat_id, key), None)
+        self.invalidations += 1
+    
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
+        self._keys_by_chat.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        """Get cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+    
+    def _remove(self, entry_key):
+        chat_id, key = entry_key
+        self._entries.pop(entry_key, None)
+        keys = self._keys_by_chat.get(chat_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_chat[chat_id]
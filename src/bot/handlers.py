@@ -1,19 +1,37 @@
 # src/bot/handlers.py
+import html
+import io
 import logging
-import re
+import tempfile
 from typing import Callable
 
 from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.error import BadRequest
+from telegram.ext import (
+    Application, CallbackQueryHandler, CommandHandler, ContextTypes, MessageHandler, filters
+)
 
 import config
-from src.database import DatabaseRepository
-from src.bot.keyboard import get_main_keyboard
+from src.database import Storage
+from src.bot.cache import RenderCache
+from src.bot.keyboard import get_main_keyboard, get_page_keyboard
+from src.bot.validators import DEFAULT_RANGE, is_valid_url, parse_duration, parse_url_list
+from src.bot.views import (
+    EMPTY_MESSAGE, PAGE_SIZE, display_url, render_incidents, render_lag, render_list_page,
+    render_profile, render_reports, render_site_report, render_status_page
+)
+from src.exports import HISTORY_WRITERS, write_websites_csv
 
 logger = logging.getLogger(__name__)
 
+# Largest URL list accepted as a document upload
+MAX_IMPORT_BYTES = 1024 * 1024
 
-def setup_handlers(application, db: DatabaseRepository):
+# Incidents listed by /incidents
+MAX_INCIDENTS = 15
+
+
+def setup_handlers(application, db: Storage, render_cache: RenderCache = None):
     """Setup bot command handlers"""
     
     # Register command handlers
@@ -38,9 +56,31 @@ def setup_handlers(application, db: DatabaseRepository):
     application.add_handler(
         CommandHandler("history", history_command)
     )
+    application.add_handler(
+        CommandHandler("export", export_command)
+    )
+    application.add_handler(
+        CommandHandler("report", report_command)
+    )
+    application.add_handler(
+        CommandHandler("incidents", incidents_command)
+    )
+    application.add_handler(
+        CommandHandler("profile", profile_command)
+    )
+    application.add_handler(
+        CommandHandler("lag", lag_command)
+    )
+    application.add_handler(
+        MessageHandler(filters.Document.ALL, import_document)
+    )
+    application.add_handler(
+        CallbackQueryHandler(page_callback, pattern=r'^(list|status)(:|$)')
+    )
     
-    # Store db in context
+    # Store db and rendered page cache in context
     application.bot_data['db'] = db
+    application.bot_data['render_cache'] = render_cache or RenderCache()
 
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -58,8 +98,14 @@ I'll help you monitor your websites and alert you when they go down.
 /list - List all monitored websites
 /status - Show status of all websites
 /history &lt;url&gt; - Show uptime history
+/report [url] [range] - Uptime, latency and outage report
+/incidents [url] - Recent outages
+/export - Download your websites as CSV
+/export &lt;url&gt; [csv|ndjson] - Download full check history
 /help - Show this help message
 
+Send a .txt or .csv file with one URL per line to add many websites at once.
+
 <b>How it works:</b>
 • I check your websites every 2 minutes
 • You'll get instant alerts when sites go down
@@ -83,6 +129,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 /add &lt;url&gt; - Add a website to monitor
 Example: /add https://example.com
+TCP port: /add tcp://mail.example.com:25?banner=220
 
 /remove &lt;url&gt; - Remove a website from monitoring
 Example: /remove https://example.com
@@ -93,6 +140,19 @@ Example: /remove https://example.com
 
 /history &lt;url&gt; - Show uptime history for a website
 
+/report [url] [range] - SLA report: uptime, latency percentiles, MTTR, MTBF
+Range like 24h, 7d or 4w (default 30d). Without a URL all websites are reported.
+
+/incidents [url] - Recent outages with duration and first error
+
+/export - Download your websites as a CSV file
+
+/export &lt;url&gt; [csv|ndjson] - Download the full check history of a website
+
+<b>Bulk import:</b>
+Send a .txt or .csv file with one URL per line (first column).
+Duplicates and already monitored websites are skipped.
+
 <b>Features:</b>
 • Checks every 2 minutes
 • Alerts on status change only
@@ -123,13 +183,22 @@ async def add_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Validate URL
     if not is_valid_url(url):
         await update.message.reply_text(
-            "❌ Invalid URL. Please provide a valid URL starting with http:// or https://"
+            "❌ Invalid URL. Please provide a valid URL starting with http:// or https://, "
+            "or a TCP monitor like tcp://example.com:5432"
         )
         return
     
     # Add to database
     db = context.bot_data['db']
+    limit = config.get_settings().max_sites_per_chat
+    if limit and sum(db.count_user_websites(chat_id).values()) >= limit:
+        await update.message.reply_text(
+            f"❌ You have reached the limit of {limit} websites. Remove one with /remove first."
+        )
+        return
+    
     website = db.add_website(chat_id, url)
+    invalidate_pages(context, chat_id)
     
     await update.message.reply_text(
         f"✅ <b>Website Added!</b>\n\n"
@@ -155,7 +224,14 @@ async def remove_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Remove from database
     db = context.bot_data['db']
+    website = db.get_website_by_url(chat_id, url)
     removed = db.remove_website(chat_id, url)
+    invalidate_pages(context, chat_id)
+    
+    scheduler = context.bot_data.get('scheduler')
+    if removed and website and scheduler:
+        # Backoff state would otherwise stay for the life of the process
+        scheduler.breaker.forget(website.id)
     
     if removed:
         await update.message.reply_text(
@@ -177,73 +253,103 @@ async def list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /list command"""
     chat_id = update.effective_chat.id
     
-    db = context.bot_data['db']
-    websites = db.get_user_websites(chat_id)
+    text, keyboard = render_page(context, chat_id, 'list')
+    await update.message.reply_text(text, parse_mode='HTML', reply_markup=keyboard)
+
+
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /status command"""
+    chat_id = update.effective_chat.id
     
-    if not websites:
-        await update.message.reply_text(
-            "📭 <b>No websites monitored</b>\n\n"
-            "Use /add &lt;url&gt; to add a website.",
-            parse_mode='HTML'
-        )
+    text, keyboard = render_page(context, chat_id, 'status')
+    await update.message.reply_text(text, parse_mode='HTML', reply_markup=keyboard)
+
+
+async def page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle page navigation and main menu buttons for /list and /status"""
+    query = update.callback_query
+    chat_id = update.effective_chat.id
+    await query.answer()
+    
+    # Main menu buttons carry just the view name and open a new message
+    if ':' not in query.data:
+        text, keyboard = render_page(context, chat_id, query.data)
+        await query.message.reply_text(text, parse_mode='HTML', reply_markup=keyboard)
         return
     
-    message = "<b>📋 Your Monitored Websites</b>\n\n"
+    view, direction, cursor, page_no = query.data.split(':')
+    cursor = int(cursor)
     
-    for i, website in enumerate(websites, 1):
-        status_emoji = "🟢" if website.last_status == "up" else "🔴" if website.last_status == "down" else "⚪"
-        message += f"{i}. {status_emoji} {website.url}\n"
-        if website.last_checked:
-            message += f"   Last checked: {website.last_checked.strftime('%H:%M:%S')}\n"
-        message += "\n"
+    text, keyboard = render_page(
+        context, chat_id, view,
+        after_id=cursor if direction == 'next' else None,
+        before_id=cursor if direction == 'prev' else None,
+        page_no=int(page_no)
+    )
     
-    await update.message.reply_text(message, parse_mode='HTML')
+    try:
+        await query.edit_message_text(text, parse_mode='HTML', reply_markup=keyboard)
+    except BadRequest as e:
+        # Pressing a button twice renders the same page again
+        if 'not modified' not in str(e).lower():
+            raise
 
 
-async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /status command"""
-    chat_id = update.effective_chat.id
+def render_page(context: ContextTypes.DEFAULT_TYPE, chat_id: int, view: str,
+                after_id: int = None, before_id: int = None, page_no: int = 1):
+    """Render one page of /list or /status, return text and keyboard"""
+    cache = context.bot_data.get('render_cache')
+    key = (view, after_id, before_id, page_no)
     
-    db = context.bot_data['db']
-    websites = db.get_user_websites(chat_id)
+    if cache is not None:
+        cached = cache.get(chat_id, key)
+        if cached is not None:
+            return cached
     
-    if not websites:
-        await update.message.reply_text(
-            "📭 <b>No websites monitored</b>\n\n"
-            "Use /add &lt;url&gt; to add a website.",
-            parse_mode='HTML'
-        )
-        return
+    rendered = _render_page(context, chat_id, view, after_id, before_id, page_no)
+    
+    if cache is not None:
+        cache.put(chat_id, key, rendered)
+    return rendered
+
+
+def invalidate_pages(context: ContextTypes.DEFAULT_TYPE, chat_id: int):
+    """Drop cached /list and /status pages of a chat"""
+    cache = context.bot_data.get('render_cache')
+    if cache is not None:
+        cache.invalidate(chat_id)
+
+
+def _render_page(context: ContextTypes.DEFAULT_TYPE, chat_id: int, view: str,
+                 after_id: int, before_id: int, page_no: int):
+    """Query and render a page"""
+    db = context.bot_data['db']
     
-    message = "<b>📊 Website Status</b>\n\n"
+    page = db.get_user_websites_page(chat_id, after_id=after_id, before_id=before_id, limit=PAGE_SIZE)
+    if not page.websites and page_no > 1:
+        # Websites were removed since the page was shown, start over
+        page_no = 1
+        page = db.get_user_websites_page(chat_id, limit=PAGE_SIZE)
     
-    up_count = 0
-    down_count = 0
+    if not page.websites:
+        return EMPTY_MESSAGE, None
     
-    for website in websites:
-        if website.last_status == "up":
-            up_count += 1
-            emoji = "🟢"
-        elif website.last_status == "down":
-            down_count += 1
-            emoji = "🔴"
-        else:
-            emoji = "⚪"
-        
-        message += f"{emoji} <b>{website.url}</b>\n"
-        
-        if website.last_status:
-            status_text = "UP" if website.last_status == "up" else "DOWN"
-            message += f"   Status: {status_text}\n"
-        
-        if website.last_checked:
-            message += f"   Last: {website.last_checked.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        
-        message += "\n"
+    counts = db.count_user_websites(chat_id)
     
-    message += f"<b>Summary:</b> {up_count} up, {down_count} down"
+    if view == 'list':
+        text = render_list_page(page, page_no, sum(counts.values()))
+    else:
+        # Scheduler is optional so handlers work without a running monitor
+        scheduler = context.bot_data.get('scheduler')
+        breaker = scheduler.breaker if scheduler else None
+        backed_off = 0
+        open_ids = breaker.open_ids() if breaker else None
+        if open_ids:
+            # Across the chat, not just this page
+            backed_off = sum(1 for website in db.iter_user_websites(chat_id) if website.id in open_ids)
+        text = render_status_page(page, page_no, counts, breaker, backed_off)
     
-    await update.message.reply_text(message, parse_mode='HTML')
+    return text, get_page_keyboard(view, page, page_no)
 
 
 async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -301,14 +407,279 @@ async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(message, parse_mode='HTML')
 
 
-def is_valid_url(url: str) -> bool:
-    """Validate URL format"""
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
-        r'localhost|'  # localhost
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+async def report_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /report [url] [range]"""
+    # Reports need numpy, imported on first use to keep startup fast
+    from src.reports import build_reports
+    
+    chat_id = update.effective_chat.id
+    args = list(context.args or [])
+    
+    # The range is the last argument, the URL is optional
+    period = DEFAULT_RANGE
+    label = f"{DEFAULT_RANGE.days}d"
+    if args and parse_duration(args[-1]) is not None:
+        label = args.pop()
+        period = parse_duration(label)
     
-    return bool(url_pattern.match(url))
+    if len(args) > 1:
+        await update.message.reply_text(
+            "❌ Invalid range. Use hours, days or weeks like 24h, 7d or 4w.\n"
+            "Example: /report https://example.com 7d"
+        )
+        return
+    
+    db = context.bot_data['db']
+    
+    if not args:
+        websites = db.get_user_websites(chat_id)
+        if not websites:
+            await update.message.reply_text(EMPTY_MESSAGE, parse_mode='HTML')
+            return
+        
+        reports = build_reports(db, [w.id for w in websites], period)
+        await update.message.reply_text(render_reports(websites, reports, label), parse_mode='HTML')
+        return
+    
+    url = args[0]
+    website = db.get_website_by_url(chat_id, url)
+    
+    if not website:
+        await update.message.reply_text(
+            f"❌ Website not found.\n\n"
+            f"🌐 {url}\n\n"
+            f"You're not monitoring this website.",
+            parse_mode='HTML'
+        )
+        return
+    
+    reports = build_reports(db, [website.id], period)
+    await update.message.reply_text(
+        render_site_report(website, reports.get(website.id), label),
+        parse_mode='HTML'
+    )
+
+
+async def incidents_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /incidents [url]"""
+    chat_id = update.effective_chat.id
+    db = context.bot_data['db']
+    
+    if context.args:
+        url = context.args[0]
+        website = db.get_website_by_url(chat_id, url)
+        if not website:
+            await update.message.reply_text(
+                f"❌ Website not found.\n\n"
+                f"🌐 {url}\n\n"
+                f"You're not monitoring this website.",
+                parse_mode='HTML'
+            )
+            return
+        websites = [website]
+        title = display_url(website.url)
+    else:
+        websites = db.get_user_websites(chat_id)
+        if not websites:
+            await update.message.reply_text(EMPTY_MESSAGE, parse_mode='HTML')
+            return
+        title = f"{len(websites)} websites"
+    
+    ids = [w.id for w in websites]
+    incidents = db.get_incidents(ids, limit=MAX_INCIDENTS)
+    stats = db.get_incident_stats(ids)
+    errors = db.get_error_counts(ids) if incidents else {}
+    urls = {w.id: w.url for w in websites}
+    
+    await update.message.reply_text(render_incidents(incidents, urls, stats, title, errors), parse_mode='HTML')
+
+
+def is_admin(update: Update) -> bool:
+    """Check whether the update comes from the configured admin user"""
+    return config.get_settings().is_admin(update.effective_user.id)
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /profile [on|off] (admin only)"""
+    if not is_admin(update):
+        await update.message.reply_text("❌ This command is only available to the bot admin.")
+        return
+    
+    scheduler = context.bot_data.get('scheduler')
+    if scheduler is None:
+        await update.message.reply_text("❌ Monitoring is not running.")
+        return
+    
+    action = context.args[0].lower() if context.args else 'status'
+    if action == 'on':
+        scheduler.enable_profiling()
+    elif action == 'off':
+        scheduler.disable_profiling()
+    elif action != 'status':
+        await update.message.reply_text("❌ Usage: /profile [on|off]")
+        return
+    
+    profiler = scheduler.profiler
+    await update.message.reply_text(
+        render_profile(profiler is not None, profiler.last_snapshot if profiler else None,
+                       scheduler.settings.profile_file),
+        parse_mode='HTML'
+    )
+
+
+async def lag_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /lag (admin only)"""
+    if not is_admin(update):
+        await update.message.reply_text("❌ This command is only available to the bot admin.")
+        return
+    
+    watchdog = context.bot_data.get('watchdog')
+    if watchdog is None:
+        await update.message.reply_text("❌ Event loop monitoring is not running.")
+        return
+    
+    scheduler = context.bot_data.get('scheduler')
+    tenants = scheduler.fair.lag_report() if scheduler is not None else []
+    await update.message.reply_text(
+        render_lag(watchdog.percentiles(), watchdog.recent_stalls(), watchdog.debug, tenants),
+        parse_mode='HTML'
+    )
+
+
+async def import_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle uploaded URL list (newline list or CSV)"""
+    chat_id = update.effective_chat.id
+    document = update.message.document
+    
+    if document.file_size and document.file_size > MAX_IMPORT_BYTES:
+        await update.message.reply_text(
+            f"❌ File too large. Maximum size is {MAX_IMPORT_BYTES // 1024} KB."
+        )
+        return
+    
+    file = await document.get_file()
+    data = await file.download_as_bytearray()
+    
+    try:
+        text = data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        await update.message.reply_text("❌ File must be UTF-8 text with one URL per line.")
+        return
+    
+    valid, invalid = parse_url_list(io.StringIO(text, newline=''))
+    
+    if not valid:
+        await update.message.reply_text(
+            "❌ No valid URLs found.\n"
+            "URLs must start with http://, https:// or tcp://"
+        )
+        return
+    
+    db = context.bot_data['db']
+    over_limit = 0
+    limit = config.get_settings().max_sites_per_chat
+    if limit:
+        # URLs past the quota are dropped, already monitored ones still count
+        room = max(0, limit - sum(db.count_user_websites(chat_id).values()))
+        over_limit = max(0, len(valid) - room)
+        valid = valid[:room]
+    
+    added = db.add_websites(chat_id, valid)
+    invalidate_pages(context, chat_id)
+    
+    message = (
+        f"✅ <b>Import Finished</b>\n\n"
+        f"➕ Added: {added}\n"
+        f"♻️ Already monitored: {len(valid) - added}\n"
+        f"❌ Invalid: {len(invalid)}\n"
+    )
+    if over_limit:
+        message += f"🚫 Over the {limit}-website limit: {over_limit}\n"
+    if invalid:
+        message += "\n<b>Invalid entries:</b>\n"
+        message += "\n".join(html.escape(url) for url in invalid[:10])
+        if len(invalid) > 10:
+            message += f"\n… and {len(invalid) - 10} more"
+    
+    await update.message.reply_text(message, parse_mode='HTML')
+
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /export command"""
+    chat_id = update.effective_chat.id
+    db = context.bot_data['db']
+    
+    if context.args:
+        await export_history(update, context)
+        return
+    
+    # Stream rows into a temporary file instead of building the CSV in memory
+    with tempfile.TemporaryFile() as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        count = write_websites_csv(db.iter_user_websites(chat_id), text)
+        text.flush()
+        text.detach()
+        
+        if count == 0:
+            await update.message.reply_text(
+                "📭 <b>No websites monitored</b>\n\n"
+                "Use /add &lt;url&gt; to add a website.",
+                parse_mode='HTML'
+            )
+            return
+        
+        raw.seek(0)
+        await update.message.reply_document(
+            document=raw,
+            filename='websites.csv',
+            caption=f"📋 {count} websites"
+        )
+
+
+async def export_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /export <url> [csv|ndjson]"""
+    chat_id = update.effective_chat.id
+    url = context.args[0]
+    fmt = context.args[1].lower() if len(context.args) > 1 else 'csv'
+    
+    if fmt not in HISTORY_WRITERS:
+        await update.message.reply_text(
+            "❌ Unknown format. Use csv or ndjson.\n"
+            "Example: /export https://example.com ndjson"
+        )
+        return
+    
+    db = context.bot_data['db']
+    website = db.get_website_by_url(chat_id, url)
+    
+    if not website:
+        await update.message.reply_text(
+            f"❌ Website not found.\n\n"
+            f"🌐 {url}\n\n"
+            f"You're not monitoring this website.",
+            parse_mode='HTML'
+        )
+        return
+    
+    # History is streamed chunk by chunk into a temporary file
+    with tempfile.TemporaryFile() as raw:
+        text = io.TextIOWrapper(raw, encoding='utf-8', newline='')
+        count = HISTORY_WRITERS[fmt](db.iter_website_history(website.id), text)
+        text.flush()
+        text.detach()
+        
+        if count == 0:
+            await update.message.reply_text(
+                f"📊 <b>No history yet</b>\n\n"
+                f"🌐 {url}\n\n"
+                f"Checking soon...",
+                parse_mode='HTML'
+            )
+            return
+        
+        raw.seek(0)
+        await update.message.reply_document(
+            document=raw,
+            filename=f'history-{website.id}.{fmt}',
+            caption=f"📊 {count} checks for {url}"
+        )
@@ -29,3 +29,20 @@ def get_yes_no_keyboard(confirm_data: str, cancel_data: str = "cancel"):
         ]
     ]
     return InlineKeyboardMarkup(keyboard)
+
+
+def get_page_keyboard(view: str, page, page_no: int):
+    """Previous/next navigation for paginated views"""
+    buttons = []
+    if page.has_prev:
+        buttons.append(
+            InlineKeyboardButton("⬅️ Prev", callback_data=f"{view}:prev:{page.first_id}:{page_no - 1}")
+        )
+    if page.has_next:
+        buttons.append(
+            InlineKeyboardButton("Next ➡️", callback_data=f"{view}:next:{page.last_id}:{page_no + 1}")
+        )
+    
+    if not buttons:
+        return None
+    return InlineKeyboardMarkup([buttons])
@@ -0,0 +1,80 @@
+# src/bot/validators.py
+import csv
+import re
+from datetime import timedelta
+from typing import Iterable, List, Optional, Tuple
+
+URL_PATTERN = re.compile(
+    r'^https?://'  # http:// or https://
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
+    r'localhost|'  # localhost
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
+    r'(?::\d+)?'  # optional port
+    r'(?:/?|[/?]\S+)$', re.IGNORECASE)
+
+# tcp://host:port with an optional ?banner=<text> the greeting must contain
+TCP_PATTERN = re.compile(
+    r'^tcp://'
+    r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain
+    r'localhost|'  # localhost
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # IP
+    r':(\d{1,5})'  # required port
+    r'/?(?:\?banner(?:=\S*)?)?$', re.IGNORECASE)
+
+DURATION_PATTERN = re.compile(r'^(\d+)([hdw])$', re.IGNORECASE)
+DURATION_UNITS = {'h': 'hours', 'd': 'days', 'w': 'weeks'}
+MAX_DURATION = timedelta(days=366)
+
+# Range used when /report is called without one
+DEFAULT_RANGE = timedelta(days=30)
+
+
+def is_valid_url(url: str) -> bool:
+    """Validate HTTP(S) URL or tcp://host:port format"""
+    if URL_PATTERN.match(url):
+        return True
+    match = TCP_PATTERN.match(url)
+    return bool(match) and 0 < int(match.group(1)) < 65536
+
+
+def parse_duration(text: str) -> Optional[timedelta]:
+    """Parse a range like 24h, 7d or 4w, None if invalid"""
+    match = DURATION_PATTERN.match(text.strip())
+    if not match:
+        return None
+    
+    duration = timedelta(**{DURATION_UNITS[match.group(2).lower()]: int(match.group(1))})
+    if not timedelta(0) < duration <= MAX_DURATION:
+        return None
+    return duration
+
+
+def parse_url_list(lines: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Parse a newline list or CSV of URLs
+    
+    The URL is taken from the first column, so files written by the export
+    can be imported again. Blank lines, '#' comments and a 'url' header are
+    skipped. Returns (valid, invalid), both deduplicated in input order.
+    """
+    valid = []
+    invalid = []
+    seen = set()
+    
+    for row in csv.reader(lines):
+        if not row:
+            continue
+        
+        url = row[0].strip()
+        if not url or url.startswith('#') or url.lower() == 'url':
+            continue
+        
+        if url in seen:
+            continue
+        seen.add(url)
+        
+        if is_valid_url(url):
+            valid.append(url)
+        else:
+            invalid.append(url)
+    
+    return valid, invalid
@@ -0,0 +1,275 @@
+# src/bot/views.py
+import html
+import math
+from typing import Dict, List, Optional, Tuple
+
+from src.database import Incident, Website, WebsitePage
+
+# Websites per page of /list and /status, keeps every message far below
+# Telegram's 4096 character limit
+PAGE_SIZE = 10
+MAX_URL_LENGTH = 80
+
+# Websites listed in an all-sites /report, worst uptime first
+MAX_REPORT_SITES = 25
+
+EMPTY_MESSAGE = (
+    "📭 <b>No websites monitored</b>\n\n"
+    "Use /add &lt;url&gt; to add a website."
+)
+
+
+def status_emoji(status: Optional[str]) -> str:
+    """Get emoji for website status"""
+    if status == "up":
+        return "🟢"
+    if status == "down":
+        return "🔴"
+    if status == "degraded":
+        return "🟡"
+    return "⚪"
+
+
+def display_url(url: str) -> str:
+    """Shorten and escape URL for HTML messages"""
+    if len(url) > MAX_URL_LENGTH:
+        url = url[:MAX_URL_LENGTH - 1] + "…"
+    return html.escape(url)
+
+
+def page_count(total: int) -> int:
+    """Get number of pages for total websites"""
+    return max(1, math.ceil(total / PAGE_SIZE))
+
+
+def _page_footer(page_no: int, total: int) -> str:
+    pages = page_count(total)
+    if pages == 1:
+        return ""
+    return f"\n<i>Page {page_no}/{pages} · {total} websites</i>"
+
+
+def render_list_page(page: WebsitePage, page_no: int, total: int) -> str:
+    """Render one page of /list"""
+    message = "<b>📋 Your Monitored Websites</b>\n\n"
+    
+    start = (page_no - 1) * PAGE_SIZE + 1
+    for i, website in enumerate(page.websites, start):
+        message += f"{i}. {status_emoji(website.last_status)} {display_url(website.url)}\n"
+        if website.last_checked:
+            message += f"   Last checked: {website.last_checked.strftime('%H:%M:%S')}\n"
+        message += "\n"
+    
+    message += _page_footer(page_no, total)
+    return message
+
+
+def render_status_page(page: WebsitePage, page_no: int,
+                       counts: Dict[Optional[str], int], breaker=None, backed_off: int = 0) -> str:
+    """Render one page of /status, backed_off counts the chat's backed-off websites"""
+    message = "<b>📊 Website Status</b>\n\n"
+    
+    for website in page.websites:
+        message += f"{status_emoji(website.last_status)} <b>{display_url(website.url)}</b>\n"
+        
+        if website.last_status:
+            message += f"   Status: {website.last_status.upper()}\n"
+        
+        if website.last_checked:
+            message += f"   Last: {website.last_checked.strftime('%Y-%m-%d %H:%M:%S')}\n"
+        
+        if breaker and breaker.is_open(website.id):
+            interval = breaker.current_interval(website.id) / 60
+            next_check = breaker.seconds_until_next(website.id) / 60
+            message += (
+                f"   ⏸️ Backed off: every {interval:.0f} min "
+                f"(next in {next_check:.0f} min, {breaker.failures(website.id)} failures)\n"
+            )
+        
+        message += "\n"
+    
+    up_count = counts.get("up", 0)
+    down_count = counts.get("down", 0)
+    message += f"<b>Summary:</b> {up_count} up, {down_count} down"
+    if counts.get("degraded"):
+        message += f", {counts['degraded']} degraded"
+    if backed_off:
+        message += f", {backed_off} backed off"
+    message += _page_footer(page_no, sum(counts.values()))
+    return message
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Format seconds as a short duration like 2h 5m"""
+    if seconds is None:
+        return "N/A"
+    
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes = seconds // 60
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+def format_latency(seconds: Optional[float]) -> str:
+    """Format response time in seconds"""
+    return "N/A" if seconds is None else f"{seconds:.2f}s"
+
+
+def render_site_report(website: Website, report, period: str) -> str:
+    """Render /report for one website"""
+    message = f"<b>📈 Report: {display_url(website.url)}</b>\n<i>Last {period}</i>\n\n"
+    
+    if report is None:
+        return message + "No checks in this range yet."
+    
+    message += (
+        f"Uptime: {report.uptime * 100:.2f}% ({report.checks} checks)\n"
+        f"Latency p50/p95/p99: {format_latency(report.p50)} / "
+        f"{format_latency(report.p95)} / {format_latency(report.p99)}\n\n"
+        f"Outages: {report.outages}\n"
+        f"Downtime: {format_duration(report.downtime)}\n"
+        f"MTTR: {format_duration(report.mttr)}\n"
+        f"MTBF: {format_duration(report.mtbf)}\n"
+    )
+    return message
+
+
+def render_reports(websites: List[Website], reports: Dict[int, object], period: str) -> str:
+    """Render /report for all websites of a user"""
+    message = f"<b>📈 Report: {len(websites)} websites</b>\n<i>Last {period}</i>\n\n"
+    
+    checked = [(website, reports[website.id]) for website in websites if website.id in reports]
+    if not checked:
+        return message + "No checks in this range yet."
+    
+    checks = sum(report.checks for _, report in checked)
+    up = sum(report.uptime * report.checks for _, report in checked)
+    outages = sum(report.outages for _, report in checked)
+    message += f"<b>Overall:</b> {up / checks * 100:.2f}% uptime, {outages} outages\n\n"
+    
+    checked.sort(key=lambda item: item[1].uptime)
+    for website, report in checked[:MAX_REPORT_SITES]:
+        emoji = "🟢" if report.outages == 0 else "🔴"
+        message += (
+            f"{emoji} {display_url(website.url)}\n"
+            f"   {report.uptime * 100:.2f}% · p95 {format_latency(report.p95)} · "
+            f"{report.outages} outages · MTTR {format_duration(report.mttr)}\n"
+        )
+    
+    if len(checked) > MAX_REPORT_SITES:
+        message += f"\n… and {len(checked) - MAX_REPORT_SITES} more"
+    missing = len(websites) - len(checked)
+    if missing:
+        message += f"\n<i>{missing} websites without checks in this range</i>"
+    return message
+
+
+def render_incidents(incidents: List[Incident], urls: Dict[int, str],
+                     stats: Dict[str, object], title: str, errors: Dict[str, int] = None) -> str:
+    """Render /incidents, newest first, with failed checks by error class"""
+    message = f"<b>🚨 Incidents: {title}</b>\n\n"
+    
+    if not incidents:
+        return message + "No incidents recorded. 🎉"
+    
+    message += (
+        f"{stats['incidents']} incidents ({stats['ongoing']} ongoing) · "
+        f"downtime {format_duration(stats['downtime'])} · MTTR {format_duration(stats['mttr'])}\n"
+    )
+    if errors:
+        message += "Failed checks: " + " · ".join(f"{label} {count}" for label, count in errors.items()) + "\n"
+    message += "\n"
+    
+    for incident in incidents:
+        started = incident.started_at.strftime('%m/%d %H:%M')
+        duration = format_duration(incident.duration().total_seconds())
+        if incident.is_open:
+            message += f"🔴 <b>Ongoing</b> since {started} ({duration}, {incident.checks} checks)\n"
+        else:
+            message += f"✅ {started} → {incident.ended_at.strftime('%m/%d %H:%M')} ({duration})\n"
+        
+        if len(urls) > 1:
+            message += f"   🌐 {display_url(urls.get(incident.website_id, '?'))}\n"
+        if incident.error_message:
+            message += f"   ⚠️ {html.escape(incident.error_message)}\n"
+    
+    return message
+
+
+def render_profile(enabled: bool, snapshot: Optional[dict], path) -> str:
+    """Render /profile status with the last cycle snapshot"""
+    message = f"<b>⏱️ Profiling {'enabled' if enabled else 'disabled'}</b>\n"
+    message += f"<i>Snapshots: {html.escape(str(path))}</i>\n"
+    
+    if not snapshot:
+        return message
+    
+    message += (
+        f"\n<b>Last cycle</b> ({snapshot['time']}): {snapshot['duration']:.2f}s, "
+        f"{snapshot['sites']} sites, {snapshot['samples']} samples\n"
+    )
+    for name, stage in snapshot['stages'].items():
+        message += f"   {name}: {stage['total']:.2f}s total, {stage['max']:.2f}s max\n"
+    
+    if snapshot['slowest_stages']:
+        message += "\n<b>Slowest stages:</b>\n"
+        for entry in snapshot['slowest_stages'][:5]:
+            message += f"   {entry['seconds']:.2f}s {entry['stage']} · {display_url(entry['url'] or '?')}\n"
+    
+    if snapshot['hot_functions']:
+        message += "\n<b>Hottest functions:</b>\n"
+        for entry in snapshot['hot_functions'][:5]:
+            message += f"   {entry['self'] * 100:.0f}% {html.escape(entry['function'])}\n"
+    
+    return message
+
+
+def render_check_lag(tenants: List[Tuple[int, Dict[str, float]]]) -> str:
+    """Render the chats that waited longest for a check slot"""
+    if not tenants:
+        return ""
+    message = "\n<b>Check lag by chat (worst p95):</b>\n"
+    for chat_id, lag in tenants:
+        message += f"• <code>{chat_id}</code>: p50 {lag['p50']:.2f}s · p95 {lag['p95']:.2f}s · max {lag['max']:.2f}s\n"
+    return message
+
+
+def render_lag(stats: Dict[str, float], stalls: List[dict], debug: bool,
+               tenants: List[Tuple[int, Dict[str, float]]] = ()) -> str:
+    """Render /lag with event loop lag percentiles, recent stalls and per-chat check lag"""
+    return _render_loop_lag(stats, stalls, debug) + render_check_lag(tenants)
+
+
+def _render_loop_lag(stats: Dict[str, float], stalls: List[dict], debug: bool) -> str:
+    message = "<b>🐢 Event Loop Lag</b>\n\n"
+    
+    if not stats:
+        message += "No samples yet.\n"
+    else:
+        message += (
+            f"p50 {stats['p50'] * 1000:.1f} ms · p95 {stats['p95'] * 1000:.1f} ms · "
+            f"p99 {stats['p99'] * 1000:.1f} ms · max {stats['max'] * 1000:.1f} ms\n"
+            f"<i>{stats['samples']} samples</i>\n"
+        )
+    
+    if not debug:
+        return message + "\nStall detection is off (set LOOP_DEBUG=true).\n"
+    
+    if not stalls:
+        return message + "\nNo stalls detected. 🎉\n"
+    
+    message += f"\n<b>Recent stalls ({len(stalls)}):</b>\n"
+    for stall in stalls[:3]:
+        # Innermost frames name the blocking call
+        frames = html.escape('\n'.join(stall['stack'].rstrip().split('\n')[-4:]))
+        message += f"⚠️ {stall['blocked'] * 1000:.0f}+ ms\n<pre>{frames}</pre>\n"
+    return message
+
@@ -0,0 +1,193 @@
+# src/bot/webhook.py
+import asyncio
+import hmac
+import json
+import logging
+from typing import Awaitable, Callable, Optional, Set
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'x-telegram-bot-api-secret-token'
+MAX_BODY_BYTES = 1024 * 1024
+
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+}
+
+UpdateHandler = Callable[[dict], Awaitable[None]]
+
+
+class WebhookServer:
+    """Minimal asyncio HTTP server receiving Telegram webhook updates"""
+    
+    def __init__(self, handler: UpdateHandler, secret_token: str,
+                 path: str = '/webhook', host: str = '0.0.0.0', port: int = 8000):
+        self.handler = handler
+        self.secret_token = secret_token
+        self.path = path
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Keep references so update tasks are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def start(self):
+        """Start listening for updates"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Resolve the real port when binding to port 0
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path}")
+    
+    async def serve_forever(self):
+        """Serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+    
+    async def stop(self):
+        """Stop server and wait for pending updates"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("Webhook server stopped")
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on a (keep-alive) connection"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                
+                method, path, headers, body = request
+                status, payload = self._route(method, path, headers, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                
+                writer.write(self._build_response(status, payload, keep_alive))
+                await writer.drain()
+                
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except Exception as e:
+            logger.error(f"Webhook connection error: {e}")
+        finally:
+            writer.close()
+    
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Read one HTTP request, None on EOF"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        
+        method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        
+        length = int(headers.get('content-length', '0'))
+        if length > MAX_BODY_BYTES:
+            # Refuse without reading the body and close the connection
+            headers['connection'] = 'close'
+            return method.upper(), urlparse(target).path, headers, None
+        body = await reader.readexactly(length) if length else b''
+        
+        return method.upper(), urlparse(target).path, headers, body
+    
+    def _route(self, method: str, path: str, headers: dict, body: bytes):
+        """Dispatch request, return status and body"""
+        if body is None:
+            return 413, b''
+        
+        if path == '/health':
+            return 200, b'ok'
+        
+        if path != self.path:
+            return 404, b''
+        
+        if method != 'POST':
+            return 405, b''
+        
+        # Constant-time comparison of the secret token header
+        token = headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            logger.warning("Rejected webhook request with invalid secret token")
+            return 403, b''
+        
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return 400, b''
+        
+        # Answer Telegram immediately, process the update in the background
+        task = asyncio.create_task(self._dispatch(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return 200, b''
+    
+    async def _dispatch(self, update: dict):
+        """Run update handler"""
+        try:
+            await self.handler(update)
+        except Exception as e:
+            logger.error(f"Error handling update: {e}", exc_info=True)
+    
+    def _build_response(self, status: int, body: bytes, keep_alive: bool) -> bytes:
+        """Build raw HTTP response"""
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Content-Type: text/plain\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        )
+        return head.encode('latin-1') + body
+
+
+def webhook_path(url: str) -> str:
+    """Get path the server listens on from the public webhook URL"""
+    # Telegram posts to '/' when the URL has no path
+    return urlparse(url).path or '/'
+
+
+async def run_webhook(application, url: str, secret_token: str,
+                      host: str = '0.0.0.0', port: int = 8000, allowed_updates=None):
+    """Run a python-telegram-bot Application in webhook mode"""
+    from telegram import Update
+    
+    async def handle_update(data: dict):
+        await application.update_queue.put(Update.de_json(data, application.bot))
+    
+    server = WebhookServer(handle_update, secret_token, path=webhook_path(url), host=host, port=port)
+    
+    async with application:
+        await application.start()
+        try:
+            await server.start()
+            # Registered inside the try so a rejected webhook still closes the server
+            await application.bot.set_webhook(
+                url=url,
+                secret_token=secret_token,
+                allowed_updates=allowed_updates,
+                drop_pending_updates=True
+            )
+            logger.info(f"Webhook registered at {url}")
+            await server.serve_forever()
+        finally:
+            await server.stop()
+            await application.stop()
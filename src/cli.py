@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Website Uptime Monitor - Command line tools
+
+Usage:
+    python -m src.cli import-sites --chat-id 123 urls.txt
+    python -m src.cli export-sites --chat-id 123 -o sites.csv
+    python -m src.cli export-history --chat-id 123 --url https://example.com --format ndjson
+    python -m src.cli backfill incidents --workers 4
+"""
+
+import argparse
+import logging
+import sys
+
+import config
+from src.backfill import TARGETS, run_backfill
+from src.bot.validators import parse_url_list
+from src.database import DatabaseRepository, Storage, open_storage
+from src.exports import HISTORY_WRITERS, write_websites_csv
+
+logger = logging.getLogger(__name__)
+
+
+def import_sites(db: Storage, args) -> int:
+    """Import a newline list or CSV of URLs for a chat"""
+    with open(args.file, encoding='utf-8-sig', newline='') as f:
+        valid, invalid = parse_url_list(f)
+    
+    added = db.add_websites(args.chat_id, valid)
+    
+    print(f"Added {added} websites, {len(valid) - added} already monitored, {len(invalid)} invalid")
+    for url in invalid:
+        print(f"  invalid: {url}", file=sys.stderr)
+    return 0
+
+
+def export_sites(db: Storage, args) -> int:
+    """Export a chat's websites as CSV"""
+    websites = db.iter_user_websites(args.chat_id)
+    
+    if args.output == '-':
+        count = write_websites_csv(websites, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            count = write_websites_csv(websites, f)
+    
+    print(f"Exported {count} websites", file=sys.stderr)
+    return 0
+
+
+def export_history(db: Storage, args) -> int:
+    """Stream a website's full history as CSV or NDJSON"""
+    website = db.get_website_by_url(args.chat_id, args.url)
+    if not website:
+        print(f"Website not found: {args.url}", file=sys.stderr)
+        return 1
+    
+    history = db.iter_website_history(website.id)
+    writer = HISTORY_WRITERS[args.format]
+    
+    if args.output == '-':
+        count = writer(history, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            count = writer(history, f)
+    
+    print(f"Exported {count} history rows", file=sys.stderr)
+    return 0
+
+
+def backfill(db: Storage, args) -> int:
+    """Rebuild a derived table from the history table"""
+    if not isinstance(db, DatabaseRepository) or db.history_store is not None:
+        print("Backfill reads the SQLite history table, use STORAGE_BACKEND and HISTORY_BACKEND sqlite",
+              file=sys.stderr)
+        return 1
+    
+    # Runs must split where the live store (HISTORY_BACKEND=runs) splits them
+    stats = run_backfill(
+        db.db_path, args.target, workers=args.workers, partition_size=args.partition_size,
+        chunk_size=args.chunk_size, batch_size=args.batch_size, restart=args.restart,
+        sample_interval=config.get_settings().run_sample_minutes * 60
+    )
+    print(f"Backfilled {args.target} for {stats.websites} websites, {stats.skipped} were already done",
+          file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build argument parser"""
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description="Website Uptime Monitor tools")
+    parser.add_argument('--db', help="Database path (default: DATA_DIR/monitor.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    cmd = commands.add_parser('import-sites', help="Bulk import websites from a URL list or CSV")
+    cmd.add_argument('--chat-id', type=int, required=True)
+    cmd.add_argument('file')
+    cmd.set_defaults(func=import_sites)
+    
+    cmd = commands.add_parser('export-sites', help="Export websites as CSV")
+    cmd.add_argument('--chat-id', type=int, required=True)
+    cmd.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    cmd.set_defaults(func=export_sites)
+    
+    cmd = commands.add_parser('export-history', help="Stream a website's history as CSV or NDJSON")
+    cmd.add_argument('--chat-id', type=int, required=True)
+    cmd.add_argument('--url', required=True)
+    cmd.add_argument('--format', choices=sorted(HISTORY_WRITERS), default='csv')
+    cmd.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    cmd.set_defaults(func=export_history)
+    
+    cmd = commands.add_parser('backfill', help="Rebuild a derived table from history, resumable")
+    cmd.add_argument('target', choices=sorted(TARGETS))
+    cmd.add_argument('--workers', type=int, default=4, help="Worker processes (1 = no pool)")
+    cmd.add_argument('--partition-size', type=int, default=500, help="Websites per worker task")
+    cmd.add_argument('--chunk-size', type=int, default=5000, help="History rows read per query")
+    cmd.add_argument('--batch-size', type=int, default=5000, help="Rows written per transaction")
+    cmd.add_argument('--restart', action='store_true', help="Ignore checkpoints of earlier runs")
+    cmd.set_defaults(func=backfill)
+    
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    
+    settings = config.load_settings()
+    logging.basicConfig(level=logging.WARNING, format=config.LOG_FORMAT)
+    
+    db = DatabaseRepository(args.db) if args.db else open_storage(settings)
+    try:
+        return args.func(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
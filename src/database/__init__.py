@@ -1,5 +1,10 @@
 # src/database/__init__.py
+from .storage import Storage, open_storage
 from .repository import DatabaseRepository
-from .models import User, Website, History
+from .memory import MemoryRepository
+from .models import User, Website, History, Incident, Certificate, WebsitePage
 
-__all__ = ['DatabaseRepository', 'User', 'Website', 'History']
+__all__ = [
+    'Storage', 'open_storage', 'DatabaseRepository', 'MemoryRepository',
+    'User', 'Website', 'History', 'Incident', 'Certificate', 'WebsitePage'
+]
@@ -0,0 +1,34 @@
+# src/database/arrays.py
+"""Columnar history for vectorized analytics
+
+History is returned as one NumPy structured array sorted by
+(website_id, checked_at). This module is imported lazily by the history
+backends so NumPy is only loaded when a report is built.
+"""
+import numpy as np
+
+HISTORY_DTYPE = np.dtype([
+    ('website_id', np.int64),
+    ('checked_at', np.int64),      # epoch milliseconds
+    ('status', np.int8),           # codec status code
+    ('response_time', np.float64), # seconds, NaN if unknown
+])
+
+# SQLite NULL latency is selected as this value and replaced by NaN
+MISSING_LATENCY = -1.0
+
+
+def from_rows(rows) -> np.ndarray:
+    """Build history array from (website_id, checked_at, status, latency) rows"""
+    history = np.fromiter(rows, dtype=HISTORY_DTYPE)
+    latency = history['response_time']
+    latency[latency == MISSING_LATENCY] = np.nan
+    return history
+
+
+def concatenate(parts) -> np.ndarray:
+    """Join per-site arrays, empty array if there are none"""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return np.empty(0, dtype=HISTORY_DTYPE)
+    return np.concatenate(parts)
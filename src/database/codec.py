@@ -0,0 +1,136 @@
+# src/database/codec.py
+"""Encoding of stored values and decoding of rows into models
+
+Timestamps are stored as integer epoch milliseconds and statuses as small
+integers. Queries select the explicit column lists below and rows are
+decoded positionally, which is the only place row layout is known.
+"""
+import time
+from datetime import datetime
+from typing import Optional
+
+from .models import Certificate, History, HistoryRun, Incident, User, Website
+
+STATUS_DOWN = 0
+STATUS_UP = 1
+# Websites only: up but anomalously slow, history rows stay up
+STATUS_DEGRADED = 2
+
+STATUS_CODES = {'down': STATUS_DOWN, 'up': STATUS_UP, 'degraded': STATUS_DEGRADED}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+# SQL expression for the current time in epoch milliseconds
+NOW_MS_SQL = "(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))"
+
+USER_COLUMNS = 'chat_id, created_at'
+WEBSITE_COLUMNS = 'id, chat_id, url, name, enabled, last_status, last_checked, created_at'
+HISTORY_COLUMNS = 'id, website_id, status, response_time, error_message, checked_at'
+RUN_COLUMNS = (
+    'id, website_id, status, error_message, started_at, ended_at, checks, '
+    'latency_min, latency_max, latency_sum, latency_checks'
+)
+INCIDENT_COLUMNS = 'id, website_id, started_at, ended_at, error_message, checks'
+CERTIFICATE_COLUMNS = 'host, port, not_after, issuer, error, checked_at, alerted_days'
+
+
+def encode_status(status: Optional[str]) -> Optional[int]:
+    """Convert status name to stored code"""
+    if status is None:
+        return None
+    return STATUS_CODES[status]
+
+
+def decode_status(code: Optional[int]) -> Optional[str]:
+    """Convert stored code to status name"""
+    if code is None:
+        return None
+    return STATUS_NAMES[code]
+
+
+def now_ms() -> int:
+    """Current time in epoch milliseconds"""
+    return time.time_ns() // 1_000_000
+
+
+def to_epoch_ms(value: datetime) -> int:
+    """Convert (naive local) datetime to epoch milliseconds"""
+    return int(round(value.timestamp() * 1000))
+
+
+def from_epoch_ms(value: Optional[int]) -> Optional[datetime]:
+    """Convert epoch milliseconds to naive local datetime"""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000)
+
+
+def decode_user(row) -> User:
+    """Decode row selected with USER_COLUMNS"""
+    return User(chat_id=row[0], created_at=from_epoch_ms(row[1]))
+
+
+def decode_website(row) -> Website:
+    """Decode row selected with WEBSITE_COLUMNS"""
+    return Website(
+        id=row[0],
+        chat_id=row[1],
+        url=row[2],
+        name=row[3],
+        enabled=bool(row[4]),
+        last_status=decode_status(row[5]),
+        last_checked=from_epoch_ms(row[6]),
+        created_at=from_epoch_ms(row[7])
+    )
+
+
+def decode_history(row) -> History:
+    """Decode row selected with HISTORY_COLUMNS"""
+    return History(
+        id=row[0],
+        website_id=row[1],
+        status=STATUS_NAMES[row[2]],
+        response_time=row[3],
+        error_message=row[4],
+        checked_at=from_epoch_ms(row[5])
+    )
+
+
+def decode_run(row) -> HistoryRun:
+    """Decode row selected with RUN_COLUMNS"""
+    return HistoryRun(
+        id=row[0],
+        website_id=row[1],
+        status=STATUS_NAMES[row[2]],
+        error_message=row[3],
+        started_at=from_epoch_ms(row[4]),
+        ended_at=from_epoch_ms(row[5]),
+        checks=row[6],
+        latency_min=row[7],
+        latency_max=row[8],
+        latency_avg=row[9] / row[10] if row[10] else None
+    )
+
+
+def decode_incident(row) -> Incident:
+    """Decode row selected with INCIDENT_COLUMNS"""
+    return Incident(
+        id=row[0],
+        website_id=row[1],
+        started_at=from_epoch_ms(row[2]),
+        ended_at=from_epoch_ms(row[3]),
+        error_message=row[4],
+        checks=row[5]
+    )
+
+
+def decode_certificate(row) -> Certificate:
+    """Decode row selected with CERTIFICATE_COLUMNS"""
+    return Certificate(
+        host=row[0],
+        port=row[1],
+        not_after=from_epoch_ms(row[2]),
+        issuer=row[3],
+        error=row[4],
+        checked_at=from_epoch_ms(row[5]),
+        alerted_days=row[6]
+    )
@@ -0,0 +1,80 @@
+# src/database/errors.py
+import re
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+# Status/error codes stored in compact history formats (fit in one byte)
+CODE_UP = 0
+CODE_DOWN = 1  # down for any other reason
+CODE_TIMEOUT = 2
+CODE_CONNECTION = 3
+CODE_DNS = 4
+CODE_TLS = 5
+CODE_HTTP_4XX = 6
+CODE_HTTP_5XX = 7
+CODE_HTTP_OTHER = 8
+
+ERROR_LABELS = {
+    CODE_DOWN: "Error",
+    CODE_TIMEOUT: "Timeout",
+    CODE_CONNECTION: "Connection error",
+    CODE_DNS: "DNS resolution failed",
+    CODE_TLS: "TLS error",
+    CODE_HTTP_4XX: "HTTP 4xx",
+    CODE_HTTP_5XX: "HTTP 5xx",
+    CODE_HTTP_OTHER: "HTTP error",
+}
+
+# Labels map back to their code, for backends that only keep the label
+LABEL_CODES = {label: code for code, label in ERROR_LABELS.items()}
+
+HTTP_PATTERN = re.compile(r'^HTTP (\d{3})')
+
+
+def classify_error(status: str, error_message: Optional[str]) -> int:
+    """Map a check result to a status/error code"""
+    if status == 'up':
+        return CODE_UP
+    if not error_message:
+        return CODE_DOWN
+    if error_message in LABEL_CODES:
+        return LABEL_CODES[error_message]
+    
+    match = HTTP_PATTERN.match(error_message)
+    if match:
+        code = int(match.group(1))
+        if 400 <= code < 500:
+            return CODE_HTTP_4XX
+        if 500 <= code < 600:
+            return CODE_HTTP_5XX
+        return CODE_HTTP_OTHER
+    
+    text = error_message.lower()
+    if 'timeout' in text or 'timed out' in text:
+        return CODE_TIMEOUT
+    if 'name or service not known' in text or 'nodename nor servname' in text \
+            or 'getaddrinfo' in text or 'name resolution' in text:
+        return CODE_DNS
+    if 'ssl' in text or 'certificate' in text or 'tls' in text:
+        return CODE_TLS
+    if 'connect' in text or 'refused' in text or 'reset' in text or 'unreachable' in text:
+        return CODE_CONNECTION
+    return CODE_DOWN
+
+
+def code_status(code: int) -> str:
+    """Get status for a code"""
+    return 'up' if code == CODE_UP else 'down'
+
+
+def code_label(code: int) -> Optional[str]:
+    """Get error text for a code, None when up"""
+    return ERROR_LABELS.get(code)
+
+
+def count_errors(history: Iterable) -> Dict[str, int]:
+    """Count failed checks by error class label, most frequent first"""
+    counts = Counter(
+        classify_error(h.status, h.error_message) for h in history if h.status == 'down'
+    )
+    return {code_label(code): total for code, total in counts.most_common()}
@@ -0,0 +1,420 @@
+# src/database/memory.py
+"""In-memory storage backend
+
+MemoryRepository keeps rows in plain Python containers laid out like the
+SQLite columns in codec.py, so the same decoders build the models:
+websites are indexed by id and by (chat_id, url), history is a bounded
+deque per website and incidents a list per website. Nothing touches the
+disk per check. With a snapshot file the whole state is written to it as
+JSON at most every snapshot_interval seconds, atomically, and loaded back
+on start, so a crash loses at most one interval of history.
+"""
+import bisect
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import config
+from .codec import (
+    STATUS_DOWN, decode_certificate, decode_history, decode_incident, decode_status, decode_user,
+    decode_website, encode_status, now_ms, to_epoch_ms
+)
+from .errors import count_errors
+from .models import Certificate, History, Incident, User, Website, WebsitePage
+from .storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+# Website row positions, same order as WEBSITE_COLUMNS
+_ID, _CHAT_ID, _URL, _NAME, _ENABLED, _LAST_STATUS, _LAST_CHECKED, _CREATED_AT = range(8)
+
+# History and incident row positions, same order as HISTORY_COLUMNS and INCIDENT_COLUMNS
+_ERROR_MESSAGE, _CHECKED_AT = 4, 5
+_STARTED_AT, _ENDED_AT, _CHECKS = 2, 3, 5
+
+
+class MemoryRepository(Storage):
+    """Storage backend keeping everything in memory, with optional snapshots"""
+    
+    def __init__(self, snapshot_path=None, history_per_site: int = 5040,
+                 snapshot_interval: float = 300):
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.history_per_site = history_per_site
+        self.snapshot_interval = snapshot_interval
+        
+        self._users: Dict[int, list] = {}
+        self._websites: Dict[int, list] = {}
+        self._by_url: Dict[Tuple[int, str], int] = {}
+        # website ids per chat in insertion (= id) order
+        self._by_chat: Dict[int, List[int]] = {}
+        self._history: Dict[int, Deque[tuple]] = {}
+        self._incidents: Dict[int, List[list]] = {}
+        self._certificates: Dict[Tuple[str, int], tuple] = {}
+        # One string object per distinct error message, shared by history rows
+        self._errors: Dict[str, str] = {}
+        self._next_ids = {'website': 1, 'history': 1, 'incident': 1}
+        
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        if self.snapshot_path is not None and self.snapshot_path.exists():
+            self._load()
+    
+    @classmethod
+    def from_settings(cls, settings: config.Settings) -> 'MemoryRepository':
+        """Create in-memory storage snapshotting to the data directory"""
+        settings.data_dir.mkdir(parents=True, exist_ok=True)
+        return cls(settings.snapshot_file, history_per_site=settings.memory_history_per_site,
+                   snapshot_interval=settings.snapshot_interval_seconds)
+    
+    # Snapshots
+    def snapshot(self):
+        """Write the whole state to the snapshot file"""
+        if self.snapshot_path is None:
+            return
+        
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'next_ids': self._next_ids,
+            'users': list(self._users.values()),
+            'websites': list(self._websites.values()),
+            'history': {website_id: list(rows) for website_id, rows in self._history.items()},
+            'incidents': self._incidents,
+            'certificates': list(self._certificates.values()),
+        }
+        started = time.perf_counter()
+        temporary = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        logger.debug(f"Snapshot written to {self.snapshot_path} in {time.perf_counter() - started:.3f}s")
+    
+    def close(self):
+        """Write a final snapshot if anything changed since the last one"""
+        if self._dirty:
+            self.snapshot()
+    
+    def _changed(self):
+        """Mark state changed and snapshot if the interval has passed"""
+        self._dirty = True
+        if self.snapshot_path is not None and time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            try:
+                self.snapshot()
+            except OSError as e:
+                logger.error(f"Cannot write snapshot {self.snapshot_path}: {e}")
+    
+    def _load(self):
+        with open(self.snapshot_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {self.snapshot_path}: {state.get('version')}")
+        
+        self._next_ids = state['next_ids']
+        self._users = {row[0]: row for row in state['users']}
+        for row in state['websites']:
+            self._index_website(row)
+        for website_id, rows in state['history'].items():
+            self._history[int(website_id)] = deque(
+                (tuple(row[:_ERROR_MESSAGE]) + (self._intern(row[_ERROR_MESSAGE]), row[_CHECKED_AT]) for row in rows),
+                maxlen=self.history_per_site
+            )
+        self._incidents = {int(website_id): rows for website_id, rows in state['incidents'].items()}
+        self._certificates = {(row[0], row[1]): tuple(row) for row in state['certificates']}
+        logger.info(f"Loaded {len(self._websites)} websites from snapshot {self.snapshot_path}")
+    
+    def _next_id(self, kind: str) -> int:
+        next_id = self._next_ids[kind]
+        self._next_ids[kind] = next_id + 1
+        return next_id
+    
+    # User operations
+    def add_user(self, chat_id: int) -> User:
+        """Add or get user"""
+        if chat_id not in self._users:
+            self._users[chat_id] = [chat_id, now_ms()]
+            self._changed()
+        return self.get_user(chat_id)
+    
+    def get_user(self, chat_id: int) -> Optional[User]:
+        """Get user by chat_id"""
+        row = self._users.get(chat_id)
+        return decode_user(row) if row else None
+    
+    # Website operations
+    def add_website(self, chat_id: int, url: str, name: str = None) -> Website:
+        """Add website for user"""
+        if (chat_id, url) in self._by_url:
+            raise ValueError(f"Chat {chat_id} already monitors {url}")
+        self.add_user(chat_id)
+        row = [self._next_id('website'), chat_id, url, name or url, 1, None, None, now_ms()]
+        self._index_website(row)
+        self._changed()
+        return decode_website(row)
+    
+    def add_websites(self, chat_id: int, urls: Iterable[str]) -> int:
+        """Add many websites, return number added"""
+        self.add_user(chat_id)
+        added = 0
+        for url in urls:
+            if (chat_id, url) not in self._by_url:
+                self._index_website([self._next_id('website'), chat_id, url, url, 1, None, None, now_ms()])
+                added += 1
+        if added:
+            self._changed()
+        return added
+    
+    def _index_website(self, row: list):
+        self._websites[row[_ID]] = row
+        self._by_url[(row[_CHAT_ID], row[_URL])] = row[_ID]
+        self._by_chat.setdefault(row[_CHAT_ID], []).append(row[_ID])
+    
+    def get_website(self, website_id: int) -> Optional[Website]:
+        """Get website by ID"""
+        row = self._websites.get(website_id)
+        return decode_website(row) if row else None
+    
+    def get_user_websites(self, chat_id: int) -> List[Website]:
+        """Get all websites for a user"""
+        rows = [self._websites[website_id] for website_id in self._by_chat.get(chat_id, ())]
+        rows.sort(key=lambda row: row[_CREATED_AT], reverse=True)
+        return [decode_website(row) for row in rows]
+    
+    def get_user_websites_page(self, chat_id: int, after_id: int = None,
+                               before_id: int = None, limit: int = 10) -> WebsitePage:
+        """Get one page of a user's websites, newest first (keyset on id)"""
+        ids = self._by_chat.get(chat_id, [])
+        
+        if before_id is not None:
+            start = bisect.bisect_right(ids, before_id)
+            newer = ids[start:start + limit + 1]
+            websites = [self.get_website(website_id) for website_id in reversed(newer[:limit])]
+            return WebsitePage(websites=websites, has_prev=len(newer) > limit, has_next=True)
+        
+        end = bisect.bisect_left(ids, after_id) if after_id is not None else len(ids)
+        older = ids[max(0, end - limit - 1):end]
+        websites = [self.get_website(website_id) for website_id in reversed(older[-limit:])]
+        return WebsitePage(
+            websites=websites,
+            has_prev=after_id is not None,
+            has_next=len(older) > limit
+        )
+    
+    def count_user_websites(self, chat_id: int) -> Dict[Optional[str], int]:
+        """Count a user's websites by last status"""
+        counts: Dict[Optional[str], int] = {}
+        for website_id in self._by_chat.get(chat_id, ()):
+            status = decode_status(self._websites[website_id][_LAST_STATUS])
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+    
+    def iter_user_websites(self, chat_id: int, batch_size: int = 500) -> Iterator[Website]:
+        """Stream all websites for a user"""
+        for website_id in list(self._by_chat.get(chat_id, ())):
+            row = self._websites.get(website_id)
+            if row is not None:
+                yield decode_website(row)
+    
+    def get_all_websites(self, url_prefix: Optional[str] = None) -> List[Website]:
+        """Get all enabled websites, optionally only those whose URL starts with url_prefix"""
+        prefix = url_prefix.lower() if url_prefix is not None else None
+        return [
+            decode_website(row) for row in self._websites.values()
+            if row[_ENABLED] and (prefix is None or row[_URL][:len(prefix)].lower() == prefix)
+        ]
+    
+    def get_website_by_url(self, chat_id: int, url: str) -> Optional[Website]:
+        """Get website by URL for user"""
+        website_id = self._by_url.get((chat_id, url))
+        return self.get_website(website_id) if website_id is not None else None
+    
+    def remove_website(self, chat_id: int, url: str) -> bool:
+        """Remove website with its history and incidents"""
+        website_id = self._by_url.pop((chat_id, url), None)
+        if website_id is None:
+            return False
+        del self._websites[website_id]
+        self._by_chat[chat_id].remove(website_id)
+        self._history.pop(website_id, None)
+        self._incidents.pop(website_id, None)
+        self._changed()
+        return True
+    
+    def update_website_status(self, website_id: int, status: str):
+        """Update website status"""
+        row = self._websites.get(website_id)
+        if row is not None:
+            row[_LAST_STATUS] = encode_status(status)
+            row[_LAST_CHECKED] = now_ms()
+            self._changed()
+    
+    # History operations
+    def add_history(self, website_id: int, status: str,
+                    response_time: float = None, error_message: str = None) -> History:
+        """Add check history"""
+        row = self._append_history(website_id, status, response_time, error_message, now_ms())
+        self._changed()
+        return decode_history(row)
+    
+    def _append_history(self, website_id: int, status: str, response_time: Optional[float],
+                        error_message: Optional[str], checked_at: int) -> tuple:
+        rows = self._history.get(website_id)
+        if rows is None:
+            rows = self._history[website_id] = deque(maxlen=self.history_per_site)
+        row = (self._next_id('history'), website_id, encode_status(status), response_time,
+               self._intern(error_message), checked_at)
+        rows.append(row)
+        return row
+    
+    def _intern(self, error_message: Optional[str]) -> Optional[str]:
+        """Get the shared string object of an error message"""
+        if error_message is None:
+            return None
+        return self._errors.setdefault(error_message, error_message)
+    
+    def record_checks(self, results: Iterable[History], incidents: Iterable[History] = (),
+                      states: Mapping[int, str] = None):
+        """Apply a batch of check results"""
+        results = list(results)
+        if not results:
+            return
+        
+        states = states or {}
+        for result in results:
+            checked_at = to_epoch_ms(result.checked_at)
+            self._append_history(result.website_id, result.status, result.response_time,
+                                 result.error_message, checked_at)
+            row = self._websites.get(result.website_id)
+            if row is not None:
+                row[_LAST_STATUS] = encode_status(states.get(result.website_id, result.status))
+                row[_LAST_CHECKED] = checked_at
+        for result in incidents:
+            self._apply_incident(result.website_id, result.status, result.error_message,
+                                 to_epoch_ms(result.checked_at))
+        self._changed()
+    
+    def get_website_history(self, website_id: int, limit: int = 100) -> List[History]:
+        """Get history for website, newest first"""
+        rows = self._history.get(website_id, ())
+        newest = [rows[-index] for index in range(1, min(limit, len(rows)) + 1)]
+        return [decode_history(row) for row in newest]
+    
+    def iter_website_history(self, website_id: int, since: datetime = None,
+                             until: datetime = None, chunk_size: int = 1000) -> Iterator[History]:
+        """Stream history oldest first"""
+        for row in self._history_rows(website_id, since, until):
+            yield decode_history(row)
+    
+    def _history_rows(self, website_id: int, since: Optional[datetime], until: Optional[datetime]) -> List[tuple]:
+        start = to_epoch_ms(since) if since is not None else None
+        end = to_epoch_ms(until) if until is not None else None
+        return [
+            row for row in list(self._history.get(website_id, ()))
+            if (start is None or row[_CHECKED_AT] >= start) and (end is None or row[_CHECKED_AT] < end)
+        ]
+    
+    def get_history_arrays(self, website_ids: Iterable[int], since: datetime = None,
+                           until: datetime = None):
+        """Get history of several websites as a NumPy structured array"""
+        from .arrays import from_rows
+        
+        return from_rows(
+            (website_id, row[_CHECKED_AT], row[2], float('nan') if row[3] is None else row[3])
+            for website_id in sorted(set(website_ids))
+            for row in sorted(self._history_rows(website_id, since, until), key=lambda row: row[_CHECKED_AT])
+        )
+    
+    def get_website_last_status(self, website_id: int) -> Optional[str]:
+        """Get last status of website"""
+        rows = self._history.get(website_id)
+        return decode_status(rows[-1][2]) if rows else None
+    
+    def get_error_counts(self, website_ids: Iterable[int], since: datetime = None) -> Dict[str, int]:
+        """Count failed checks by error class label, most frequent first"""
+        return count_errors(
+            decode_history(row) for website_id in set(website_ids)
+            for row in self._history_rows(website_id, since, None) if row[2] == STATUS_DOWN
+        )
+    
+    # Incident operations
+    def update_incident(self, website_id: int, status: str, error_message: str = None,
+                        checked_at: datetime = None):
+        """Open, extend or close the website's incident for a check result"""
+        checked_at = to_epoch_ms(checked_at) if checked_at else now_ms()
+        self._apply_incident(website_id, status, error_message, checked_at)
+        self._changed()
+    
+    def _apply_incident(self, website_id: int, status: str, error_message: Optional[str], checked_at: int):
+        incidents = self._incidents.setdefault(website_id, [])
+        ongoing = incidents[-1] if incidents and incidents[-1][_ENDED_AT] is None else None
+        
+        if encode_status(status) == STATUS_DOWN:
+            if ongoing is not None:
+                ongoing[_CHECKS] += 1
+            else:
+                incidents.append([self._next_id('incident'), website_id, checked_at, None, error_message, 1])
+        elif ongoing is not None:
+            ongoing[_ENDED_AT] = checked_at
+    
+    def get_open_incident(self, website_id: int) -> Optional[Incident]:
+        """Get ongoing incident of website"""
+        incidents = self._incidents.get(website_id)
+        if incidents and incidents[-1][_ENDED_AT] is None:
+            return decode_incident(incidents[-1])
+        return None
+    
+    def _incident_rows(self, website_ids: Iterable[int], since: Optional[datetime]) -> List[list]:
+        start = to_epoch_ms(since) if since is not None else None
+        return [
+            row for website_id in set(website_ids) for row in self._incidents.get(website_id, ())
+            if start is None or row[_ENDED_AT] is None or row[_ENDED_AT] >= start
+        ]
+    
+    def get_incidents(self, website_ids: Iterable[int], since: datetime = None,
+                      limit: int = 20) -> List[Incident]:
+        """Get incidents of websites, newest first"""
+        rows = sorted(self._incident_rows(website_ids, since), key=lambda row: row[_STARTED_AT], reverse=True)
+        return [decode_incident(row) for row in rows[:limit]]
+    
+    def get_incident_stats(self, website_ids: Iterable[int], since: datetime = None) -> Dict[str, object]:
+        """Count incidents and their total and mean repair time in seconds"""
+        rows = self._incident_rows(website_ids, since)
+        repairs = [(row[_ENDED_AT] - row[_STARTED_AT]) / 1000.0 for row in rows if row[_ENDED_AT] is not None]
+        return {
+            'incidents': len(rows),
+            'ongoing': len(rows) - len(repairs),
+            'downtime': sum(repairs, 0.0),
+            'mttr': sum(repairs) / len(repairs) if repairs else None,
+        }
+    
+    # Certificate operations
+    def get_certificates(self, hosts: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], Certificate]:
+        """Get cached certificates by (host, port)"""
+        return {
+            key: decode_certificate(self._certificates[key])
+            for key in set(hosts) if key in self._certificates
+        }
+    
+    def save_certificate(self, certificate: Certificate):
+        """Insert or replace the cached certificate of a host"""
+        self._certificates[(certificate.host, certificate.port)] = (
+            certificate.host,
+            certificate.port,
+            to_epoch_ms(certificate.not_after) if certificate.not_after else None,
+            certificate.issuer,
+            certificate.error,
+            to_epoch_ms(certificate.checked_at),
+            certificate.alerted_days,
+        )
+        self._changed()
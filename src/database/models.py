@@ -1,7 +1,7 @@
 # src/database/models.py
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import List, Optional
 
 
 @dataclass
@@ -44,3 +44,72 @@ class History:
     def __post_init__(self):
         if self.checked_at is None:
             self.checked_at = datetime.now()
+
+
+@dataclass
+class HistoryRun:
+    """Consecutive checks of a website with the same result"""
+    id: Optional[int]
+    website_id: int
+    status: str
+    started_at: datetime  # first check
+    ended_at: datetime  # last check
+    checks: int = 1
+    error_message: Optional[str] = None
+    latency_min: Optional[float] = None  # over checks with a response time
+    latency_avg: Optional[float] = None
+    latency_max: Optional[float] = None
+
+
+@dataclass
+class Incident:
+    id: Optional[int]
+    website_id: int
+    started_at: datetime  # first failed check
+    ended_at: Optional[datetime] = None  # first successful check, None while ongoing
+    error_message: Optional[str] = None  # error of the first failed check
+    checks: int = 1  # failed checks during the incident
+    
+    @property
+    def is_open(self) -> bool:
+        return self.ended_at is None
+    
+    def duration(self, now: datetime = None) -> timedelta:
+        """Get incident duration, ongoing incidents last until now"""
+        return (self.ended_at or now or datetime.now()) - self.started_at
+
+
+@dataclass
+class Certificate:
+    host: str
+    port: int = 443
+    not_after: Optional[datetime] = None  # None when the certificate could not be read
+    issuer: Optional[str] = None
+    error: Optional[str] = None  # handshake or verification error
+    checked_at: datetime = None
+    alerted_days: Optional[int] = None  # last expiry warning threshold sent
+    
+    def __post_init__(self):
+        if self.checked_at is None:
+            self.checked_at = datetime.now()
+    
+    def days_left(self, now: datetime = None) -> Optional[float]:
+        """Get days until expiry, negative once expired"""
+        if self.not_after is None:
+            return None
+        return (self.not_after - (now or datetime.now())).total_seconds() / 86400
+
+
+@dataclass
+class WebsitePage:
+    websites: List[Website]
+    has_prev: bool
+    has_next: bool
+    
+    @property
+    def first_id(self) -> Optional[int]:
+        return self.websites[0].id if self.websites else None
+    
+    @property
+    def last_id(self) -> Optional[int]:
+        return self.websites[-1].id if self.websites else None
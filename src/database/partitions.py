@@ -0,0 +1,264 @@
+# src/database/partitions.py
+"""Monthly history partitions
+
+History rows go to one SQLite file per calendar month,
+data/partitions/history-YYYY-MM.db, each with the usual history table.
+Queries attach the partitions their time range touches to an in-memory
+connection one at a time, newest or oldest first as the query needs, and
+detach them again, so a read of the latest checks only opens the current
+month. Expiring old history is unlinking whole files instead of a DELETE
+that holds the write lock and leaves the database file as large as before.
+"""
+import logging
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .codec import HISTORY_COLUMNS, decode_history, decode_status, encode_status, from_epoch_ms, now_ms, to_epoch_ms
+from .models import History
+from .schema import TEXT_HISTORY_TABLE
+
+logger = logging.getLogger(__name__)
+
+# A month as (year, month)
+Month = Tuple[int, int]
+
+PARTITION_PATTERN = re.compile(r'^history-(\d{4})-(\d{2})\.db$')
+
+PARTITION_INDEX = 'CREATE INDEX IF NOT EXISTS part.idx_history_website_checked ON history(website_id, checked_at)'
+
+
+def month_of(value: datetime) -> Month:
+    """Get the partition month of a time"""
+    return value.year, value.month
+
+
+def add_months(month: Month, count: int) -> Month:
+    """Get the month count months later (earlier if negative)"""
+    index = month[0] * 12 + month[1] - 1 + count
+    return index // 12, index % 12 + 1
+
+
+class PartitionedHistoryStore:
+    """History backend with one SQLite file per month
+    
+    retention_months > 0 keeps that many months before the current one;
+    older partitions are unlinked on start and whenever a new month begins.
+    History ids are only unique within a partition.
+    """
+    
+    def __init__(self, base_dir, retention_months: int = 0):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.retention_months = retention_months
+        # Partitions whose table and index are known to exist
+        self._created: Set[Month] = set()
+        self.expire()
+    
+    def partition_path(self, month: Month) -> Path:
+        return self.base_dir / f'history-{month[0]:04d}-{month[1]:02d}.db'
+    
+    def partitions(self) -> List[Month]:
+        """List existing partitions, oldest first"""
+        months = []
+        for path in self.base_dir.iterdir():
+            match = PARTITION_PATTERN.match(path.name)
+            if match:
+                months.append((int(match.group(1)), int(match.group(2))))
+        return sorted(months)
+    
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for a connection partitions are attached to"""
+        conn = sqlite3.connect(':memory:')
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Database error: {e}")
+            raise
+        finally:
+            conn.close()
+    
+    @contextmanager
+    def _attached(self, conn: sqlite3.Connection, month: Month, create: bool = False):
+        """Attach one partition as schema 'part' for the duration of the block
+        
+        Writes in the block are committed at its end, as a database can only
+        be detached outside a transaction.
+        """
+        conn.execute('ATTACH DATABASE ? AS part', (str(self.partition_path(month)),))
+        try:
+            if create and month not in self._created:
+                conn.execute(TEXT_HISTORY_TABLE.format(name='part.history'))
+                conn.execute(PARTITION_INDEX)
+                self._created.add(month)
+            yield
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute('DETACH DATABASE part')
+    
+    def _months_between(self, since: Optional[datetime], until: Optional[datetime]) -> List[Month]:
+        """Existing partitions that may hold rows in [since, until), oldest first"""
+        first = month_of(since) if since else None
+        last = month_of(until) if until else None
+        return [
+            month for month in self.partitions()
+            if (first is None or month >= first) and (last is None or month <= last)
+        ]
+    
+    # Write path
+    def add_history(self, website_id: int, status: str,
+                    response_time: float = None, error_message: str = None) -> History:
+        """Add check result to the current month's partition"""
+        result = History(id=None, website_id=website_id, status=status, response_time=response_time,
+                         error_message=error_message, checked_at=from_epoch_ms(now_ms()))
+        self.add_many([result])
+        return result
+    
+    def add_many(self, results: Iterable[History]):
+        """Add check results, one transaction per partition they fall in"""
+        by_month: Dict[Month, List[History]] = {}
+        for result in results:
+            by_month.setdefault(month_of(result.checked_at), []).append(result)
+        
+        new_month = False
+        with self._get_connection() as conn:
+            for month, batch in sorted(by_month.items()):
+                new_month |= not self.partition_path(month).exists()
+                with self._attached(conn, month, create=True):
+                    for result in batch:
+                        result.id = conn.execute(
+                            'INSERT INTO part.history (website_id, status, response_time, error_message, checked_at) '
+                            'VALUES (?, ?, ?, ?, ?)',
+                            (result.website_id, encode_status(result.status), result.response_time,
+                             result.error_message, to_epoch_ms(result.checked_at))
+                        ).lastrowid
+        
+        if new_month:
+            self.expire()
+    
+    def delete_website_history(self, website_id: int):
+        """Delete a website's rows from every partition"""
+        with self._get_connection() as conn:
+            for month in self.partitions():
+                with self._attached(conn, month):
+                    conn.execute('DELETE FROM part.history WHERE website_id = ?', (website_id,))
+    
+    def expire(self, now: datetime = None) -> List[Month]:
+        """Unlink partitions older than the retention period, return their months"""
+        if self.retention_months <= 0:
+            return []
+        
+        oldest = add_months(month_of(now or datetime.now()), -self.retention_months)
+        expired = [month for month in self.partitions() if month < oldest]
+        for month in expired:
+            path = self.partition_path(month)
+            for leftover in (path, path.with_name(path.name + '-journal'), path.with_name(path.name + '-wal')):
+                leftover.unlink(missing_ok=True)
+            self._created.discard(month)
+            logger.info(f"Dropped history partition {path.name}")
+        return expired
+    
+    # Read path
+    def get_website_history(self, website_id: int, limit: int = 100) -> List[History]:
+        """Get latest history for website, newest first, stopping at the first partition that fills limit"""
+        history = []
+        with self._get_connection() as conn:
+            for month in reversed(self.partitions()):
+                with self._attached(conn, month):
+                    rows = conn.execute(
+                        f'SELECT {HISTORY_COLUMNS} FROM part.history WHERE website_id = ? '
+                        f'ORDER BY checked_at DESC, id DESC LIMIT ?',
+                        (website_id, limit - len(history))
+                    ).fetchall()
+                history.extend(decode_history(row) for row in rows)
+                if len(history) >= limit:
+                    break
+        return history
+    
+    def iter_website_history(self, website_id: int, since: datetime = None,
+                             until: datetime = None, chunk_size: int = 1000) -> Iterator[History]:
+        """Stream history oldest first, keyset paginated within each partition"""
+        for month in self._months_between(since, until):
+            after = None
+            while True:
+                query = f'SELECT {HISTORY_COLUMNS} FROM part.history WHERE website_id = ?'
+                params = [website_id]
+                
+                if after is not None:
+                    query += ' AND (checked_at, id) > (?, ?)'
+                    params.extend(after)
+                elif since is not None:
+                    query += ' AND checked_at >= ?'
+                    params.append(to_epoch_ms(since))
+                
+                if until is not None:
+                    query += ' AND checked_at < ?'
+                    params.append(to_epoch_ms(until))
+                
+                query += ' ORDER BY checked_at, id LIMIT ?'
+                params.append(chunk_size)
+                
+                with self._get_connection() as conn, self._attached(conn, month):
+                    rows = conn.execute(query, params).fetchall()
+                
+                for row in rows:
+                    yield decode_history(row)
+                
+                if len(rows) < chunk_size:
+                    break
+                after = (rows[-1][5], rows[-1][0])  # (checked_at, id)
+    
+    def get_history_arrays(self, website_ids: List[int], since: datetime = None, until: datetime = None):
+        """Get history of several websites as a NumPy structured array"""
+        import numpy as np
+        from .arrays import MISSING_LATENCY, concatenate, from_rows
+        
+        placeholders = ', '.join('?' * len(website_ids))
+        query = (
+            f'SELECT website_id, checked_at, status, IFNULL(response_time, {MISSING_LATENCY}) '
+            f'FROM part.history WHERE website_id IN ({placeholders})'
+        )
+        params = list(website_ids)
+        
+        if since is not None:
+            query += ' AND checked_at >= ?'
+            params.append(to_epoch_ms(since))
+        if until is not None:
+            query += ' AND checked_at < ?'
+            params.append(to_epoch_ms(until))
+        
+        query += ' ORDER BY website_id, checked_at'
+        
+        parts = []
+        with self._get_connection() as conn:
+            for month in self._months_between(since, until):
+                with self._attached(conn, month):
+                    parts.append(from_rows(conn.execute(query, params)))
+        
+        history = concatenate(parts)
+        if len(parts) > 1:
+            # Each partition is sorted on its own; months are in order, so a stable sort by site suffices
+            history = history[np.argsort(history['website_id'], kind='stable')]
+        return history
+    
+    def get_website_last_status(self, website_id: int) -> Optional[str]:
+        """Get last status of website"""
+        with self._get_connection() as conn:
+            for month in reversed(self.partitions()):
+                with self._attached(conn, month):
+                    row = conn.execute(
+                        'SELECT status FROM part.history WHERE website_id = ? ORDER BY checked_at DESC, id DESC LIMIT 1',
+                        (website_id,)
+                    ).fetchone()
+                if row:
+                    return decode_status(row[0])
+        return None
@@ -2,25 +2,69 @@
 import sqlite3
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 from contextlib import contextmanager
 
 import config
-from .models import User, Website, History
+from .codec import (
+    CERTIFICATE_COLUMNS, HISTORY_COLUMNS, INCIDENT_COLUMNS, STATUS_DOWN, USER_COLUMNS, WEBSITE_COLUMNS,
+    decode_certificate, decode_history, decode_incident, decode_status, decode_user, decode_website,
+    encode_status, from_epoch_ms, now_ms, to_epoch_ms
+)
+from .errors import CODE_DOWN, classify_error, code_label, count_errors
+from .models import User, Website, History, Incident, Certificate, WebsitePage
+from .schema import create_schema, migrate
+from .storage import Storage
 
 logger = logging.getLogger(__name__)
 
+# Error messages whose dictionary id is cached, the cache starts over when full
+ERROR_CACHE_SIZE = 4096
 
-class DatabaseRepository:
-    def __init__(self, db_path: str = None):
-        self.db_path = db_path or str(config.DATABASE_PATH)
+
+class DatabaseRepository(Storage):
+    """Storage backend on SQLite, the default"""
+    
+    def __init__(self, db_path: str = None, history_store=None):
+        if db_path is None:
+            settings = config.get_settings()
+            settings.data_dir.mkdir(parents=True, exist_ok=True)
+            db_path = str(settings.database_path)
+        self.db_path = db_path
+        # Optional alternative history backend (SegmentHistoryStore, RunHistoryStore
+        # or PartitionedHistoryStore)
+        self.history_store = history_store
+        # Intern cache of error_messages ids by message
+        self._error_ids: Dict[str, int] = {}
         self._init_database()
     
+    @classmethod
+    def from_settings(cls, settings: config.Settings) -> 'DatabaseRepository':
+        """Create repository with the configured history backend"""
+        settings.data_dir.mkdir(parents=True, exist_ok=True)
+        
+        history_store = None
+        if settings.history_backend == 'segments':
+            from .segments import SegmentHistoryStore
+            history_store = SegmentHistoryStore(settings.history_dir)
+        elif settings.history_backend == 'runs':
+            from .runs import RunHistoryStore
+            history_store = RunHistoryStore(str(settings.database_path),
+                                            sample_interval=settings.run_sample_minutes * 60)
+        elif settings.history_backend == 'partitioned':
+            from .partitions import PartitionedHistoryStore
+            history_store = PartitionedHistoryStore(settings.partitions_dir,
+                                                    retention_months=settings.history_retention_months)
+        elif settings.history_backend != 'sqlite':
+            raise ValueError(f"Unknown HISTORY_BACKEND: {settings.history_backend}")
+        
+        return cls(str(settings.database_path), history_store=history_store)
+    
     @contextmanager
     def _get_connection(self):
         """Context manager for database connections"""
+        # Plain tuple rows, decoded positionally by the codec
         conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
         try:
             yield conn
             conn.commit()
@@ -32,51 +76,10 @@ class DatabaseRepository:
             conn.close()
     
     def _init_database(self):
-        """Initialize database tables"""
+        """Initialize database tables, migrating old databases in place"""
         with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    chat_id INTEGER PRIMARY KEY,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Websites table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS websites (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chat_id INTEGER NOT NULL,
-                    url TEXT NOT NULL,
-                    name TEXT,
-                    enabled INTEGER DEFAULT 1,
-                    last_status TEXT,
-                    last_checked TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (chat_id) REFERENCES users(chat_id),
-                    UNIQUE(chat_id, url)
-                )
-            ''')
-            
-            # History table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    website_id INTEGER NOT NULL,
-                    status TEXT NOT NULL,
-                    response_time REAL,
-                    error_message TEXT,
-                    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (website_id) REFERENCES websites(id)
-                )
-            ''')
-            
-            # Create indexes
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_websites_chat_id ON websites(chat_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_website_id ON history(website_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_history_checked_at ON history(checked_at)')
+            migrate(conn)
+            create_schema(conn)
             
             logger.info("Database initialized successfully")
     
@@ -95,10 +98,10 @@ class DatabaseRepository:
         """Get user by chat_id"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM users WHERE chat_id = ?', (chat_id,))
+            cursor.execute(f'SELECT {USER_COLUMNS} FROM users WHERE chat_id = ?', (chat_id,))
             row = cursor.fetchone()
             if row:
-                return User(chat_id=row['chat_id'], created_at=row['created_at'])
+                return decode_user(row)
         return None
     
     # Website operations
@@ -116,14 +119,31 @@ class DatabaseRepository:
         
         return self.get_website(website_id)
     
+    def add_websites(self, chat_id: int, urls: Iterable[str]) -> int:
+        """Add many websites in one transaction, return number added"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'INSERT OR IGNORE INTO users (chat_id) VALUES (?)',
+                (chat_id,)
+            )
+            
+            # Already monitored URLs are skipped by the UNIQUE(chat_id, url) constraint
+            before = conn.total_changes
+            cursor.executemany(
+                'INSERT OR IGNORE INTO websites (chat_id, url, name) VALUES (?, ?, ?)',
+                ((chat_id, url, url) for url in urls)
+            )
+            return conn.total_changes - before
+    
     def get_website(self, website_id: int) -> Optional[Website]:
         """Get website by ID"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM websites WHERE id = ?', (website_id,))
+            cursor.execute(f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE id = ?', (website_id,))
             row = cursor.fetchone()
             if row:
-                return self._row_to_website(row)
+                return decode_website(row)
         return None
     
     def get_user_websites(self, chat_id: int) -> List[Website]:
@@ -131,40 +151,120 @@ class DatabaseRepository:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT * FROM websites WHERE chat_id = ? ORDER BY created_at DESC',
+                f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE chat_id = ? ORDER BY created_at DESC',
                 (chat_id,)
             )
-            return [self._row_to_website(row) for row in cursor.fetchall()]
+            return [decode_website(row) for row in cursor.fetchall()]
     
-    def get_all_websites(self) -> List[Website]:
-        """Get all enabled websites"""
+    def get_user_websites_page(self, chat_id: int, after_id: int = None,
+                               before_id: int = None, limit: int = 10) -> WebsitePage:
+        """Get one page of a user's websites, newest first
+        
+        Keyset pagination on id: pass the last id of the current page as
+        after_id for the next page, or its first id as before_id for the
+        previous one.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM websites WHERE enabled = 1')
-            return [self._row_to_website(row) for row in cursor.fetchall()]
+            
+            if before_id is not None:
+                cursor.execute(
+                    f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE chat_id = ? AND id > ? ORDER BY id ASC LIMIT ?',
+                    (chat_id, before_id, limit + 1)
+                )
+                rows = cursor.fetchall()
+                has_prev = len(rows) > limit
+                websites = [decode_website(row) for row in reversed(rows[:limit])]
+                return WebsitePage(websites=websites, has_prev=has_prev, has_next=True)
+            
+            if after_id is not None:
+                cursor.execute(
+                    f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE chat_id = ? AND id < ? ORDER BY id DESC LIMIT ?',
+                    (chat_id, after_id, limit + 1)
+                )
+            else:
+                cursor.execute(
+                    f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE chat_id = ? ORDER BY id DESC LIMIT ?',
+                    (chat_id, limit + 1)
+                )
+            rows = cursor.fetchall()
+            websites = [decode_website(row) for row in rows[:limit]]
+            return WebsitePage(
+                websites=websites,
+                has_prev=after_id is not None,
+                has_next=len(rows) > limit
+            )
+    
+    def count_user_websites(self, chat_id: int) -> Dict[Optional[str], int]:
+        """Count a user's websites by last status"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT last_status, COUNT(*) AS total FROM websites WHERE chat_id = ? GROUP BY last_status',
+                (chat_id,)
+            )
+            return {decode_status(status): total for status, total in cursor.fetchall()}
+    
+    def iter_user_websites(self, chat_id: int, batch_size: int = 500) -> Iterator[Website]:
+        """Stream all websites for a user without loading them at once"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE chat_id = ? ORDER BY id',
+                (chat_id,)
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield decode_website(row)
+    
+    def get_all_websites(self, url_prefix: Optional[str] = None) -> List[Website]:
+        """Get all enabled websites, optionally only those whose URL starts with url_prefix"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            if url_prefix is None:
+                cursor.execute(f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE enabled = 1')
+            else:
+                cursor.execute(
+                    f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE enabled = 1 AND url LIKE ?',
+                    (url_prefix + '%',)
+                )
+            return [decode_website(row) for row in cursor.fetchall()]
     
     def get_website_by_url(self, chat_id: int, url: str) -> Optional[Website]:
         """Get website by URL for user"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT * FROM websites WHERE chat_id = ? AND url = ?',
+                f'SELECT {WEBSITE_COLUMNS} FROM websites WHERE chat_id = ? AND url = ?',
                 (chat_id, url)
             )
             row = cursor.fetchone()
             if row:
-                return self._row_to_website(row)
+                return decode_website(row)
         return None
     
     def remove_website(self, chat_id: int, url: str) -> bool:
         """Remove website"""
+        website = self.get_website_by_url(chat_id, url) if self.history_store else None
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute(
+                'DELETE FROM incidents WHERE website_id IN (SELECT id FROM websites WHERE chat_id = ? AND url = ?)',
+                (chat_id, url)
+            )
             cursor.execute(
                 'DELETE FROM websites WHERE chat_id = ? AND url = ?',
                 (chat_id, url)
             )
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+        
+        if removed and website:
+            self.history_store.delete_website_history(website.id)
+        return removed
     
     def update_website_status(self, website_id: int, status: str):
         """Update website status"""
@@ -172,36 +272,28 @@ class DatabaseRepository:
             cursor = conn.cursor()
             cursor.execute(
                 'UPDATE websites SET last_status = ?, last_checked = ? WHERE id = ?',
-                (status, datetime.now(), website_id)
-            )
-    
-    def _row_to_website(self, row) -> Website:
-        """Convert row to Website object"""
-        return Website(
-            id=row['id'],
-            chat_id=row['chat_id'],
-            url=row['url'],
-            name=row['name'],
-            enabled=bool(row['enabled']),
-            last_status=row['last_status'],
-            last_checked=row['last_checked'],
-            created_at=row['created_at']
-        )
+                (encode_status(status), now_ms(), website_id)
+            )
     
     # History operations
     def add_history(self, website_id: int, status: str, 
                     response_time: float = None, error_message: str = None) -> History:
         """Add check history"""
-        checked_at = datetime.now()
+        if self.history_store is not None:
+            return self.history_store.add_history(website_id, status, response_time, error_message)
+        
+        checked_at = now_ms()
         
         with self._get_connection() as conn:
             cursor = conn.cursor()
+            error_ids = self._intern_errors(cursor, [error_message])
             cursor.execute(
-                '''INSERT INTO history (website_id, status, response_time, error_message, checked_at) 
+                '''INSERT INTO history (website_id, status, response_time, error_id, checked_at) 
                    VALUES (?, ?, ?, ?, ?)''',
-                (website_id, status, response_time, error_message, checked_at)
+                (website_id, encode_status(status), response_time, error_ids.get(error_message), checked_at)
             )
             history_id = cursor.lastrowid
+        self._cache_errors(error_ids)
         
         return History(
             id=history_id,
@@ -209,38 +301,340 @@ class DatabaseRepository:
             status=status,
             response_time=response_time,
             error_message=error_message,
-            checked_at=checked_at
+            checked_at=from_epoch_ms(checked_at)
         )
     
+    def record_checks(self, results: Iterable[History], incidents: Iterable[History] = (),
+                      states: Mapping[int, str] = None):
+        """Write a batch of check results in one transaction
+        
+        Each result adds a history row and becomes its website's last status,
+        unless states gives another one for the website (e.g. 'degraded').
+        Results in incidents also open, extend or close the website's incident
+        (see update_incident). Costs one commit per batch instead of two or
+        three per website.
+        """
+        states = states or {}
+        results = list(results)
+        if not results:
+            return
+        
+        if self.history_store is not None:
+            self.history_store.add_many(results)
+        
+        rows = [
+            (result.website_id, encode_status(result.status), result.response_time,
+             result.error_message, to_epoch_ms(result.checked_at))
+            for result in results
+        ]
+        
+        error_ids = {}
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            if self.history_store is None:
+                error_ids = self._intern_errors(cursor, (result.error_message for result in results))
+                cursor.executemany(
+                    'INSERT INTO history (website_id, status, response_time, error_id, checked_at) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [
+                        (website_id, status, response_time, error_ids.get(error_message), checked_at)
+                        for website_id, status, response_time, error_message, checked_at in rows
+                    ]
+                )
+            cursor.executemany(
+                'UPDATE websites SET last_status = ?, last_checked = ? WHERE id = ?',
+                [
+                    (encode_status(states[website_id]) if website_id in states else status, checked_at, website_id)
+                    for website_id, status, _, _, checked_at in rows
+                ]
+            )
+            for result in incidents:
+                self._apply_incident(
+                    cursor, result.website_id, result.status, result.error_message,
+                    to_epoch_ms(result.checked_at)
+                )
+        self._cache_errors(error_ids)
+    
+    def _intern_errors(self, cursor: sqlite3.Cursor, messages: Iterable[Optional[str]]) -> Dict[str, int]:
+        """Get error_messages ids of messages, adding new ones in the caller's transaction"""
+        error_ids = {}
+        for message in messages:
+            if message is None or message in error_ids:
+                continue
+            error_id = self._error_ids.get(message)
+            if error_id is None:
+                cursor.execute(
+                    'INSERT OR IGNORE INTO error_messages (message, code) VALUES (?, ?)',
+                    (message, classify_error('down', message))
+                )
+                error_id = cursor.execute(
+                    'SELECT id FROM error_messages WHERE message = ?', (message,)
+                ).fetchone()[0]
+            error_ids[message] = error_id
+        return error_ids
+    
+    def _cache_errors(self, error_ids: Dict[str, int]):
+        """Remember ids of committed error messages"""
+        if len(self._error_ids) + len(error_ids) > ERROR_CACHE_SIZE:
+            self._error_ids.clear()
+        self._error_ids.update(error_ids)
+    
     def get_website_history(self, website_id: int, limit: int = 100) -> List[History]:
         """Get history for website"""
+        if self.history_store is not None:
+            return self.history_store.get_website_history(website_id, limit)
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                '''SELECT * FROM history WHERE website_id = ? 
-                   ORDER BY checked_at DESC LIMIT ?''',
+                f'''SELECT {HISTORY_COLUMNS} FROM history_messages WHERE website_id = ? 
+                   ORDER BY checked_at DESC, id DESC LIMIT ?''',
                 (website_id, limit)
             )
-            return [self._row_to_history(row) for row in cursor.fetchall()]
+            return [decode_history(row) for row in cursor.fetchall()]
+    
+    def iter_website_history(self, website_id: int, since: datetime = None,
+                             until: datetime = None, chunk_size: int = 1000) -> Iterator[History]:
+        """Stream history oldest first in chunks
+        
+        Uses keyset pagination on (checked_at, id), so each chunk is an index
+        range scan and no read transaction stays open between chunks.
+        """
+        if self.history_store is not None:
+            yield from self.history_store.iter_website_history(website_id, since, until, chunk_size)
+            return
+        
+        after = None
+        
+        while True:
+            query = f'SELECT {HISTORY_COLUMNS} FROM history_messages WHERE website_id = ?'
+            params = [website_id]
+            
+            if after is not None:
+                query += ' AND (checked_at, id) > (?, ?)'
+                params.extend(after)
+            elif since is not None:
+                query += ' AND checked_at >= ?'
+                params.append(to_epoch_ms(since))
+            
+            if until is not None:
+                query += ' AND checked_at < ?'
+                params.append(to_epoch_ms(until))
+            
+            query += ' ORDER BY checked_at, id LIMIT ?'
+            params.append(chunk_size)
+            
+            with self._get_connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+            
+            for row in rows:
+                yield decode_history(row)
+            
+            if len(rows) < chunk_size:
+                break
+            after = (rows[-1][5], rows[-1][0])  # (checked_at, id)
+    
+    def get_history_arrays(self, website_ids: Iterable[int], since: datetime = None,
+                           until: datetime = None):
+        """Get history of several websites as a NumPy structured array
+        
+        Rows are sorted by (website_id, checked_at), see src.database.arrays.
+        """
+        from .arrays import MISSING_LATENCY, from_rows
+        
+        website_ids = list(website_ids)
+        if self.history_store is not None:
+            return self.history_store.get_history_arrays(website_ids, since, until)
+        
+        placeholders = ', '.join('?' * len(website_ids))
+        query = (
+            f'SELECT website_id, checked_at, status, IFNULL(response_time, {MISSING_LATENCY}) '
+            f'FROM history WHERE website_id IN ({placeholders})'
+        )
+        params = list(website_ids)
+        
+        if since is not None:
+            query += ' AND checked_at >= ?'
+            params.append(to_epoch_ms(since))
+        if until is not None:
+            query += ' AND checked_at < ?'
+            params.append(to_epoch_ms(until))
+        
+        # Index order, ties within a millisecond do not matter for statistics
+        query += ' ORDER BY website_id, checked_at'
+        
+        with self._get_connection() as conn:
+            return from_rows(conn.execute(query, params))
     
     def get_website_last_status(self, website_id: int) -> Optional[str]:
         """Get last status of website"""
+        if self.history_store is not None:
+            return self.history_store.get_website_last_status(website_id)
+        
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT status FROM history WHERE website_id = ? ORDER BY checked_at DESC LIMIT 1',
+                'SELECT status FROM history WHERE website_id = ? ORDER BY checked_at DESC, id DESC LIMIT 1',
                 (website_id,)
             )
             row = cursor.fetchone()
-            return row['status'] if row else None
+            return decode_status(row[0]) if row else None
+
+    def get_error_counts(self, website_ids: Iterable[int], since: datetime = None) -> Dict[str, int]:
+        """Count failed checks by error class, most frequent first
+        
+        Groups the integer error ids of history and looks up their class in
+        the small error_messages table, instead of matching every stored text.
+        """
+        website_ids = list(website_ids)
+        if self.history_store is not None:
+            return count_errors(
+                h for website_id in website_ids for h in self.iter_website_history(website_id, since=since)
+            )
+        
+        placeholders = ', '.join('?' * len(website_ids))
+        failures = (
+            f'SELECT error_id, COUNT(*) AS total FROM history '
+            f'WHERE website_id IN ({placeholders}) AND status = {STATUS_DOWN}'
+        )
+        params = list(website_ids)
+        if since is not None:
+            failures += ' AND checked_at >= ?'
+            params.append(to_epoch_ms(since))
+        
+        # Failures without a message are plain 'down'
+        query = (
+            f'SELECT IFNULL(code, {CODE_DOWN}), SUM(total) FROM ({failures} GROUP BY error_id) '
+            f'LEFT JOIN error_messages ON error_messages.id = error_id '
+            f'GROUP BY 1 ORDER BY 2 DESC'
+        )
+        
+        with self._get_connection() as conn:
+            return {code_label(code): total for code, total in conn.execute(query, params)}
+
+    # Incident operations
+    def update_incident(self, website_id: int, status: str, error_message: str = None,
+                        checked_at: datetime = None):
+        """Open, extend or close the website's incident for a check result
+        
+        A failed check opens an incident or counts towards the open one, a
+        successful check closes it. Only needs to be called for failed
+        checks and the first successful one after them.
+        """
+        checked_at = to_epoch_ms(checked_at) if checked_at else now_ms()
+        
+        with self._get_connection() as conn:
+            self._apply_incident(conn.cursor(), website_id, status, error_message, checked_at)
     
-    def _row_to_history(self, row) -> History:
-        """Convert row to History object"""
-        return History(
-            id=row['id'],
-            website_id=row['website_id'],
-            status=row['status'],
-            response_time=row['response_time'],
-            error_message=row['error_message'],
-            checked_at=row['checked_at']
+    def _apply_incident(self, cursor: sqlite3.Cursor, website_id: int, status: str,
+                        error_message: Optional[str], checked_at: int):
+        """Open, extend or close an incident within the caller's transaction"""
+        if encode_status(status) == STATUS_DOWN:
+            cursor.execute(
+                'UPDATE incidents SET checks = checks + 1 WHERE website_id = ? AND ended_at IS NULL',
+                (website_id,)
+            )
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    'INSERT INTO incidents (website_id, started_at, error_message) VALUES (?, ?, ?)',
+                    (website_id, checked_at, error_message)
+                )
+        else:
+            cursor.execute(
+                'UPDATE incidents SET ended_at = ? WHERE website_id = ? AND ended_at IS NULL',
+                (checked_at, website_id)
+            )
+    
+    def get_open_incident(self, website_id: int) -> Optional[Incident]:
+        """Get ongoing incident of website"""
+        with self._get_connection() as conn:
+            row = conn.execute(
+                f'SELECT {INCIDENT_COLUMNS} FROM incidents WHERE website_id = ? AND ended_at IS NULL',
+                (website_id,)
+            ).fetchone()
+            return decode_incident(row) if row else None
+    
+    def get_incidents(self, website_ids: Iterable[int], since: datetime = None,
+                      limit: int = 20) -> List[Incident]:
+        """Get incidents of websites, newest first
+        
+        With since, incidents that were still ongoing at that time are
+        included.
+        """
+        website_ids = list(website_ids)
+        placeholders = ', '.join('?' * len(website_ids))
+        query = f'SELECT {INCIDENT_COLUMNS} FROM incidents WHERE website_id IN ({placeholders})'
+        params = list(website_ids)
+        
+        if since is not None:
+            query += ' AND (ended_at IS NULL OR ended_at >= ?)'
+            params.append(to_epoch_ms(since))
+        
+        query += ' ORDER BY started_at DESC LIMIT ?'
+        params.append(limit)
+        
+        with self._get_connection() as conn:
+            return [decode_incident(row) for row in conn.execute(query, params)]
+    
+    def get_incident_stats(self, website_ids: Iterable[int], since: datetime = None) -> Dict[str, object]:
+        """Count incidents and their total and mean repair time in seconds"""
+        website_ids = list(website_ids)
+        placeholders = ', '.join('?' * len(website_ids))
+        query = (
+            f'SELECT COUNT(*), SUM(ended_at IS NULL), '
+            f'SUM(ended_at - started_at) / 1000.0, AVG(ended_at - started_at) / 1000.0 '
+            f'FROM incidents WHERE website_id IN ({placeholders})'
         )
+        params = list(website_ids)
+        
+        if since is not None:
+            query += ' AND (ended_at IS NULL OR ended_at >= ?)'
+            params.append(to_epoch_ms(since))
+        
+        with self._get_connection() as conn:
+            total, ongoing, downtime, mttr = conn.execute(query, params).fetchone()
+        
+        return {
+            'incidents': total,
+            'ongoing': ongoing or 0,
+            'downtime': downtime or 0.0,
+            'mttr': mttr,
+        }
+
+    # Certificate operations
+    def get_certificates(self, hosts: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], Certificate]:
+        """Get cached certificates by (host, port)"""
+        hosts = set(hosts)
+        if not hosts:
+            return {}
+
+        names = sorted({host for host, _ in hosts})
+        placeholders = ', '.join('?' * len(names))
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f'SELECT {CERTIFICATE_COLUMNS} FROM certificates WHERE host IN ({placeholders})',
+                names
+            ).fetchall()
+        
+        certificates = (decode_certificate(row) for row in rows)
+        return {
+            (certificate.host, certificate.port): certificate
+            for certificate in certificates
+            if (certificate.host, certificate.port) in hosts
+        }
+    
+    def save_certificate(self, certificate: Certificate):
+        """Insert or replace the cached certificate of a host"""
+        with self._get_connection() as conn:
+            conn.execute(
+                f'INSERT OR REPLACE INTO certificates ({CERTIFICATE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    certificate.host,
+                    certificate.port,
+                    to_epoch_ms(certificate.not_after) if certificate.not_after else None,
+                    certificate.issuer,
+                    certificate.error,
+                    to_epoch_ms(certificate.checked_at),
+                    certificate.alerted_days,
+                )
+            )
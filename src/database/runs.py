@@ -0,0 +1,323 @@
+# src/database/runs.py
+"""Run-length encoded history
+
+Almost every check repeats the previous result, so instead of one row per
+check the history_runs table keeps one row per run of consecutive checks
+with the same status and error: first and last check time, number of
+checks and min/sum/max of their response times. A check extends the open
+run in place and a row is only inserted on a transition or once the open
+run is older than the sampling interval, which bounds how much detail a
+long run loses.
+
+Reads expand runs back into History rows with the checks spread evenly
+between the first and last check and the run's mean response time, so
+uptime and check counts are exact while individual timestamps and
+latencies are approximate.
+"""
+import logging
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .codec import (
+    RUN_COLUMNS, decode_run, decode_status, encode_status, from_epoch_ms, now_ms, to_epoch_ms
+)
+from .models import History, HistoryRun
+
+logger = logging.getLogger(__name__)
+
+# A new run is started at least this often, even without a transition
+SAMPLE_INTERVAL_SECONDS = 3600
+
+RUNS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS history_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        website_id INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        error_message TEXT,
+        started_at INTEGER NOT NULL,
+        ended_at INTEGER NOT NULL,
+        checks INTEGER NOT NULL DEFAULT 1,
+        latency_min REAL,
+        latency_max REAL,
+        latency_sum REAL NOT NULL DEFAULT 0,
+        latency_checks INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+RUNS_INDEX = 'CREATE INDEX IF NOT EXISTS idx_history_runs_website_started ON history_runs(website_id, started_at)'
+
+# MIN()/MAX() with a NULL argument are NULL, so fall back to whichever is set
+_EXTEND_RUN = '''
+    UPDATE history_runs SET
+        ended_at = :checked_at,
+        checks = checks + 1,
+        latency_min = COALESCE(MIN(latency_min, :latency), latency_min, :latency),
+        latency_max = COALESCE(MAX(latency_max, :latency), latency_max, :latency),
+        latency_sum = latency_sum + IFNULL(:latency, 0),
+        latency_checks = latency_checks + (:latency IS NOT NULL)
+    WHERE id = :id
+'''
+
+INSERT_RUNS = (
+    'INSERT INTO history_runs (website_id, status, error_message, started_at, ended_at, checks, '
+    'latency_min, latency_max, latency_sum, latency_checks) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+_INSERT_RUN = '''
+    INSERT INTO history_runs (website_id, status, error_message, started_at, ended_at,
+                              latency_min, latency_max, latency_sum, latency_checks)
+    VALUES (:website_id, :status, :error_message, :checked_at, :checked_at,
+            :latency, :latency, IFNULL(:latency, 0), :latency IS NOT NULL)
+'''
+
+
+def build_runs(history: Iterable[History], sample_interval: float = SAMPLE_INTERVAL_SECONDS) -> Iterator[tuple]:
+    """Encode history sorted by (website_id, checked_at) as history_runs rows
+    
+    Same rule as the write path: a run ends on a transition or once it is
+    sample_interval old. Rows are (website_id, status, error_message,
+    started_at, ended_at, checks, latency_min, latency_max, latency_sum,
+    latency_checks), in the order of INSERT_RUNS.
+    """
+    sample_interval_ms = int(sample_interval * 1000)
+    run = None
+    for result in history:
+        checked_at = to_epoch_ms(result.checked_at)
+        key = (result.website_id, encode_status(result.status), result.error_message)
+        if run is None or tuple(run[:3]) != key or checked_at - run[3] >= sample_interval_ms:
+            if run is not None:
+                yield tuple(run)
+            run = [*key, checked_at, checked_at, 0, None, None, 0.0, 0]
+        run[4] = checked_at
+        run[5] += 1
+        latency = result.response_time
+        if latency is not None:
+            run[6] = latency if run[6] is None else min(run[6], latency)
+            run[7] = latency if run[7] is None else max(run[7], latency)
+            run[8] += latency
+            run[9] += 1
+    if run is not None:
+        yield tuple(run)
+
+
+def expand_run(run: HistoryRun) -> List[History]:
+    """Reconstruct the checks of a run, oldest first"""
+    step = (run.ended_at - run.started_at) / (run.checks - 1) if run.checks > 1 else None
+    return [
+        History(
+            id=run.id,
+            website_id=run.website_id,
+            status=run.status,
+            response_time=run.latency_avg,
+            error_message=run.error_message,
+            checked_at=run.started_at + step * index if step is not None else run.started_at
+        )
+        for index in range(run.checks)
+    ]
+
+
+class RunHistoryStore:
+    """History backend keeping runs of equal results in the main database
+    
+    The open run of each website is cached after its first lookup. Only one
+    process should write, which is also true of the monitor itself.
+    """
+    
+    def __init__(self, db_path: str, sample_interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.sample_interval_ms = int(sample_interval * 1000)
+        # website_id -> (run id, status code, error message, started_at) of the open run
+        self._tails: Dict[int, Tuple[int, int, Optional[str], int]] = {}
+        
+        with self._get_connection() as conn:
+            conn.execute(RUNS_TABLE)
+            conn.execute(RUNS_INDEX)
+    
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for database connections"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Database error: {e}")
+            raise
+        finally:
+            conn.close()
+    
+    # Write path
+    def add_history(self, website_id: int, status: str,
+                    response_time: float = None, error_message: str = None) -> History:
+        """Record check result"""
+        result = History(id=None, website_id=website_id, status=status, response_time=response_time,
+                         error_message=error_message, checked_at=from_epoch_ms(now_ms()))
+        self.add_many([result])
+        return result
+    
+    def add_many(self, results: Iterable[History]):
+        """Record check results in one transaction, extending open runs where possible"""
+        # Tails are only cached once the transaction has committed
+        tails = {}
+        
+        with self._get_connection() as conn:
+            for result in results:
+                website_id = result.website_id
+                code = encode_status(result.status)
+                checked_at = to_epoch_ms(result.checked_at)
+                params = {
+                    'website_id': website_id,
+                    'status': code,
+                    'error_message': result.error_message,
+                    'checked_at': checked_at,
+                    'latency': result.response_time,
+                }
+                
+                tail = tails.get(website_id) or self._tail(conn, website_id)
+                if tail is not None and tail[1:3] == (code, result.error_message) \
+                        and checked_at - tail[3] < self.sample_interval_ms:
+                    conn.execute(_EXTEND_RUN, {**params, 'id': tail[0]})
+                    result.id = tail[0]
+                else:
+                    run_id = conn.execute(_INSERT_RUN, params).lastrowid
+                    tails[website_id] = (run_id, code, result.error_message, checked_at)
+                    result.id = run_id
+        
+        self._tails.update(tails)
+    
+    def delete_website_history(self, website_id: int):
+        """Drop all runs of a website"""
+        self._tails.pop(website_id, None)
+        with self._get_connection() as conn:
+            conn.execute('DELETE FROM history_runs WHERE website_id = ?', (website_id,))
+    
+    # Read path
+    def get_runs(self, website_id: int, limit: int = 100) -> List[HistoryRun]:
+        """Get latest runs of a website, newest first"""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f'SELECT {RUN_COLUMNS} FROM history_runs WHERE website_id = ? '
+                f'ORDER BY started_at DESC, id DESC LIMIT ?',
+                (website_id, limit)
+            ).fetchall()
+        return [decode_run(row) for row in rows]
+    
+    def get_website_history(self, website_id: int, limit: int = 100) -> List[History]:
+        """Get latest history for website, newest first"""
+        history = []
+        with self._get_connection() as conn:
+            cursor = conn.execute(
+                f'SELECT {RUN_COLUMNS} FROM history_runs WHERE website_id = ? ORDER BY started_at DESC, id DESC',
+                (website_id,)
+            )
+            for row in cursor:
+                history.extend(reversed(expand_run(decode_run(row))))
+                if len(history) >= limit:
+                    break
+        return history[:limit]
+    
+    def iter_website_history(self, website_id: int, since: datetime = None,
+                             until: datetime = None, chunk_size: int = 1000) -> Iterator[History]:
+        """Stream history oldest first, reading chunk_size runs at a time"""
+        start = to_epoch_ms(since) if since else None
+        end = to_epoch_ms(until) if until else None
+        after = None
+        
+        while True:
+            query = f'SELECT {RUN_COLUMNS} FROM history_runs WHERE website_id = ?'
+            params = [website_id]
+            
+            if after is not None:
+                query += ' AND (started_at, id) > (?, ?)'
+                params.extend(after)
+            if start is not None:
+                query += ' AND ended_at >= ?'
+                params.append(start)
+            if end is not None:
+                query += ' AND started_at < ?'
+                params.append(end)
+            
+            query += ' ORDER BY started_at, id LIMIT ?'
+            params.append(chunk_size)
+            
+            with self._get_connection() as conn:
+                rows = conn.execute(query, params).fetchall()
+            
+            for row in rows:
+                for history in expand_run(decode_run(row)):
+                    if (since is None or history.checked_at >= since) and (until is None or history.checked_at < until):
+                        yield history
+            
+            if len(rows) < chunk_size:
+                break
+            after = (rows[-1][4], rows[-1][0])  # (started_at, id)
+    
+    def get_history_arrays(self, website_ids: List[int], since: datetime = None, until: datetime = None):
+        """Get history of several websites as a NumPy structured array"""
+        import numpy as np
+        from .arrays import HISTORY_DTYPE, MISSING_LATENCY
+        
+        placeholders = ', '.join('?' * len(website_ids))
+        query = (
+            f'SELECT website_id, started_at, ended_at, checks, status, '
+            f'IFNULL(latency_sum / NULLIF(latency_checks, 0), {MISSING_LATENCY}) '
+            f'FROM history_runs WHERE website_id IN ({placeholders})'
+        )
+        params = list(website_ids)
+        
+        if since is not None:
+            query += ' AND ended_at >= ?'
+            params.append(to_epoch_ms(since))
+        if until is not None:
+            query += ' AND started_at < ?'
+            params.append(to_epoch_ms(until))
+        query += ' ORDER BY website_id, started_at'
+        
+        run_dtype = [('website_id', np.int64), ('started_at', np.int64), ('ended_at', np.int64),
+                     ('checks', np.int64), ('status', np.int8), ('response_time', np.float64)]
+        with self._get_connection() as conn:
+            runs = np.fromiter(conn.execute(query, params), dtype=run_dtype)
+        
+        # Expand every run to its checks without a Python loop
+        counts = runs['checks']
+        total = int(counts.sum())
+        index = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        step = (runs['ended_at'] - runs['started_at']) / np.maximum(counts - 1, 1)
+        
+        history = np.empty(total, dtype=HISTORY_DTYPE)
+        history['website_id'] = np.repeat(runs['website_id'], counts)
+        history['checked_at'] = np.repeat(runs['started_at'], counts) + np.round(index * np.repeat(step, counts))
+        history['status'] = np.repeat(runs['status'], counts)
+        history['response_time'] = np.repeat(runs['response_time'], counts)
+        history['response_time'][history['response_time'] == MISSING_LATENCY] = np.nan
+        
+        keep = np.ones(total, dtype=bool)
+        if since is not None:
+            keep &= history['checked_at'] >= to_epoch_ms(since)
+        if until is not None:
+            keep &= history['checked_at'] < to_epoch_ms(until)
+        return history[keep]
+    
+    def get_website_last_status(self, website_id: int) -> Optional[str]:
+        """Get last status of website"""
+        with self._get_connection() as conn:
+            tail = self._tail(conn, website_id)
+        return decode_status(tail[1]) if tail else None
+    
+    # Internals
+    def _tail(self, conn: sqlite3.Connection, website_id: int) -> Optional[Tuple[int, int, Optional[str], int]]:
+        """Get the open run of a website, None before its first check"""
+        tail = self._tails.get(website_id)
+        if tail is None:
+            row = conn.execute(
+                'SELECT id, status, error_message, started_at FROM history_runs '
+                'WHERE website_id = ? ORDER BY started_at DESC, id DESC LIMIT 1',
+                (website_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            tail = self._tails[website_id] = tuple(row)
+        return tail
@@ -0,0 +1,277 @@
+# src/database/schema.py
+"""Database schema and in-place migrations
+
+The schema version is kept in PRAGMA user_version. Databases created before
+versioning (version 0) stored timestamps as ISO text and statuses as
+'up'/'down' text; they are converted to epoch milliseconds and status codes
+in a single transaction the first time they are opened. Version 2 adds the
+incidents table, filled from existing history on upgrade. Version 3 adds the
+per-host TLS certificate cache, which starts empty. Version 4 replaces the
+error text of history rows with an id into the error_messages dictionary,
+which also holds each message's error class.
+"""
+import logging
+
+from .codec import NOW_MS_SQL
+from .errors import classify_error
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 4
+
+# History with the error text inline, as before version 4; monthly
+# partitions still use it
+TEXT_HISTORY_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        website_id INTEGER NOT NULL,
+        status INTEGER NOT NULL,
+        response_time REAL,
+        error_message TEXT,
+        checked_at INTEGER NOT NULL,
+        FOREIGN KEY (website_id) REFERENCES websites(id)
+    )
+'''
+
+TABLES = {
+    'users': f'''
+        CREATE TABLE IF NOT EXISTS {{name}} (
+            chat_id INTEGER PRIMARY KEY,
+            created_at INTEGER NOT NULL DEFAULT {NOW_MS_SQL}
+        )
+    ''',
+    'websites': f'''
+        CREATE TABLE IF NOT EXISTS {{name}} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            name TEXT,
+            enabled INTEGER DEFAULT 1,
+            last_status INTEGER,
+            last_checked INTEGER,
+            created_at INTEGER NOT NULL DEFAULT {NOW_MS_SQL},
+            FOREIGN KEY (chat_id) REFERENCES users(chat_id),
+            UNIQUE(chat_id, url)
+        )
+    ''',
+    # Each distinct error message once, with its errors.CODE_* class
+    'error_messages': '''
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY,
+            message TEXT NOT NULL UNIQUE,
+            code INTEGER NOT NULL
+        )
+    ''',
+    'history': '''
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            website_id INTEGER NOT NULL,
+            status INTEGER NOT NULL,
+            response_time REAL,
+            error_id INTEGER,
+            checked_at INTEGER NOT NULL,
+            FOREIGN KEY (website_id) REFERENCES websites(id),
+            FOREIGN KEY (error_id) REFERENCES error_messages(id)
+        )
+    ''',
+    # One row per outage, ended_at is NULL while it is ongoing
+    'incidents': '''
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            website_id INTEGER NOT NULL,
+            started_at INTEGER NOT NULL,
+            ended_at INTEGER,
+            error_message TEXT,
+            checks INTEGER NOT NULL DEFAULT 1,
+            FOREIGN KEY (website_id) REFERENCES websites(id)
+        )
+    ''',
+    # Last TLS certificate seen per host, refreshed at most once per period
+    'certificates': '''
+        CREATE TABLE IF NOT EXISTS {name} (
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL DEFAULT 443,
+            not_after INTEGER,
+            issuer TEXT,
+            error TEXT,
+            checked_at INTEGER NOT NULL,
+            alerted_days INTEGER,
+            PRIMARY KEY (host, port)
+        )
+    ''',
+}
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_websites_chat_id ON websites(chat_id)',
+    # Composite index serves per-website lookups and keyset pagination
+    'CREATE INDEX IF NOT EXISTS idx_history_website_checked ON history(website_id, checked_at)',
+    'CREATE INDEX IF NOT EXISTS idx_history_checked_at ON history(checked_at)',
+    'CREATE INDEX IF NOT EXISTS idx_incidents_website_started ON incidents(website_id, started_at)',
+    # At most one open incident per website
+    'CREATE UNIQUE INDEX IF NOT EXISTS idx_incidents_open ON incidents(website_id) WHERE ended_at IS NULL',
+]
+
+# History rows with their error text, in HISTORY_COLUMNS; SQLite flattens
+# the view, so filters on it still use the history indexes
+VIEWS = [
+    '''
+    CREATE VIEW IF NOT EXISTS history_messages AS
+    SELECT history.id AS id, website_id, status, response_time, message AS error_message, checked_at
+    FROM history LEFT JOIN error_messages ON error_messages.id = history.error_id
+    ''',
+]
+
+# Version 0 -> 1: text timestamps and statuses to integers
+_LOCAL_TEXT_MS = "CAST(ROUND((julianday({col}, 'utc') - 2440587.5) * 86400000) AS INTEGER)"
+_UTC_TEXT_MS = "CAST(ROUND((julianday({col}) - 2440587.5) * 86400000) AS INTEGER)"
+_STATUS_CODE = "CASE {col} WHEN 'up' THEN 1 WHEN 'down' THEN 0 ELSE {default} END"
+
+# Python wrote datetime.now() (local time), SQLite defaults are UTC
+_V1_CONVERSIONS = {
+    'users': {
+        'created_at': _UTC_TEXT_MS,
+    },
+    'websites': {
+        'last_status': _STATUS_CODE.replace('{default}', 'NULL'),
+        'last_checked': _LOCAL_TEXT_MS,
+        'created_at': _UTC_TEXT_MS,
+    },
+    'history': {
+        'status': _STATUS_CODE.replace('{default}', '0'),
+        'checked_at': _LOCAL_TEXT_MS,
+    },
+}
+
+# Fallbacks for NOT NULL columns missing or empty in old tables
+_V1_FALLBACKS = {
+    'created_at': NOW_MS_SQL,
+    'checked_at': NOW_MS_SQL,
+}
+
+# Version 1 -> 2: derive incidents from runs of equal status in history.
+# A run starts where the status differs from the previous check; a down run
+# ends at the first check of the next run.
+_V2_BACKFILL = '''
+    INSERT INTO incidents (website_id, started_at, ended_at, error_message, checks)
+    WITH marked AS (
+        SELECT id, website_id, status, error_message, checked_at,
+               status != LAG(status, 1, 1) OVER (PARTITION BY website_id ORDER BY checked_at, id) AS changed
+        FROM history
+    ),
+    runs AS (
+        SELECT *, SUM(changed) OVER (PARTITION BY website_id ORDER BY checked_at, id) AS run
+        FROM marked
+    ),
+    grouped AS (
+        -- error_message is taken from the row with MIN(checked_at)
+        SELECT website_id, status, error_message, MIN(checked_at) AS started_at, COUNT(*) AS checks
+        FROM runs GROUP BY website_id, run
+    )
+    SELECT website_id, started_at, ended_at, error_message, checks FROM (
+        SELECT *, LEAD(started_at) OVER (PARTITION BY website_id ORDER BY started_at) AS ended_at
+        FROM grouped
+    ) WHERE status = 0
+'''
+
+
+def create_schema(conn):
+    """Create missing tables and indexes"""
+    for name, ddl in TABLES.items():
+        conn.execute(ddl.format(name=name))
+    for ddl in INDEXES:
+        conn.execute(ddl)
+    for ddl in VIEWS:
+        conn.execute(ddl)
+    conn.execute('DROP INDEX IF EXISTS idx_history_website_id')
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+
+def migrate(conn):
+    """Upgrade an existing database to the current schema in place"""
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    
+    existing = {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    if not existing & set(TABLES):
+        return  # New database
+    
+    # Run the whole upgrade in one transaction
+    if not conn.in_transaction:
+        conn.execute('BEGIN')
+    
+    if version < 1:
+        _migrate_v1(conn, existing)
+    if version < 2:
+        _migrate_v2(conn, existing)
+    if version < 4:
+        _migrate_v4(conn, existing)
+
+
+def _migrate_v1(conn, existing):
+    """Rewrite tables with integer timestamps and status codes"""
+    for table, conversions in _V1_CONVERSIONS.items():
+        if table not in existing:
+            continue
+        
+        ddl = TEXT_HISTORY_TABLE if table == 'history' else TABLES[table]
+        conn.execute(ddl.format(name=f'{table}_new'))
+        old_columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        new_columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table}_new)')]
+        
+        select = []
+        for column in new_columns:
+            if column not in old_columns:
+                select.append(_V1_FALLBACKS.get(column, 'NULL'))
+                continue
+            
+            expression = column
+            if column in conversions:
+                converted = conversions[column].format(col=column)
+                expression = f"CASE WHEN typeof({column}) = 'text' THEN {converted} ELSE {column} END"
+            if column in _V1_FALLBACKS:
+                expression = f"COALESCE({expression}, {_V1_FALLBACKS[column]})"
+            select.append(expression)
+        
+        conn.execute(
+            f"INSERT INTO {table}_new ({', '.join(new_columns)}) "
+            f"SELECT {', '.join(select)} FROM {table}"
+        )
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        
+        logger.info(f"Migrated table {table} to integer timestamps")
+
+
+def _migrate_v2(conn, existing):
+    """Create incidents from existing history"""
+    if 'history' not in existing:
+        return
+    
+    conn.execute(TABLES['incidents'].format(name='incidents'))
+    count = conn.execute(_V2_BACKFILL).rowcount
+    logger.info(f"Derived {count} incidents from history")
+
+
+def _migrate_v4(conn, existing):
+    """Move history error messages into the error_messages dictionary"""
+    if 'history' not in existing:
+        return
+    
+    conn.execute(TABLES['error_messages'].format(name='error_messages'))
+    conn.create_function('classify_error', 1, lambda message: classify_error('down', message), deterministic=True)
+    conn.execute(
+        'INSERT OR IGNORE INTO error_messages (message, code) '
+        'SELECT DISTINCT error_message, classify_error(error_message) FROM history WHERE error_message IS NOT NULL'
+    )
+    conn.execute('ALTER TABLE history ADD COLUMN error_id INTEGER REFERENCES error_messages(id)')
+    conn.execute(
+        'UPDATE history SET error_id = (SELECT id FROM error_messages WHERE message = history.error_message) '
+        'WHERE error_message IS NOT NULL'
+    )
+    conn.execute('ALTER TABLE history DROP COLUMN error_message')
+    
+    count = conn.execute('SELECT COUNT(*) FROM error_messages').fetchone()[0]
+    logger.info(f"Moved history error messages into {count} dictionary entries")
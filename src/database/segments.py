@@ -0,0 +1,255 @@
+# src/database/segments.py
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .errors import CODE_UP, classify_error, code_label, code_status
+from .models import History
+
+logger = logging.getLogger(__name__)
+
+# epoch seconds (int64), latency in seconds (float32, NaN if unknown),
+# status/error code (uint8), padded to 16 bytes
+RECORD = struct.Struct('<qfB3x')
+RECORD_SIZE = RECORD.size
+TIMESTAMP = struct.Struct('<q')
+CODE_OFFSET = 12
+
+# Same layout for numpy.frombuffer
+SEGMENT_DTYPE = [('timestamp', '<i8'), ('latency', '<f4'), ('code', 'u1'), ('pad', 'V3')]
+
+# Records per segment file, 64Ki records is ~90 days at a 2 minute interval
+SEGMENT_RECORDS = 65536
+
+
+class SegmentHistoryStore:
+    """History backend storing fixed-width records in per-site segment files
+    
+    Records are appended to data/history/<website_id>/<segment>.seg and read
+    through mmap, so lookups are binary searches and uptime is a strided
+    slice over the status bytes instead of decoded rows. Only the error
+    class is kept for failed checks, not the full message.
+    """
+    
+    def __init__(self, base_dir, segment_records: int = SEGMENT_RECORDS):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_records = segment_records
+        # website_id -> (segment number, records in it) of the tail segment
+        self._tails: Dict[int, Tuple[int, int]] = {}
+    
+    # Write path
+    def add_history(self, website_id: int, status: str,
+                    response_time: float = None, error_message: str = None) -> History:
+        """Append check result"""
+        checked_at = datetime.now()
+        code = classify_error(status, error_message)
+        latency = math.nan if response_time is None else response_time
+        
+        segment, count = self._tail(website_id)
+        if count >= self.segment_records:
+            segment, count = segment + 1, 0
+        
+        path = self._segment_path(website_id, segment)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'ab') as f:
+            f.write(RECORD.pack(int(checked_at.timestamp()), latency, code))
+        
+        self._tails[website_id] = (segment, count + 1)
+        
+        return History(
+            id=segment * self.segment_records + count,
+            website_id=website_id,
+            status=status,
+            response_time=response_time,
+            error_message=code_label(code),
+            checked_at=checked_at.replace(microsecond=0)
+        )
+    
+    def add_many(self, results: Iterable[History]):
+        """Append check results, timestamped now"""
+        for result in results:
+            self.add_history(result.website_id, result.status, result.response_time, result.error_message)
+    
+    def delete_website_history(self, website_id: int):
+        """Drop all segments of a website"""
+        self._tails.pop(website_id, None)
+        shutil.rmtree(self._site_dir(website_id), ignore_errors=True)
+    
+    # Read path
+    def get_website_history(self, website_id: int, limit: int = 100) -> List[History]:
+        """Get latest history for website, newest first"""
+        history = []
+        for segment in reversed(self._segments(website_id)):
+            with self._mapped(website_id, segment) as view:
+                count = len(view) // RECORD_SIZE
+                for index in range(count - 1, -1, -1):
+                    history.append(self._decode(website_id, segment, index, view))
+                    if len(history) >= limit:
+                        return history
+        return history
+    
+    def iter_website_history(self, website_id: int, since: datetime = None,
+                             until: datetime = None, chunk_size: int = 1000) -> Iterator[History]:
+        """Stream history oldest first"""
+        start = int(since.timestamp()) if since else None
+        end = int(until.timestamp()) if until else None
+        
+        for segment in self._segments(website_id):
+            with self._mapped(website_id, segment) as view:
+                lo, hi = self._bounds(view, start, end)
+            
+            # Map the segment again for every chunk and yield after unmapping it,
+            # so a paused caller holds neither the mapping nor the file. Records
+            # are only appended, so [lo, hi) stays valid between chunks.
+            for chunk_start in range(lo, hi, chunk_size):
+                try:
+                    with self._mapped(website_id, segment) as view:
+                        chunk = [
+                            self._decode(website_id, segment, index, view)
+                            for index in range(chunk_start, min(chunk_start + chunk_size, hi))
+                        ]
+                except FileNotFoundError:
+                    # The website's history was deleted meanwhile
+                    return
+                yield from chunk
+    
+    def get_history_arrays(self, website_ids: List[int], since: datetime = None, until: datetime = None):
+        """Get history of several websites as a NumPy structured array"""
+        import numpy as np
+        from .arrays import HISTORY_DTYPE, concatenate
+        from .codec import STATUS_DOWN, STATUS_UP
+        
+        start = int(since.timestamp()) if since else None
+        end = int(until.timestamp()) if until else None
+        
+        parts = []
+        for website_id in sorted(website_ids):
+            for segment in self._segments(website_id):
+                with self._mapped(website_id, segment) as view:
+                    lo, hi = self._bounds(view, start, end)
+                    if hi <= lo:
+                        continue
+                    records = np.frombuffer(view, dtype=SEGMENT_DTYPE, count=hi - lo, offset=lo * RECORD_SIZE)
+                    part = np.empty(hi - lo, dtype=HISTORY_DTYPE)
+                    part['website_id'] = website_id
+                    part['checked_at'] = records['timestamp'] * 1000
+                    part['status'] = np.where(records['code'] == CODE_UP, STATUS_UP, STATUS_DOWN)
+                    part['response_time'] = records['latency']
+                    del records  # Release the buffer before the mapping closes
+                    parts.append(part)
+        
+        return concatenate(parts)
+    
+    def get_website_last_status(self, website_id: int) -> Optional[str]:
+        """Get last status of website"""
+        for segment in reversed(self._segments(website_id)):
+            with self._mapped(website_id, segment) as view:
+                count = len(view) // RECORD_SIZE
+                if count:
+                    return code_status(view[(count - 1) * RECORD_SIZE + CODE_OFFSET])
+        return None
+    
+    def uptime(self, website_id: int, since: datetime = None, until: datetime = None) -> Optional[float]:
+        """Get fraction of 'up' checks in a time range, None without checks"""
+        start = int(since.timestamp()) if since else None
+        end = int(until.timestamp()) if until else None
+        
+        total = 0
+        up = 0
+        for segment in self._segments(website_id):
+            with self._mapped(website_id, segment) as view:
+                lo, hi = self._bounds(view, start, end)
+                if hi <= lo:
+                    continue
+                # Every RECORD_SIZE-th byte starting at the code is the status
+                codes = view[lo * RECORD_SIZE + CODE_OFFSET:hi * RECORD_SIZE:RECORD_SIZE]
+                try:
+                    up += codes.tobytes().count(CODE_UP)
+                finally:
+                    codes.release()
+                total += hi - lo
+        
+        return up / total if total else None
+    
+    # Internals
+    def _site_dir(self, website_id: int) -> Path:
+        return self.base_dir / str(website_id)
+    
+    def _segment_path(self, website_id: int, segment: int) -> Path:
+        return self._site_dir(website_id) / f'{segment:08d}.seg'
+    
+    def _segments(self, website_id: int) -> List[int]:
+        """List segment numbers of a website in order"""
+        try:
+            names = os.listdir(self._site_dir(website_id))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-4]) for name in names if name.endswith('.seg'))
+    
+    def _tail(self, website_id: int) -> Tuple[int, int]:
+        """Get tail segment and its record count"""
+        tail = self._tails.get(website_id)
+        if tail is None:
+            segments = self._segments(website_id)
+            if segments:
+                size = self._segment_path(website_id, segments[-1]).stat().st_size
+                tail = (segments[-1], size // RECORD_SIZE)
+            else:
+                tail = (0, 0)
+            self._tails[website_id] = tail
+        return tail
+    
+    @contextmanager
+    def _mapped(self, website_id: int, segment: int):
+        """Map a segment read-only, ignoring a torn trailing record"""
+        path = self._segment_path(website_id, segment)
+        size = path.stat().st_size
+        size -= size % RECORD_SIZE
+        
+        if size == 0:
+            yield memoryview(b'')
+            return
+        
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                yield view
+            finally:
+                view.release()
+    
+    def _bounds(self, view: memoryview, start: Optional[int], end: Optional[int]) -> Tuple[int, int]:
+        """Binary search record range [start, end) by timestamp"""
+        count = len(view) // RECORD_SIZE
+        lo = 0 if start is None else self._lower_bound(view, count, start)
+        hi = count if end is None else self._lower_bound(view, count, end)
+        return lo, hi
+    
+    def _lower_bound(self, view: memoryview, count: int, timestamp: int) -> int:
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if TIMESTAMP.unpack_from(view, mid * RECORD_SIZE)[0] < timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+    
+    def _decode(self, website_id: int, segment: int, index: int, view: memoryview) -> History:
+        """Decode one record"""
+        timestamp, latency, code = RECORD.unpack_from(view, index * RECORD_SIZE)
+        return History(
+            id=segment * self.segment_records + index,
+            website_id=website_id,
+            status=code_status(code),
+            response_time=None if math.isnan(latency) else latency,
+            error_message=code_label(code),
+            checked_at=datetime.fromtimestamp(timestamp)
+        )
@@ -0,0 +1,148 @@
+# src/database/storage.py
+"""Storage interface shared by the database backends
+
+Storage lists the operations the bot, the scheduler and the CLI use.
+DatabaseRepository implements it on SQLite and MemoryRepository keeps
+everything in dicts and per-site deques with periodic JSON snapshots.
+open_storage() picks one from STORAGE_BACKEND.
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import config
+from .models import Certificate, History, Incident, User, Website, WebsitePage
+
+
+class Storage(ABC):
+    """Operations every storage backend provides, see DatabaseRepository for details"""
+    
+    # User operations
+    @abstractmethod
+    def add_user(self, chat_id: int) -> User:
+        """Add or get user"""
+    
+    @abstractmethod
+    def get_user(self, chat_id: int) -> Optional[User]:
+        """Get user by chat_id"""
+    
+    # Website operations
+    @abstractmethod
+    def add_website(self, chat_id: int, url: str, name: str = None) -> Website:
+        """Add website for user, raises if the user already monitors url"""
+    
+    @abstractmethod
+    def add_websites(self, chat_id: int, urls: Iterable[str]) -> int:
+        """Add many websites, skipping monitored ones, return number added"""
+    
+    @abstractmethod
+    def get_website(self, website_id: int) -> Optional[Website]:
+        """Get website by ID"""
+    
+    @abstractmethod
+    def get_user_websites(self, chat_id: int) -> List[Website]:
+        """Get all websites for a user, newest first"""
+    
+    @abstractmethod
+    def get_user_websites_page(self, chat_id: int, after_id: int = None,
+                               before_id: int = None, limit: int = 10) -> WebsitePage:
+        """Get one page of a user's websites, newest first"""
+    
+    @abstractmethod
+    def count_user_websites(self, chat_id: int) -> Dict[Optional[str], int]:
+        """Count a user's websites by last status"""
+    
+    @abstractmethod
+    def iter_user_websites(self, chat_id: int, batch_size: int = 500) -> Iterator[Website]:
+        """Stream all websites for a user, oldest first"""
+    
+    @abstractmethod
+    def get_all_websites(self, url_prefix: Optional[str] = None) -> List[Website]:
+        """Get all enabled websites, optionally only those whose URL starts with url_prefix"""
+    
+    @abstractmethod
+    def get_website_by_url(self, chat_id: int, url: str) -> Optional[Website]:
+        """Get website by URL for user"""
+    
+    @abstractmethod
+    def remove_website(self, chat_id: int, url: str) -> bool:
+        """Remove website and its incidents"""
+    
+    @abstractmethod
+    def update_website_status(self, website_id: int, status: str):
+        """Update website status"""
+    
+    # History operations
+    @abstractmethod
+    def add_history(self, website_id: int, status: str,
+                    response_time: float = None, error_message: str = None) -> History:
+        """Add check history"""
+    
+    @abstractmethod
+    def record_checks(self, results: Iterable[History], incidents: Iterable[History] = (),
+                      states: Mapping[int, str] = None):
+        """Write a batch of check results, statuses and incident updates together"""
+    
+    @abstractmethod
+    def get_website_history(self, website_id: int, limit: int = 100) -> List[History]:
+        """Get history for website, newest first"""
+    
+    @abstractmethod
+    def iter_website_history(self, website_id: int, since: datetime = None,
+                             until: datetime = None, chunk_size: int = 1000) -> Iterator[History]:
+        """Stream history oldest first"""
+    
+    @abstractmethod
+    def get_history_arrays(self, website_ids: Iterable[int], since: datetime = None,
+                           until: datetime = None):
+        """Get history of several websites as a NumPy structured array"""
+    
+    @abstractmethod
+    def get_website_last_status(self, website_id: int) -> Optional[str]:
+        """Get last status of website"""
+    
+    @abstractmethod
+    def get_error_counts(self, website_ids: Iterable[int], since: datetime = None) -> Dict[str, int]:
+        """Count failed checks by error class label, most frequent first"""
+    
+    # Incident operations
+    @abstractmethod
+    def update_incident(self, website_id: int, status: str, error_message: str = None,
+                        checked_at: datetime = None):
+        """Open, extend or close the website's incident for a check result"""
+    
+    @abstractmethod
+    def get_open_incident(self, website_id: int) -> Optional[Incident]:
+        """Get ongoing incident of website"""
+    
+    @abstractmethod
+    def get_incidents(self, website_ids: Iterable[int], since: datetime = None,
+                      limit: int = 20) -> List[Incident]:
+        """Get incidents of websites, newest first"""
+    
+    @abstractmethod
+    def get_incident_stats(self, website_ids: Iterable[int], since: datetime = None) -> Dict[str, object]:
+        """Count incidents and their total and mean repair time in seconds"""
+    
+    # Certificate operations
+    @abstractmethod
+    def get_certificates(self, hosts: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], Certificate]:
+        """Get cached certificates by (host, port)"""
+    
+    @abstractmethod
+    def save_certificate(self, certificate: Certificate):
+        """Insert or replace the cached certificate of a host"""
+    
+    def close(self):
+        """Flush anything not yet persisted (nothing for backends that write through)"""
+
+
+def open_storage(settings: config.Settings) -> Storage:
+    """Create the storage backend selected by settings.storage_backend"""
+    if settings.storage_backend == 'sqlite':
+        from .repository import DatabaseRepository
+        return DatabaseRepository.from_settings(settings)
+    if settings.storage_backend == 'memory':
+        from .memory import MemoryRepository
+        return MemoryRepository.from_settings(settings)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.storage_backend}")
@@ -0,0 +1,73 @@
+# src/exports.py
+import csv
+import json
+from datetime import datetime
+from typing import IO, Iterable
+
+from src.database import History, Website
+
+WEBSITE_COLUMNS = ['url', 'name', 'enabled', 'last_status', 'last_checked']
+HISTORY_COLUMNS = ['checked_at', 'status', 'response_time', 'error_message']
+
+
+def write_websites_csv(websites: Iterable[Website], fp: IO[str]) -> int:
+    """Write websites as CSV row by row, return number written"""
+    writer = csv.writer(fp)
+    writer.writerow(WEBSITE_COLUMNS)
+    
+    count = 0
+    for website in websites:
+        writer.writerow([
+            website.url,
+            website.name,
+            int(website.enabled),
+            website.last_status or '',
+            _timestamp(website.last_checked)
+        ])
+        count += 1
+    return count
+
+
+def _timestamp(value) -> str:
+    """Format timestamp for export"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value or ''
+
+
+def write_history_csv(history: Iterable[History], fp: IO[str]) -> int:
+    """Write history as CSV row by row, return number written"""
+    writer = csv.writer(fp)
+    writer.writerow(HISTORY_COLUMNS)
+    
+    count = 0
+    for h in history:
+        writer.writerow([
+            _timestamp(h.checked_at),
+            h.status,
+            '' if h.response_time is None else h.response_time,
+            h.error_message or ''
+        ])
+        count += 1
+    return count
+
+
+def write_history_ndjson(history: Iterable[History], fp: IO[str]) -> int:
+    """Write history as newline-delimited JSON, return number written"""
+    count = 0
+    for h in history:
+        fp.write(json.dumps({
+            'checked_at': _timestamp(h.checked_at),
+            'status': h.status,
+            'response_time': h.response_time,
+            'error_message': h.error_message
+        }, ensure_ascii=False))
+        fp.write('\n')
+        count += 1
+    return count
+
+
+HISTORY_WRITERS = {
+    'csv': write_history_csv,
+    'ndjson': write_history_ndjson,
+}
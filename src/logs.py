@@ -0,0 +1,114 @@
+# src/logs.py
+"""Off-loop, sampled, structured logging
+
+Log calls on the event loop only put the record on a queue: a
+QueueListener thread formats it and does the file and stderr writes.
+Records passed extra={'sample': True} (routine 'up' check results) are
+sampled before they are queued, so at most one in sample_every of them is
+kept; transitions, warnings and errors are never dropped. The log file is
+written as one JSON object per line and rotated by size.
+"""
+import copy
+import json
+import logging
+import queue
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import List
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including extra= fields"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key != 'sample':
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every sample_every records marked sample=True"""
+    
+    def __init__(self, sample_every: int = 100):
+        super().__init__()
+        self.sample_every = max(1, sample_every)
+        self.seen = 0
+        self.dropped = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, 'sample', False) or record.levelno > logging.INFO:
+            return True
+        
+        self.seen += 1
+        if (self.seen - 1) % self.sample_every:
+            self.dropped += 1
+            return False
+        # Tell readers how many similar records this one stands for
+        record.sampled = self.sample_every
+        return True
+
+
+class OffLoopQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now, the arguments and exc_info
+        # may not be picklable or may change before the listener runs
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def start_logging(level: int, text_format: str, log_file=None, json_stderr: bool = False,
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                  sample_every: int = 100) -> QueueListener:
+    """Route the root logger through a queue to file and stderr handlers
+    
+    Returns the running listener; stop() it to flush on shutdown.
+    """
+    handlers: List[logging.Handler] = []
+    
+    stderr = logging.StreamHandler(sys.stderr)
+    stderr.setFormatter(JsonFormatter() if json_stderr else logging.Formatter(text_format))
+    handlers.append(stderr)
+    
+    if log_file is not None:
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                           encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = OffLoopQueueHandler(records)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+    
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
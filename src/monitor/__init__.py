@@ -2,5 +2,6 @@
 from .checker import WebsiteChecker
 from .scheduler import MonitorScheduler
 from .alerts import AlertManager
+from .watchdog import LoopLagMonitor
 
-__all__ = ['WebsiteChecker', 'MonitorScheduler', 'AlertManager']
+__all__ = ['WebsiteChecker', 'MonitorScheduler', 'AlertManager', 'LoopLagMonitor']
@@ -1,20 +1,34 @@
 # src/monitor/alerts.py
 import logging
-from typing import Dict
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
-import telegram as tg
-from telegram import Bot
+from src.database import Certificate, Website, Storage
 
-import config
-from src.database import Website, DatabaseRepository
+if TYPE_CHECKING:
+    # Only needed for annotations, keeps telegram out of checker-only runs
+    from telegram import Bot
 
 logger = logging.getLogger(__name__)
 
 
+def expiry_threshold(certificate: Certificate, thresholds: Iterable[int],
+                     now: datetime = None) -> Optional[int]:
+    """Get the most urgent expiry warning threshold reached in days, 0 once expired"""
+    days_left = certificate.days_left(now)
+    if days_left is None:
+        # Unreadable: only a rejected expired certificate is known to need a warning
+        return 0 if certificate.error and 'expired' in certificate.error else None
+    if days_left <= 0:
+        return 0
+    reached = [days for days in thresholds if days_left <= days]
+    return min(reached) if reached else None
+
+
 class AlertManager:
     """Manages alert notifications"""
     
-    def __init__(self, bot: Bot, db: DatabaseRepository):
+    def __init__(self, bot: 'Bot', db: Storage):
         self.bot = bot
         self.db = db
         # Track last alert status to avoid spam
@@ -23,7 +37,7 @@ class AlertManager:
     async def send_alert(self, website: Website, result) -> bool:
         """Send alert if status changed"""
         previous_status = self.last_alert_status.get(website.id)
-        current_status = result.status
+        current_status = result.website_status
         
         # Only alert on status change
         if previous_status == current_status:
@@ -36,8 +50,10 @@ class AlertManager:
         # Prepare message
         if current_status == 'down':
             message = self._build_down_message(website, result)
+        elif current_status == 'degraded':
+            message = self._build_degraded_message(website, result)
         else:
-            message = self._build_up_message(website, result)
+            message = self._build_up_message(website, result, previous_status)
         
         try:
             await self.bot.send_message(
@@ -65,10 +81,24 @@ class AlertManager:
         
         return message
     
-    def _build_up_message(self, website: Website, result) -> str:
+    def _build_degraded_message(self, website: Website, result) -> str:
+        """Build slow response message"""
+        message = "🟡 <b>Website Degraded</b>\n\n"
+        message += f"🌐 <b>URL:</b> {website.url}\n"
+        message += f"⏱️ <b>Response Time:</b> {result.response_time:.2f}s"
+        if result.baseline:
+            message += f" (usually {result.baseline:.2f}s)"
+        message += "\n"
+        message += f"⏰ <b>Time:</b> {result.checked_at.strftime('%Y-%m-%d %H:%M:%S')}"
+        return message
+    
+    def _build_up_message(self, website: Website, result, previous_status: str = None) -> str:
         """Build up recovery message"""
         emoji = "🟢"
-        message = f"{emoji} <b>Website Recovered!</b>\n\n"
+        if previous_status == 'degraded':
+            message = f"{emoji} <b>Response Times Back to Normal</b>\n\n"
+        else:
+            message = f"{emoji} <b>Website Recovered!</b>\n\n"
         message += f"🌐 <b>URL:</b> {website.url}\n"
         
         if result.response_time:
@@ -78,14 +108,64 @@ class AlertManager:
         
         return message
     
+    async def send_certificate_alert(self, websites: List[Website], certificate: Certificate,
+                                     previous: Optional[Certificate], thresholds: Iterable[int]) -> bool:
+        """Warn the websites' chats when the certificate reaches a more urgent threshold
+        
+        Sets certificate.alerted_days, so each threshold is sent once per
+        certificate and a renewed certificate starts over.
+        """
+        last_alerted = previous.alerted_days if previous else None
+        threshold = expiry_threshold(certificate, thresholds)
+        if threshold is None and certificate.not_after is None:
+            # Transient failure, keep the state of the last readable certificate
+            threshold = last_alerted
+        certificate.alerted_days = threshold
+        
+        if threshold is None or (last_alerted is not None and threshold >= last_alerted):
+            return False
+        
+        message = self._build_certificate_message(websites, certificate, threshold)
+        sent = False
+        for chat_id in sorted({website.chat_id for website in websites}):
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=message, parse_mode='HTML')
+                sent = True
+            except Exception as e:
+                logger.error(f"Failed to send certificate alert: {e}")
+        
+        if sent:
+            logger.info(f"Certificate alert sent for {certificate.host} ({threshold} days threshold)")
+        return sent
+    
+    def _build_certificate_message(self, websites: List[Website], certificate: Certificate,
+                                   threshold: int) -> str:
+        """Build certificate expiry message"""
+        if threshold == 0:
+            message = "🔴 <b>Certificate Expired!</b>\n\n"
+        else:
+            days = int(certificate.days_left())
+            message = f"🔒 <b>Certificate Expires in {days} day{'s' if days != 1 else ''}</b>\n\n"
+        
+        message += f"🌐 <b>Host:</b> {certificate.host}\n"
+        if certificate.issuer:
+            message += f"🏢 <b>Issuer:</b> {certificate.issuer}\n"
+        if certificate.not_after:
+            message += f"⏰ <b>Expires:</b> {certificate.not_after.strftime('%Y-%m-%d %H:%M')}\n"
+        elif certificate.error:
+            message += f"⚠️ <b>Error:</b> {certificate.error}\n"
+        
+        urls = sorted({website.url for website in websites})
+        message += f"\n{len(urls)} monitored URL{'s' if len(urls) != 1 else ''} on this host"
+        return message
+    
     def load_previous_statuses(self):
-        """Load last known statuses from database"""
+        """Load last known statuses (including 'degraded') from database"""
         try:
             websites = self.db.get_all_websites()
             for website in websites:
-                last_status = self.db.get_website_last_status(website.id)
-                if last_status:
-                    self.last_alert_status[website.id] = last_status
+                if website.last_status:
+                    self.last_alert_status[website.id] = website.last_status
             logger.info(f"Loaded {len(self.last_alert_status)} previous statuses")
         except Exception as e:
             logger.error(f"Failed to load previous statuses: {e}")
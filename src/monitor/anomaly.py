@@ -0,0 +1,123 @@
+# src/monitor/anomaly.py
+"""Streaming latency baselines and the 'degraded' state
+
+Each website keeps an exponentially weighted mean and variance of its log
+response time, updated in constant time and memory per result. Working
+on the log scale makes the test relative, so 80 ms -> 8 s and 1 s -> 100 s
+are equally anomalous, and the spread of a fast site does not hide a
+slowdown of a slow one. A result is anomalous when it is more than sigma
+standard deviations and at least MIN_RATIO times above the baseline. A
+website turns 'degraded' after `checks` anomalous results in a row and
+back to 'up' after as many normal ones. Anomalous results move the
+baseline only slowly, so a lasting slowdown stays degraded for hours
+before it becomes the new normal. Baselines are not persisted and are
+learned again after a restart; a website that was degraded before it
+stays degraded until its new baseline is trusted and then follows the
+usual rule against that baseline.
+"""
+import math
+from typing import Dict, Optional
+
+# Weight of each new result in the baseline
+ALPHA = 0.1
+
+# Weight of anomalous results, lets a permanent change become the baseline
+ANOMALOUS_ALPHA = 0.01
+
+# Results before a baseline is trusted
+WARMUP = 10
+
+# Anomalous only when at least this many times slower than the baseline
+MIN_RATIO = 2.0
+
+# Lower bound of the standard deviation of log latency (about 10% jitter)
+MIN_STDDEV = 0.1
+
+
+class LatencyBaseline:
+    """EWMA of log latency with the current degraded state of one website"""
+    
+    __slots__ = ('mean', 'variance', 'count', 'streak', 'degraded')
+    
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+        # Consecutive results disagreeing with the current state
+        self.streak = 0
+        self.degraded = False
+    
+    @property
+    def typical(self) -> Optional[float]:
+        """Get the baseline latency in seconds (geometric mean)"""
+        return math.exp(self.mean) if self.count else None
+    
+    def is_anomalous(self, latency: float, sigma: float) -> bool:
+        """Check whether latency is far above the baseline"""
+        if self.count < WARMUP:
+            return False
+        excess = math.log(latency) - self.mean
+        stddev = max(math.sqrt(self.variance), MIN_STDDEV)
+        return excess > sigma * stddev and excess > math.log(MIN_RATIO)
+    
+    def update(self, latency: float, alpha: float):
+        """Fold latency into the mean and variance"""
+        value = math.log(latency)
+        if self.count == 0:
+            self.mean = value
+        else:
+            # Incremental EWMA variance (West 1979)
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class AnomalyDetector:
+    """Track latency baselines and decide when websites are degraded"""
+    
+    def __init__(self, sigma: float = 4.0, checks: int = 3):
+        self.sigma = sigma
+        self.checks = checks
+        self._baselines: Dict[int, LatencyBaseline] = {}
+    
+    def observe(self, website_id: int, status: str, response_time: Optional[float],
+                last_status: Optional[str] = None) -> str:
+        """Record a check result, return the website's state: 'up', 'degraded' or 'down'
+        
+        last_status is the stored state of the website, it seeds the state of
+        a website seen for the first time, e.g. after a restart.
+        """
+        baseline = self._baselines.get(website_id)
+        if baseline is None:
+            baseline = self._baselines[website_id] = LatencyBaseline()
+            baseline.degraded = last_status == 'degraded'
+        
+        if status != 'up' or not response_time or response_time <= 0:
+            # Outages are not latency samples; recovery starts a fresh streak
+            baseline.streak = 0
+            baseline.degraded = False
+            return status
+        
+        if baseline.count < WARMUP:
+            # Nothing to compare with yet, keep the state
+            baseline.update(response_time, ALPHA)
+            return 'degraded' if baseline.degraded else 'up'
+        
+        anomalous = baseline.is_anomalous(response_time, self.sigma)
+        baseline.update(response_time, ANOMALOUS_ALPHA if anomalous else ALPHA)
+        
+        if anomalous != baseline.degraded:
+            baseline.streak += 1
+            if baseline.streak >= self.checks:
+                baseline.degraded = anomalous
+                baseline.streak = 0
+        else:
+            baseline.streak = 0
+        
+        return 'degraded' if baseline.degraded else 'up'
+    
+    def baseline(self, website_id: int) -> Optional[LatencyBaseline]:
+        """Get the baseline of a website, None before its first result"""
+        return self._baselines.get(website_id)
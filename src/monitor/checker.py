@@ -1,14 +1,25 @@
 # src/monitor/checker.py
-import httpx
+import asyncio
 import logging
-from dataclasses import dataclass
+import ssl
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional
+from urllib.parse import parse_qs, urlparse
 
 import config
-from src.database import Website
+from src.database import Certificate, Website
 
 logger = logging.getLogger(__name__)
 
+# Most a banner read takes in, services greet with one short line
+MAX_BANNER_BYTES = 1024
+
+
+def is_tcp_url(url: str) -> bool:
+    """Check if URL is a tcp://host:port monitor"""
+    return url[:6].lower() == 'tcp://'
+
 
 @dataclass
 class CheckResult:
@@ -19,23 +30,43 @@ class CheckResult:
     response_time: Optional[float] = None
     status_code: Optional[int] = None
     error_message: Optional[str] = None
+    checked_at: datetime = field(default_factory=datetime.now)
+    # Set by the scheduler: 'degraded' while up but anomalously slow, with the usual response time
+    state: Optional[str] = None
+    baseline: Optional[float] = None
+    
+    @property
+    def website_status(self) -> str:
+        """Get the status to store and alert on: 'up', 'degraded' or 'down'"""
+        return self.state or self.status
 
 
 class WebsiteChecker:
     """Website uptime checker"""
     
-    def __init__(self, timeout: int = None):
-        self.timeout = timeout or config.REQUEST_TIMEOUT_SECONDS
+    def __init__(self, timeout: int = None, max_connections: int = 100):
+        # Imported here so the monitor package imports without httpx cost
+        import httpx
+        
+        self.timeout = timeout or config.get_settings().request_timeout_seconds
         self.client = httpx.AsyncClient(
             timeout=self.timeout,
             follow_redirects=True,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
             headers={
                 'User-Agent': 'Website-Uptime-Monitor/1.0'
             }
         )
+        self._ssl_context: Optional[ssl.SSLContext] = None
     
     async def check(self, website: Website) -> CheckResult:
         """Check if website is up"""
+        import httpx
+        
+        if is_tcp_url(website.url):
+            return await self.check_tcp(website)
+        
         try:
             logger.debug(f"Checking {website.url}")
             
@@ -52,7 +83,19 @@ class WebsiteChecker:
                 status = 'down'
                 error_message = f"HTTP {response.status_code}"
             
-            logger.info(f"{website.url}: {status} ({response.status_code}) - {response_time:.2f}s")
+            fields = {
+                'website_id': website.id,
+                'status': status,
+                'status_code': response.status_code,
+                'response_time': response_time,
+            }
+            if status == 'up':
+                # Routine result, sampled by the logging setup
+                logger.info(f"{website.url}: up ({response.status_code}) - {response_time:.2f}s",
+                            extra={'sample': True, **fields})
+            else:
+                logger.warning(f"{website.url}: down ({response.status_code}) - {response_time:.2f}s",
+                               extra=fields)
             
             return CheckResult(
                 website_id=website.id,
@@ -64,7 +107,8 @@ class WebsiteChecker:
             )
             
         except httpx.TimeoutException:
-            logger.warning(f"{website.url}: timeout after {self.timeout}s")
+            logger.warning(f"{website.url}: timeout after {self.timeout}s",
+                           extra={'website_id': website.id, 'status': 'down'})
             return CheckResult(
                 website_id=website.id,
                 url=website.url,
@@ -73,7 +117,8 @@ class WebsiteChecker:
             )
             
         except httpx.RequestError as e:
-            logger.warning(f"{website.url}: request error - {e}")
+            logger.warning(f"{website.url}: request error - {e}",
+                           extra={'website_id': website.id, 'status': 'down'})
             return CheckResult(
                 website_id=website.id,
                 url=website.url,
@@ -82,7 +127,8 @@ class WebsiteChecker:
             )
         
         except Exception as e:
-            logger.error(f"{website.url}: unexpected error - {e}")
+            logger.error(f"{website.url}: unexpected error - {e}",
+                         extra={'website_id': website.id, 'status': 'down'})
             return CheckResult(
                 website_id=website.id,
                 url=website.url,
@@ -90,6 +136,106 @@ class WebsiteChecker:
                 error_message=str(e)
             )
     
+    async def check_tcp(self, website: Website) -> CheckResult:
+        """Check a tcp://host:port monitor with a bare connect and optional banner read"""
+        parsed = urlparse(website.url)
+        query = parse_qs(parsed.query, keep_blank_values=True)
+        expected = query['banner'][0] if 'banner' in query else None
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(parsed.hostname, parsed.port), self.timeout
+            )
+            if expected is not None:
+                # Greeting line, as sent by SMTP, FTP and SSH servers
+                banner = await asyncio.wait_for(reader.readline(), self.timeout - (loop.time() - started))
+                banner = banner[:MAX_BANNER_BYTES].decode('utf-8', 'replace').strip()
+                if expected not in banner:
+                    error_message = f"Unexpected banner: {banner[:80]!r}" if banner else "No banner"
+                    logger.warning(f"{website.url}: down - {error_message}",
+                                   extra={'website_id': website.id, 'status': 'down'})
+                    return CheckResult(
+                        website_id=website.id,
+                        url=website.url,
+                        status='down',
+                        response_time=loop.time() - started,
+                        error_message=error_message
+                    )
+            
+            response_time = loop.time() - started
+            logger.info(f"{website.url}: up - {response_time:.3f}s",
+                        extra={'sample': True, 'website_id': website.id, 'status': 'up',
+                               'response_time': response_time})
+            return CheckResult(
+                website_id=website.id,
+                url=website.url,
+                status='up',
+                response_time=response_time
+            )
+        
+        except asyncio.TimeoutError:
+            logger.warning(f"{website.url}: timeout after {self.timeout}s",
+                           extra={'website_id': website.id, 'status': 'down'})
+            return CheckResult(
+                website_id=website.id,
+                url=website.url,
+                status='down',
+                error_message=f"Timeout after {self.timeout}s"
+            )
+        
+        except OSError as e:
+            logger.warning(f"{website.url}: connect error - {e}",
+                           extra={'website_id': website.id, 'status': 'down'})
+            return CheckResult(
+                website_id=website.id,
+                url=website.url,
+                status='down',
+                error_message=e.strerror or str(e)
+            )
+        
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    async def check_certificate(self, host: str, port: int = 443) -> Certificate:
+        """Read expiry and issuer of a host's TLS certificate with one handshake"""
+        if self._ssl_context is None:
+            # Loading the CA bundle is slow, do it once
+            self._ssl_context = ssl.create_default_context()
+        
+        writer = None
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self._ssl_context, server_hostname=host),
+                self.timeout
+            )
+            peer = writer.get_extra_info('peercert') or {}
+            not_after = datetime.fromtimestamp(ssl.cert_time_to_seconds(peer['notAfter']))
+            issuer = {key: value for rdn in peer.get('issuer', ()) for key, value in rdn}
+            
+            logger.info(f"{host}:{port}: certificate valid until {not_after:%Y-%m-%d}")
+            return Certificate(
+                host=host,
+                port=port,
+                not_after=not_after,
+                issuer=issuer.get('organizationName') or issuer.get('commonName')
+            )
+        
+        except ssl.SSLCertVerificationError as e:
+            logger.warning(f"{host}:{port}: certificate rejected - {e.verify_message}")
+            return Certificate(host=host, port=port, error=e.verify_message or str(e))
+        
+        except (OSError, asyncio.TimeoutError, KeyError, ValueError) as e:
+            logger.warning(f"{host}:{port}: certificate check failed - {e!r}")
+            return Certificate(host=host, port=port, error=str(e) or type(e).__name__)
+        
+        finally:
+            if writer is not None:
+                writer.close()
+    
     async def close(self):
         """Close HTTP client"""
         await self.client.aclose()
@@ -0,0 +1,84 @@
+# src/monitor/circuit.py
+import logging
+import time
+from typing import Callable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Backs off checks for websites that keep failing"""
+    
+    def __init__(self, base_interval: float, threshold: int = 3,
+                 max_interval: float = 3600, clock: Callable[[], float] = time.monotonic):
+        self.base_interval = base_interval
+        self.threshold = threshold
+        self.max_interval = max(max_interval, base_interval)
+        self.clock = clock
+        # Consecutive failures and earliest next check per website
+        self._failures: Dict[int, int] = {}
+        self._next_attempt: Dict[int, float] = {}
+    
+    def allow(self, website_id: int) -> bool:
+        """Check if website is due for a check"""
+        next_attempt = self._next_attempt.get(website_id)
+        return next_attempt is None or self.clock() >= next_attempt
+    
+    def record(self, website_id: int, status: str) -> bool:
+        """Record check result, return True if the breaker opened or closed"""
+        was_open = self.is_open(website_id)
+        
+        if status == 'up':
+            # Snap back to the normal interval on the first success
+            self._failures.pop(website_id, None)
+            self._next_attempt.pop(website_id, None)
+            if was_open:
+                logger.info(f"Website {website_id} recovered, back to normal interval")
+            return was_open
+        
+        failures = self._failures.get(website_id, 0) + 1
+        self._failures[website_id] = failures
+        
+        if failures >= self.threshold:
+            interval = self.current_interval(website_id)
+            self._next_attempt[website_id] = self.clock() + interval
+            if not was_open:
+                logger.info(
+                    f"Website {website_id} failed {failures} times, "
+                    f"backing off to {interval / 60:.0f} minutes"
+                )
+        return not was_open and self.is_open(website_id)
+    
+    def is_open(self, website_id: int) -> bool:
+        """Check if website is backed off"""
+        return self._failures.get(website_id, 0) >= self.threshold
+    
+    def open_ids(self) -> Set[int]:
+        """Get ids of backed-off websites"""
+        return {website_id for website_id, failures in self._failures.items() if failures >= self.threshold}
+    
+    def failures(self, website_id: int) -> int:
+        """Get consecutive failure count"""
+        return self._failures.get(website_id, 0)
+    
+    def current_interval(self, website_id: int) -> float:
+        """Get check interval for website in seconds"""
+        failures = self._failures.get(website_id, 0)
+        if failures < self.threshold:
+            return self.base_interval
+        
+        # Double the interval for every failure past the threshold
+        exponent = min(failures - self.threshold + 1, 32)
+        return min(self.base_interval * (2 ** exponent), self.max_interval)
+    
+    def seconds_until_next(self, website_id: int) -> float:
+        """Get seconds until website is checked again"""
+        next_attempt = self._next_attempt.get(website_id)
+        if next_attempt is None:
+            return 0.0
+        return max(0.0, next_attempt - self.clock())
+    
+    def forget(self, website_id: int):
+        """Drop state for website"""
+        self._failures.pop(website_id, None)
+        self._next_attempt.pop(website_id, None)
@@ -0,0 +1,144 @@
+# src/monitor/fairness.py
+"""Fair sharing of check capacity between chats
+
+FairLimiter bounds the checks in flight like a semaphore, but when a slot
+frees up it goes to the waiting chat that has had the least service so far
+(start-time fair queueing). Each chat's waiters are tagged with a virtual
+start time that advances by 1/weight per check, so a chat queueing 5,000
+sites is interleaved with a chat queueing five instead of going first.
+The time every check waited for its slot is kept per chat as check lag.
+
+CheckQuota is a token bucket per chat for the optional checks-per-minute
+quota.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+# Lag samples kept per chat
+LAG_WINDOW = 500
+
+
+def percentiles(samples) -> Dict[str, float]:
+    """Get p50/p95/max of samples, empty without samples"""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'samples': len(ordered),
+        'p50': ordered[round(last * 0.50)],
+        'p95': ordered[round(last * 0.95)],
+        'max': ordered[last],
+    }
+
+
+class FairLimiter:
+    """Concurrency limit that hands free slots to chats in weighted fair order"""
+    
+    def __init__(self, capacity: int, weights: Mapping[int, float] = None,
+                 window: int = LAG_WINDOW, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.weights = dict(weights or {})
+        self.window = window
+        self.clock = clock
+        self._free = capacity
+        # Waiters ordered by (virtual start, arrival)
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[Optional[int], float] = {}
+        self._lag: Dict[Optional[int], Deque[float]] = {}
+    
+    @asynccontextmanager
+    async def slot(self, chat_id: Optional[int]):
+        """Hold one check slot for chat_id (None for the monitor's own work)"""
+        await self.acquire(chat_id)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    async def acquire(self, chat_id: Optional[int]):
+        """Wait for a slot, behind chats that have had less service"""
+        start = max(self._virtual_time, self._last_finish.get(chat_id, 0.0))
+        self._last_finish[chat_id] = start + 1.0 / self.weights.get(chat_id, 1.0)
+        
+        queued = self.clock()
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+            self._virtual_time = start
+        else:
+            future = asyncio.get_running_loop().create_future()
+            entry = (start, next(self._sequence), future)
+            heapq.heappush(self._waiters, entry)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Granted just as we were cancelled, pass the slot on
+                    self.release()
+                elif entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                raise
+        
+        lag = self._lag.get(chat_id)
+        if lag is None:
+            lag = self._lag[chat_id] = deque(maxlen=self.window)
+        lag.append(self.clock() - queued)
+    
+    def release(self):
+        """Free a slot, handing it to the first waiter in fair order"""
+        while self._waiters:
+            start, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._virtual_time = start
+                future.set_result(None)
+                return
+        self._free += 1
+    
+    @property
+    def waiting(self) -> int:
+        """Number of checks waiting for a slot"""
+        return len(self._waiters)
+    
+    def lag(self, chat_id: Optional[int]) -> Dict[str, float]:
+        """Get check lag p50/p95/max in seconds for a chat"""
+        return percentiles(self._lag.get(chat_id))
+    
+    def lag_report(self, top: int = 5) -> List[Tuple[int, Dict[str, float]]]:
+        """Get the chats with the highest p95 check lag, worst first"""
+        report = [
+            (chat_id, percentiles(samples)) for chat_id, samples in self._lag.items()
+            if chat_id is not None and samples
+        ]
+        report.sort(key=lambda item: item[1]['p95'], reverse=True)
+        return report[:top]
+
+
+class CheckQuota:
+    """Token bucket per chat limiting checks per minute"""
+    
+    def __init__(self, per_minute: float, burst: float = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = per_minute / 60.0
+        # Default burst covers one minute of checks
+        self.burst = per_minute if burst is None else max(burst, 1.0)
+        self.clock = clock
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+    
+    def take(self, chat_id: int) -> bool:
+        """Spend a check from chat_id's budget, False when it is used up"""
+        now = self.clock()
+        tokens, updated = self._buckets.get(chat_id, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1.0:
+            self._buckets[chat_id] = (tokens, now)
+            return False
+        self._buckets[chat_id] = (tokens - 1.0, now)
+        return True
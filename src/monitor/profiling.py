@@ -0,0 +1,209 @@
+# src/monitor/profiling.py
+"""Opt-in profiling of check cycles
+
+CycleProfiler records the wall time of each stage of every website check
+(check, persist, alert) and samples the event loop thread's stack while a
+cycle runs. When the cycle ends, a snapshot with the slowest websites, the
+stage totals and the hottest functions is appended as one JSON line to a
+rotating file.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('check', 'persist', 'alert')
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.01
+MAX_STACK_DEPTH = 64
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling one thread's stack from a background thread"""
+    
+    def __init__(self, interval: float = SAMPLE_INTERVAL, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples = 0
+        self.self_counts: Counter = Counter()   # function on top of the stack
+        self.total_counts: Counter = Counter()  # function anywhere on the stack
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start sampling the calling thread (or thread_id)"""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop sampling and wait for the sampler thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def top(self, n: int) -> List[dict]:
+        """Get functions with the most samples on top of the stack"""
+        return [
+            {
+                'function': function,
+                'self': count / self.samples,
+                'total': self.total_counts[function] / self.samples,
+            }
+            for function, count in self.self_counts.most_common(n)
+        ]
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self._sample(frame)
+    
+    def _sample(self, frame):
+        seen = set()
+        depth = 0
+        leaf = True
+        while frame is not None and depth < MAX_STACK_DEPTH:
+            code = frame.f_code
+            function = f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+            if leaf:
+                self.self_counts[function] += 1
+                leaf = False
+            if function not in seen:
+                seen.add(function)
+                self.total_counts[function] += 1
+            frame = frame.f_back
+            depth += 1
+        self.samples += 1
+
+
+class CycleProfiler:
+    """Per-cycle stage timings and sampling profile written to a rotating file"""
+    
+    def __init__(self, path, top_n: int = 10, sample_interval: float = SAMPLE_INTERVAL,
+                 max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3):
+        self.path = path
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.last_snapshot: Optional[dict] = None
+        # website_id -> stage -> seconds
+        self._timings: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        # stage -> seconds spent on the whole cycle at once (e.g. the batched persist)
+        self._batched: Dict[str, float] = defaultdict(float)
+        self._sampler: Optional[SamplingProfiler] = None
+        self._started: Optional[float] = None
+        self._closing = False
+        
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                            encoding='utf-8', delay=True)
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    @property
+    def in_cycle(self) -> bool:
+        return self._started is not None
+    
+    def begin_cycle(self):
+        """Reset timings and start sampling the current thread"""
+        self._timings.clear()
+        self._batched.clear()
+        self._started = time.perf_counter()
+        self._sampler = SamplingProfiler(self.sample_interval)
+        self._sampler.start()
+    
+    @contextmanager
+    def stage(self, website_id: Optional[int], name: str):
+        """Time one stage of a website check, or of the whole cycle without website_id"""
+        timings = self._batched if website_id is None else self._timings[website_id]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] += time.perf_counter() - started
+    
+    def end_cycle(self, urls: Dict[int, str] = None) -> dict:
+        """Stop sampling, write and return the cycle snapshot"""
+        duration = time.perf_counter() - self._started if self._started is not None else 0.0
+        self._started = None
+        if self._sampler is not None:
+            self._sampler.stop()
+        
+        snapshot = self._snapshot(duration, urls or {})
+        self.last_snapshot = snapshot
+        self._handler.handle(logging.makeLogRecord({'msg': json.dumps(snapshot)}))
+        
+        stages = ', '.join(f"{name} {stage['total']:.2f}s" for name, stage in snapshot['stages'].items())
+        logger.info(f"Profiled cycle: {duration:.2f}s, {snapshot['sites']} sites ({stages})")
+        
+        if self._closing:
+            self._handler.close()
+        return snapshot
+    
+    def close(self):
+        """Close the file, after the running cycle if there is one"""
+        if self.in_cycle:
+            self._closing = True
+        else:
+            self._handler.close()
+    
+    def _snapshot(self, duration: float, urls: Dict[int, str]) -> dict:
+        stages = {}
+        for name in STAGES:
+            times = [timings[name] for timings in self._timings.values() if name in timings]
+            stages[name] = {
+                'total': sum(times) + self._batched.get(name, 0.0),
+                'max': max(times, default=0.0),
+                'mean': sum(times) / len(times) if times else 0.0,
+                'batched': self._batched.get(name, 0.0),
+            }
+        
+        totals = sorted(
+            ((sum(timings.values()), website_id) for website_id, timings in self._timings.items()),
+            reverse=True
+        )
+        slowest = [
+            {
+                'website_id': website_id,
+                'url': urls.get(website_id),
+                'total': total,
+                **{name: self._timings[website_id].get(name, 0.0) for name in STAGES},
+            }
+            for total, website_id in totals[:self.top_n]
+        ]
+        
+        stage_times = sorted(
+            (
+                (seconds, website_id, name)
+                for website_id, timings in self._timings.items()
+                for name, seconds in timings.items()
+            ),
+            reverse=True
+        )
+        slowest_stages = [
+            {'website_id': website_id, 'url': urls.get(website_id), 'stage': name, 'seconds': seconds}
+            for seconds, website_id, name in stage_times[:self.top_n]
+        ]
+        
+        sampler = self._sampler
+        return {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'duration': duration,
+            'sites': len(self._timings),
+            'stages': stages,
+            'slowest_sites': slowest,
+            'slowest_stages': slowest_stages,
+            'samples': sampler.samples if sampler else 0,
+            'hot_functions': sampler.top(self.top_n) if sampler and sampler.samples else [],
+        }
@@ -1,40 +1,113 @@
 # src/monitor/scheduler.py
 import asyncio
 import logging
+import time
+from contextlib import nullcontext
 from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
 
 import config
-from src.database import DatabaseRepository, Website
-from .checker import WebsiteChecker
+from src.database import Certificate, History, Storage, Website
+from .checker import CheckResult, WebsiteChecker
 from .alerts import AlertManager
+from .anomaly import AnomalyDetector
+from .circuit import CircuitBreaker
+from .fairness import CheckQuota, FairLimiter
+from .profiling import CycleProfiler
 
 logger = logging.getLogger(__name__)
 
+# Seconds between heartbeat file touches
+HEARTBEAT_INTERVAL = 10
+
 
 class MonitorScheduler:
     """Scheduler for periodic website checks"""
     
-    def __init__(self, db: DatabaseRepository, alert_manager: AlertManager):
+    def __init__(self, db: Storage, alert_manager: AlertManager,
+                 settings: config.Settings = None, render_cache=None):
+        self.settings = settings or config.get_settings()
         self.db = db
         self.alert_manager = alert_manager
-        self.checker = WebsiteChecker()
+        # Optional cache of rendered bot pages, invalidated on state changes
+        self.render_cache = render_cache
+        self.checker = WebsiteChecker(self.settings.request_timeout_seconds,
+                                      max_connections=self.settings.max_concurrent_checks)
+        # Bounds checks in flight, queued checks get free slots in fair order across chats
+        self.fair = FairLimiter(self.settings.max_concurrent_checks, weights=self.settings.chat_weights)
         self.running = False
-        self.check_interval = config.CHECK_INTERVAL_MINUTES * 60  # Convert to seconds
+        self.check_interval = self.settings.check_interval_minutes * 60  # Convert to seconds
+        # tcp:// monitors are also checked on their own, shorter interval
+        self.tcp_interval = min(self.settings.tcp_check_interval_seconds or self.check_interval,
+                                self.check_interval)
+        # Optional checks per minute per chat, the budget covers one full cycle
+        per_minute = self.settings.max_checks_per_minute_per_chat
+        self.quota: Optional[CheckQuota] = None
+        if per_minute:
+            self.quota = CheckQuota(per_minute, burst=per_minute * max(1.0, self.check_interval / 60))
+        self.breaker = CircuitBreaker(
+            base_interval=self.check_interval,
+            threshold=self.settings.backoff_failure_threshold,
+            max_interval=self.settings.backoff_max_interval_minutes * 60
+        )
+        # Latency baselines deciding when an up website is 'degraded'
+        self.anomalies: Optional[AnomalyDetector] = None
+        if self.settings.degraded_sigma > 0:
+            self.anomalies = AnomalyDetector(self.settings.degraded_sigma, self.settings.degraded_checks)
+        # Set while profiling is enabled
+        self.profiler: Optional[CycleProfiler] = None
+        # Results of the running cycle, written together when it ends
+        self._pending: Optional[List[Tuple[Website, CheckResult]]] = None
+        # Chats whose cached pages are dropped once those results are written
+        self._stale_chats: Set[int] = set()
+        self._last_beat = 0.0
+        if self.settings.profiling:
+            self.enable_profiling()
+    
+    def enable_profiling(self) -> CycleProfiler:
+        """Start profiling check cycles"""
+        if self.profiler is None:
+            self.settings.data_dir.mkdir(parents=True, exist_ok=True)
+            self.profiler = CycleProfiler(self.settings.profile_file, top_n=self.settings.profile_top_n)
+            logger.info(f"Profiling enabled, writing to {self.settings.profile_file}")
+        return self.profiler
+    
+    def disable_profiling(self):
+        """Stop profiling check cycles"""
+        if self.profiler is not None:
+            self.profiler.close()
+            self.profiler = None
+            logger.info("Profiling disabled")
+    
+    def _stage(self, website_id: int, name: str):
+        """Time a check stage when profiling"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(website_id, name)
     
     async def start(self):
         """Start the monitoring scheduler"""
         self.running = True
-        logger.info(f"Monitor scheduler started (interval: {config.CHECK_INTERVAL_MINUTES} minutes)")
+        logger.info(f"Monitor scheduler started (interval: {self.settings.check_interval_minutes} minutes)")
         
         # Initial check
+        loop = asyncio.get_running_loop()
+        self.heartbeat(force=True)
+        next_full = loop.time() + self.check_interval
         await self.check_all_websites()
         
-        # Schedule periodic checks
+        # Schedule periodic checks, tcp:// monitors on every tick, everything every check_interval
         while self.running:
             try:
-                await asyncio.sleep(self.check_interval)
-                if self.running:
+                await self._sleep(min(self.tcp_interval, max(0.0, next_full - loop.time())))
+                if not self.running:
+                    break
+                if loop.time() >= next_full:
+                    next_full += self.check_interval
                     await self.check_all_websites()
+                else:
+                    await self.check_all_websites(tcp_only=True)
             except asyncio.CancelledError:
                 logger.info("Scheduler cancelled")
                 break
@@ -46,43 +119,207 @@ class MonitorScheduler:
         """Stop the monitoring scheduler"""
         self.running = False
         await self.checker.close()
+        self.disable_profiling()
         logger.info("Monitor scheduler stopped")
     
-    async def check_all_websites(self):
-        """Check all enabled websites"""
+    def heartbeat(self, force: bool = False):
+        """Touch the heartbeat file, at most every HEARTBEAT_INTERVAL seconds"""
+        path = self.settings.heartbeat_file
+        if path is None:
+            return
+        
+        now = time.monotonic()
+        if not force and now - self._last_beat < HEARTBEAT_INTERVAL:
+            return
+        self._last_beat = now
+        try:
+            path.touch()
+        except OSError as e:
+            logger.warning(f"Cannot touch heartbeat file {path}: {e}")
+    
+    async def _sleep(self, seconds: float):
+        """Sleep until the next cycle, beating meanwhile so the supervisor sees a live scheduler"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + seconds
+        while self.running:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, HEARTBEAT_INTERVAL))
+            self.heartbeat()
+    
+    async def check_all_websites(self, tcp_only: bool = False):
+        """Check all enabled websites, or only the tcp:// monitors"""
         try:
-            websites = self.db.get_all_websites()
+            websites = self.db.get_all_websites(url_prefix='tcp://' if tcp_only else None)
             if not websites:
                 logger.debug("No websites to check")
                 return
             
-            logger.info(f"Checking {len(websites)} websites...")
+            # Skip websites that are backed off after repeated failures
+            due = [website for website in websites if self.breaker.allow(website.id)]
+            skipped = len(websites) - len(due)
             
-            # Check all websites concurrently
-            tasks = [self.check_website(website) for website in websites]
-            await asyncio.gather(*tasks, return_exceptions=True)
+            over_quota = 0
+            # The quota budgets full cycles, tcp ticks between them are not charged
+            if self.quota is not None and not tcp_only:
+                # Least recently checked first, so sites left over are first next time
+                due.sort(key=lambda website: website.last_checked or datetime.min)
+                allowed = [website for website in due if self.quota.take(website.chat_id)]
+                over_quota = len(due) - len(allowed)
+                due = allowed
+            
+            logger.info(f"Checking {len(due)} websites ({skipped} backed off, {over_quota} over quota)...")
+            
+            # Profiles, lag reports and certificates cover full cycles only
+            profiler = self.profiler if not tcp_only else None
+            if profiler is not None:
+                profiler.begin_cycle()
+            
+            self._pending = []
+            try:
+                # Check all websites concurrently
+                tasks = [self.check_website(website) for website in due]
+                await asyncio.gather(*tasks, return_exceptions=True)
+            finally:
+                pending, self._pending = self._pending, None
+                try:
+                    with self._stage(None, 'persist'):
+                        self.record_checks(pending)
+                except Exception as e:
+                    logger.error(f"Error saving {len(pending)} check results: {e}", exc_info=True)
+                self._invalidate_stale()
+                if profiler is not None:
+                    profiler.end_cycle({website.id: website.url for website in due})
+            
+            if not tcp_only:
+                self._log_lag()
+                await self.check_certificates(due)
             
         except Exception as e:
             logger.error(f"Error checking websites: {e}", exc_info=True)
     
+    def _log_lag(self):
+        """Log the chats that waited longest for check slots"""
+        worst = self.fair.lag_report(top=3)
+        if not worst:
+            return
+        summary = ', '.join(f"chat {chat_id} p95 {lag['p95']:.1f}s" for chat_id, lag in worst)
+        logger.info(f"Check lag: {summary}", extra={'event': 'check_lag'})
+    
+    async def check_certificates(self, websites: List[Website]):
+        """Refresh certificates of HTTPS hosts not checked within cert_check_hours"""
+        period = self.settings.cert_check_hours * 3600
+        if not period:
+            return
+        
+        try:
+            hosts: Dict[Tuple[str, int], List[Website]] = {}
+            for website in websites:
+                parsed = urlparse(website.url)
+                if parsed.scheme == 'https' and parsed.hostname:
+                    hosts.setdefault((parsed.hostname.lower(), parsed.port or 443), []).append(website)
+            
+            cached = self.db.get_certificates(hosts)
+            now = datetime.now()
+            due = [
+                key for key in hosts
+                if key not in cached or (now - cached[key].checked_at).total_seconds() >= period
+            ]
+            if not due:
+                return
+            
+            logger.info(f"Checking TLS certificates of {len(due)} hosts")
+            certificates = await asyncio.gather(*(self._check_certificate(*key) for key in due))
+            
+            for key, certificate in zip(due, certificates):
+                previous = cached.get(key)
+                if certificate.not_after is None and previous is not None and previous.not_after is not None \
+                        and 'expired' not in (certificate.error or ''):
+                    # Keep the last readable certificate through connection failures
+                    certificate.not_after, certificate.issuer = previous.not_after, previous.issuer
+                
+                await self.alert_manager.send_certificate_alert(
+                    hosts[key], certificate, previous, self.settings.cert_warning_days
+                )
+                self.db.save_certificate(certificate)
+        
+        except Exception as e:
+            logger.error(f"Error checking certificates: {e}", exc_info=True)
+    
+    async def _check_certificate(self, host: str, port: int) -> Certificate:
+        async with self.fair.slot(None):
+            return await self.checker.check_certificate(host, port)
+    
     async def check_website(self, website: Website):
         """Check a single website"""
         try:
-            result = await self.checker.check(website)
+            async with self.fair.slot(website.chat_id):
+                with self._stage(website.id, 'check'):
+                    result = await self.checker.check(website)
+            backoff_changed = self.breaker.record(website.id, result.status)
+            self.heartbeat()
             
-            # Add to history
-            self.db.add_history(
-                website_id=website.id,
-                status=result.status,
-                response_time=result.response_time,
-                error_message=result.error_message
-            )
+            if self.anomalies is not None:
+                state = self.anomalies.observe(website.id, result.status, result.response_time, website.last_status)
+                if state == 'degraded':
+                    result.state = 'degraded'
+                    result.baseline = self.anomalies.baseline(website.id).typical
+            status = result.website_status
             
-            # Update website status
-            self.db.update_website_status(website.id, result.status)
+            if website.last_status is not None and status != website.last_status:
+                # Never sampled, unlike the checker's routine 'up' lines
+                logger.info(
+                    f"{website.url}: {website.last_status} -> {status}",
+                    extra={'event': 'transition', 'website_id': website.id, 'status': status}
+                )
+            
+            if backoff_changed or status != website.last_status:
+                self._stale_chats.add(website.chat_id)
+            
+            if self._pending is not None:
+                # Written with the rest of the cycle, pages are dropped after that write
+                self._pending.append((website, result))
+            else:
+                with self._stage(website.id, 'persist'):
+                    self.record_checks([(website, result)])
+                self._invalidate_stale()
             
             # Send alert if needed
-            await self.alert_manager.send_alert(website, result)
+            with self._stage(website.id, 'alert'):
+                await self.alert_manager.send_alert(website, result)
             
         except Exception as e:
             logger.error(f"Error checking {website.url}: {e}", exc_info=True)
+    
+    def _invalidate_stale(self):
+        """Drop cached pages of chats whose websites changed, once the change is written"""
+        stale, self._stale_chats = self._stale_chats, set()
+        if self.render_cache is not None:
+            for chat_id in stale:
+                self.render_cache.invalidate(chat_id)
+    
+    def record_checks(self, checks: List[Tuple[Website, CheckResult]]):
+        """Write history, statuses and incidents of check results in one transaction"""
+        if not checks:
+            return
+        
+        results = [
+            History(
+                id=None,
+                website_id=website.id,
+                status=result.status,
+                response_time=result.response_time,
+                error_message=result.error_message,
+                checked_at=result.checked_at
+            )
+            for website, result in checks
+        ]
+        # Open, extend or close incidents; routine 'up' checks skip it
+        incidents = [
+            history for (website, result), history in zip(checks, results)
+            if result.status == 'down' or website.last_status == 'down'
+        ]
+        # History keeps the check outcome, the website its 'degraded' state
+        states = {website.id: result.state for website, result in checks if result.state}
+        self.db.record_checks(results, incidents, states=states)
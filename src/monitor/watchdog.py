@@ -0,0 +1,147 @@
+# src/monitor/watchdog.py
+"""Event loop lag monitoring
+
+LoopLagMonitor runs a task that sleeps for a fixed interval and records how
+late it wakes up. That delay is the time any coroutine or callback waited
+for the loop, so it also skews every response_time measured meanwhile. In
+debug mode a watchdog thread additionally notices when the loop has not
+ticked for longer than the threshold and captures the loop thread's stack,
+naming the code that blocks it.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between lag probes
+PROBE_INTERVAL = 0.1
+
+# Lag samples kept for percentiles (~10 minutes at the probe interval)
+WINDOW = 6000
+
+# Stalls kept with their stacks
+MAX_STALLS = 20
+
+
+class LoopLagMonitor:
+    """Measure event loop scheduling lag and, in debug mode, catch blocking calls"""
+    
+    def __init__(self, interval: float = PROBE_INTERVAL, threshold: float = 0.1,
+                 debug: bool = False, window: int = WINDOW, report_interval: float = 300):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.report_interval = report_interval
+        self.samples: Deque[float] = deque(maxlen=window)
+        # Most recent stalls with the blocking stack, debug mode only
+        self.stalls: Deque[dict] = deque(maxlen=MAX_STALLS)
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._last_tick = time.monotonic()
+    
+    async def start(self):
+        """Start probing the running loop"""
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.create_task(self._probe())
+        
+        if self.debug:
+            # asyncio's own debug mode names slow callbacks and tasks
+            loop.set_debug(True)
+            loop.slow_callback_duration = self.threshold
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+            self._thread.start()
+        
+        mode = f", stall detection above {self.threshold * 1000:.0f} ms" if self.debug else ""
+        logger.info(f"Event loop lag monitor started (probe every {self.interval * 1000:.0f} ms{mode})")
+    
+    async def stop(self):
+        """Stop probing and leave asyncio debug mode"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            asyncio.get_running_loop().set_debug(False)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def percentiles(self) -> Dict[str, float]:
+        """Get lag p50/p95/p99/max in seconds over the window"""
+        if not self.samples:
+            return {}
+        
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            'samples': len(ordered),
+            'p50': ordered[round(last * 0.50)],
+            'p95': ordered[round(last * 0.95)],
+            'p99': ordered[round(last * 0.99)],
+            'max': ordered[last],
+        }
+    
+    def recent_stalls(self) -> List[dict]:
+        """Get captured stalls, newest first"""
+        return list(reversed(self.stalls))
+    
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        next_report = loop.time() + self.report_interval
+        
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self._last_tick = time.monotonic()
+            self.samples.append(max(0.0, now - expected))
+            
+            if now >= next_report:
+                next_report = now + self.report_interval
+                self._log_summary()
+    
+    def _log_summary(self):
+        stats = self.percentiles()
+        message = (
+            f"Event loop lag: p50 {stats['p50'] * 1000:.1f} ms, p95 {stats['p95'] * 1000:.1f} ms, "
+            f"p99 {stats['p99'] * 1000:.1f} ms, max {stats['max'] * 1000:.1f} ms"
+        )
+        if stats['p99'] > self.threshold:
+            logger.warning(message)
+        else:
+            logger.info(message)
+    
+    def _watch(self):
+        """Watchdog thread: capture the loop thread's stack during stalls"""
+        reported_tick = None
+        
+        while not self._stop.wait(self.threshold / 2):
+            tick = self._last_tick
+            # The probe is due one interval after its last tick
+            blocked = time.monotonic() - tick - self.interval
+            if blocked < self.threshold or tick == reported_tick:
+                continue
+            
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            
+            # Report each stall once, with the stack at the time it was noticed
+            reported_tick = tick
+            stack = ''.join(traceback.format_stack(frame))
+            self.stalls.append({'time': time.time(), 'blocked': blocked, 'stack': stack})
+            logger.warning(f"Event loop blocked for over {blocked * 1000:.0f} ms at:\n{stack}")
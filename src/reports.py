@@ -0,0 +1,142 @@
+# src/reports.py
+"""SLA reports computed from columnar history
+
+All statistics are computed for every website in one pass over the arrays
+returned by DatabaseRepository.get_history_arrays(): groups are contiguous
+runs of website_id, so per-site sums are np.add.reduceat/np.bincount and
+percentiles are read from one lexsort instead of looping over rows.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from src.bot.validators import DEFAULT_RANGE
+from src.database.codec import STATUS_UP
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class SiteReport:
+    """SLA figures of one website over a time range"""
+    website_id: int
+    checks: int
+    uptime: float                  # fraction of 'up' checks
+    p50: Optional[float]           # response time percentiles in seconds
+    p95: Optional[float]
+    p99: Optional[float]
+    outages: int                   # down periods, including an ongoing one
+    downtime: float                # seconds spent down
+    mttr: Optional[float]          # mean time to recovery in seconds
+    mtbf: Optional[float]          # mean time between failures in seconds
+
+
+def build_reports(db, website_ids: Iterable[int], period: timedelta = DEFAULT_RANGE,
+                  now: datetime = None) -> Dict[int, SiteReport]:
+    """Load history of websites and summarize it, keyed by website id"""
+    until = now or datetime.now()
+    history = db.get_history_arrays(website_ids, since=until - period, until=until)
+    return summarize(history)
+
+
+def summarize(history: np.ndarray) -> Dict[int, SiteReport]:
+    """Compute reports from history sorted by (website_id, checked_at)"""
+    n = len(history)
+    if n == 0:
+        return {}
+    
+    site = history['website_id']
+    timestamps = history['checked_at']
+    up = history['status'] == STATUS_UP
+    
+    # Group boundaries
+    first = np.empty(n, dtype=bool)
+    first[0] = True
+    np.not_equal(site[1:], site[:-1], out=first[1:])
+    starts = np.flatnonzero(first)
+    ends = np.append(starts[1:], n)
+    group = np.cumsum(first) - 1
+    groups = len(starts)
+    checks = ends - starts
+    
+    uptime = np.add.reduceat(up.astype(np.int64), starts) / checks
+    percentiles = _group_percentiles(history['response_time'], group, groups)
+    
+    # An outage starts at a down check preceded by an up check (or the range
+    # start) and ends at the next up check of the same website
+    prev_up = np.empty(n, dtype=bool)
+    prev_up[1:] = up[:-1]
+    prev_up[starts] = True
+    outage_starts = np.flatnonzero(~up & prev_up)
+    recoveries = np.append(np.flatnonzero(up & ~prev_up), n)
+    
+    outage_group = group[outage_starts]
+    group_end = ends[outage_group]
+    recovery = recoveries[np.searchsorted(recoveries, outage_starts)]
+    resolved = recovery < group_end
+    # Ongoing outages last until the latest check
+    end_index = np.where(resolved, recovery, group_end - 1)
+    durations = (timestamps[end_index] - timestamps[outage_starts]) / 1000
+    
+    outages = np.bincount(outage_group, minlength=groups)
+    downtime = np.bincount(outage_group, weights=durations, minlength=groups)
+    repaired = np.bincount(outage_group[resolved], minlength=groups)
+    repair_time = np.bincount(outage_group[resolved], weights=durations[resolved], minlength=groups)
+    span = (timestamps[ends - 1] - timestamps[starts]) / 1000
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mttr = np.where(repaired > 0, repair_time / repaired, np.nan)
+        mtbf = np.where(outages > 0, (span - downtime) / outages, np.nan)
+    
+    reports = {}
+    for i, website_id in enumerate(site[starts].tolist()):
+        reports[website_id] = SiteReport(
+            website_id=website_id,
+            checks=int(checks[i]),
+            uptime=float(uptime[i]),
+            p50=_optional(percentiles[0][i]),
+            p95=_optional(percentiles[1][i]),
+            p99=_optional(percentiles[2][i]),
+            outages=int(outages[i]),
+            downtime=float(downtime[i]),
+            mttr=_optional(mttr[i]),
+            mtbf=_optional(mtbf[i]),
+        )
+    return reports
+
+
+def _group_percentiles(latency: np.ndarray, group: np.ndarray, groups: int):
+    """Linear-interpolated percentiles of known latencies per group"""
+    known = ~np.isnan(latency)
+    values = latency[known]
+    value_group = group[known]
+    
+    if len(values) == 0:
+        empty = np.full(groups, np.nan)
+        return [empty for _ in PERCENTILES]
+    
+    # Sorted by group, then latency
+    order = np.lexsort((values, value_group))
+    values = values[order]
+    counts = np.bincount(value_group, minlength=groups)
+    offsets = np.cumsum(counts) - counts
+    last = len(values) - 1
+    
+    result = []
+    for q in PERCENTILES:
+        position = offsets + (counts - 1) * (q / 100)
+        lower = np.clip(np.floor(position).astype(np.int64), 0, last)
+        upper = np.clip(np.ceil(position).astype(np.int64), 0, last)
+        value = values[lower] + (values[upper] - values[lower]) * (position - np.floor(position))
+        result.append(np.where(counts > 0, value, np.nan))
+    return result
+
+
+def _optional(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
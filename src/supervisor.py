@@ -0,0 +1,186 @@
+# src/supervisor.py
+"""Process supervisor for the bot
+
+Supervisor runs the bot as a child process and restarts it with
+exponential backoff when it exits with an error or stops touching its
+heartbeat file. The child's stdout and stderr are handed a file
+descriptor of the log file opened with O_APPEND, so log lines go straight
+to disk without passing through the supervisor. The supervisor rotates
+that file by copy and truncate: the child keeps writing to the same
+descriptor, and O_APPEND puts its next write at the start of the
+truncated file.
+"""
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the child, its heartbeat and the log size
+POLL_INTERVAL = 1.0
+
+# Seconds a stopped child gets to exit before it is killed
+STOP_GRACE = 10.0
+
+
+def backoff_delay(failures: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Get seconds to wait before restart after consecutive failures"""
+    if failures <= 0:
+        return 0.0
+    return min(cap, base * 2 ** (failures - 1))
+
+
+def rotate_copytruncate(path: Path, backup_count: int):
+    """Rotate a file that writers keep open: shift backups, copy, truncate"""
+    path = Path(path)
+    if backup_count > 0:
+        for index in range(backup_count - 1, 0, -1):
+            source = path.with_name(f"{path.name}.{index}")
+            if source.exists():
+                os.replace(source, path.with_name(f"{path.name}.{index + 1}"))
+        shutil.copyfile(path, path.with_name(f"{path.name}.1"))
+    # Lines written between the copy and the truncate are lost, as with logrotate
+    with open(path, 'r+b') as f:
+        f.truncate(0)
+
+
+class Supervisor:
+    """Run a command, restarting it on crash or missed heartbeats"""
+    
+    def __init__(self, command: List[str], log_file, heartbeat_file, stall_timeout: float = 120,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0, stable_after: float = 60,
+                 poll_interval: float = POLL_INTERVAL, env: Mapping[str, str] = None, cwd=None):
+        self.command = command
+        self.log_file = Path(log_file)
+        self.heartbeat_file = Path(heartbeat_file)
+        self.stall_timeout = stall_timeout
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # A child that ran this long resets the backoff
+        self.stable_after = stable_after
+        self.poll_interval = poll_interval
+        self.env = dict(os.environ if env is None else env)
+        self.cwd = cwd
+        self.restarts = 0
+        self._stopping = False
+        self._proc: Optional[subprocess.Popen] = None
+    
+    def run(self) -> int:
+        """Supervise until stopped or the child exits cleanly"""
+        failures = 0
+        while not self._stopping:
+            started = time.monotonic()
+            returncode, reason = self.run_once()
+            if self._stopping:
+                break
+            if reason == 'exit' and returncode == 0:
+                logger.info("Bot exited cleanly, supervisor stopping")
+                return 0
+            
+            failures = 1 if time.monotonic() - started >= self.stable_after else failures + 1
+            delay = backoff_delay(failures, self.backoff_base, self.backoff_cap)
+            detail = f"exit code {returncode}" if reason == 'exit' else f"no heartbeat for {self.stall_timeout:.0f}s"
+            logger.warning(f"Bot {'crashed' if reason == 'exit' else 'stalled'} ({detail}), restarting in {delay:.0f}s")
+            
+            if self._wait(delay):
+                break
+            self.restarts += 1
+        return 0
+    
+    def run_once(self) -> Tuple[Optional[int], str]:
+        """Start the child and watch it, return its exit code and 'exit', 'stall' or 'stop'"""
+        proc = self._spawn()
+        spawned = time.monotonic()
+        try:
+            while True:
+                returncode = proc.poll()
+                if returncode is not None:
+                    return returncode, 'exit'
+                if self._stopping:
+                    return self._terminate(proc), 'stop'
+                
+                self._maybe_rotate()
+                
+                # Until the first beat, startup counts against the timeout
+                if time.monotonic() - max(spawned, self._last_beat()) > self.stall_timeout:
+                    return self._terminate(proc), 'stall'
+                
+                time.sleep(self.poll_interval)
+        finally:
+            self._proc = None
+    
+    def stop(self, signum=None, frame=None):
+        """Ask the supervisor to stop the child and return (signal handler)"""
+        if signum is not None:
+            logger.info(f"Received signal {signum}, stopping bot")
+        self._stopping = True
+    
+    def _spawn(self) -> subprocess.Popen:
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self.heartbeat_file.unlink()
+        except FileNotFoundError:
+            pass
+        
+        env = dict(self.env, HEARTBEAT_FILE=str(self.heartbeat_file), LOG_TO_FILE='false',
+                   LOG_JSON='true', PYTHONUNBUFFERED='1')
+        fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Own session so terminal signals reach only the supervisor
+            self._proc = subprocess.Popen(
+                self.command, stdin=subprocess.DEVNULL, stdout=fd, stderr=subprocess.STDOUT,
+                env=env, cwd=self.cwd, start_new_session=True
+            )
+        finally:
+            os.close(fd)
+        
+        logger.info(f"Started bot with PID {self._proc.pid}: {' '.join(self.command)}")
+        return self._proc
+    
+    def _terminate(self, proc: subprocess.Popen) -> Optional[int]:
+        """Stop the child's process group, killing it after STOP_GRACE seconds"""
+        self._signal(proc, signal.SIGTERM)
+        try:
+            return proc.wait(STOP_GRACE)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Bot did not exit within {STOP_GRACE:.0f}s, killing it")
+            self._signal(proc, signal.SIGKILL)
+            return proc.wait()
+    
+    def _signal(self, proc: subprocess.Popen, sig: int):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            pass
+    
+    def _last_beat(self) -> float:
+        """Get the last heartbeat on the monotonic clock, 0 before the first beat"""
+        try:
+            age = time.time() - self.heartbeat_file.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+        return time.monotonic() - max(0.0, age)
+    
+    def _maybe_rotate(self):
+        try:
+            size = self.log_file.stat().st_size
+        except FileNotFoundError:
+            return
+        if size >= self.max_bytes:
+            rotate_copytruncate(self.log_file, self.backup_count)
+            logger.info(f"Rotated {self.log_file} at {size} bytes")
+    
+    def _wait(self, seconds: float) -> bool:
+        """Sleep unless stopped meanwhile, return whether stopping"""
+        deadline = time.monotonic() + seconds
+        while not self._stopping and time.monotonic() < deadline:
+            time.sleep(max(0.0, min(self.poll_interval, deadline - time.monotonic())))
+        return self._stopping
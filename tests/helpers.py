@@ -0,0 +1,23 @@
+# tests/helpers.py
+"""Shared test data builders"""
+from datetime import datetime, timedelta
+from typing import List, Sequence
+
+from src.database import History
+
+
+def checks(website_id: int, statuses: Sequence[str], start: datetime = None,
+           step: timedelta = timedelta(minutes=1), latency: float = 0.1,
+           times: Sequence[datetime] = None) -> List[History]:
+    """History of one website with the given statuses
+    
+    Checks are every step from start, or at the given times. Failures
+    have no response time and a timeout error.
+    """
+    if times is None:
+        times = [start + step * i for i in range(len(statuses))]
+    return [
+        History(id=None, website_id=website_id, status=status, response_time=latency if status == 'up' else None,
+                error_message=None if status == 'up' else "Timeout", checked_at=checked_at)
+        for status, checked_at in zip(statuses, times)
+    ]
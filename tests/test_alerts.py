@@ -0,0 +1,73 @@
+# tests/test_alerts.py
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.database.models import Certificate, Website
+from src.monitor.alerts import AlertManager, expiry_threshold
+
+THRESHOLDS = (30, 14, 7, 1)
+
+
+def certificate(days: float = None, error: str = None, alerted_days: int = None) -> Certificate:
+    not_after = datetime.now() + timedelta(days=days) if days is not None else None
+    return Certificate(host="example.com", not_after=not_after, issuer="Test CA", error=error,
+                       alerted_days=alerted_days)
+
+
+class TestExpiryThreshold:
+    """Test expiry_threshold function"""
+    
+    def test_most_urgent_threshold_reached(self):
+        """Test days left map to the smallest threshold they are under"""
+        assert expiry_threshold(certificate(90), THRESHOLDS) is None
+        assert expiry_threshold(certificate(20), THRESHOLDS) == 30
+        assert expiry_threshold(certificate(5), THRESHOLDS) == 7
+        assert expiry_threshold(certificate(-1), THRESHOLDS) == 0
+    
+    def test_unreadable_certificate(self):
+        """Test only a rejected expired certificate counts as expired"""
+        assert expiry_threshold(certificate(error="certificate has expired"), THRESHOLDS) == 0
+        assert expiry_threshold(certificate(error="Connection refused"), THRESHOLDS) is None
+
+
+class TestCertificateAlerts:
+    """Test AlertManager certificate alerts"""
+    
+    @pytest.fixture
+    def manager(self):
+        bot = MagicMock()
+        bot.send_message = AsyncMock()
+        return AlertManager(bot, MagicMock())
+    
+    @pytest.mark.asyncio
+    async def test_each_threshold_sent_once_per_chat(self, manager):
+        """Test alerts go to every chat on the host once per threshold"""
+        websites = [
+            Website(id=1, chat_id=7, url="https://example.com"),
+            Website(id=2, chat_id=7, url="https://example.com/api"),
+            Website(id=3, chat_id=8, url="https://example.com"),
+        ]
+        
+        first = certificate(20)
+        assert await manager.send_certificate_alert(websites, first, None, THRESHOLDS)
+        assert first.alerted_days == 30
+        assert sorted(call.kwargs['chat_id'] for call in manager.bot.send_message.call_args_list) == [7, 8]
+        
+        # Same threshold next day: nothing new
+        second = certificate(19)
+        assert not await manager.send_certificate_alert(websites, second, first, THRESHOLDS)
+        
+        third = certificate(6)
+        assert await manager.send_certificate_alert(websites, third, second, THRESHOLDS)
+        assert "Expires in 5 days" in manager.bot.send_message.call_args.kwargs['text']
+    
+    @pytest.mark.asyncio
+    async def test_renewal_resets(self, manager):
+        """Test a renewed certificate clears the alerted threshold"""
+        websites = [Website(id=1, chat_id=7, url="https://example.com")]
+        renewed = certificate(90)
+        
+        assert not await manager.send_certificate_alert(websites, renewed, certificate(2, alerted_days=7), THRESHOLDS)
+        assert renewed.alerted_days is None
@@ -0,0 +1,149 @@
+# tests/test_anomaly.py
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import config
+from src.database import DatabaseRepository, History, MemoryRepository
+from src.monitor.alerts import AlertManager
+from src.monitor.anomaly import WARMUP, AnomalyDetector
+from src.monitor.checker import CheckResult
+from src.monitor.scheduler import MonitorScheduler
+
+
+def warm(detector, website_id=1, latency=0.2):
+    """Feed enough normal results for the baseline to be trusted"""
+    for i in range(WARMUP * 2):
+        # A little jitter so the variance is not zero
+        assert detector.observe(website_id, 'up', latency * (1.05 if i % 2 else 0.95)) == 'up'
+
+
+class TestAnomalyDetector:
+    """Test AnomalyDetector class"""
+    
+    def test_degraded_after_consecutive_slow_results(self):
+        """Test a site turns degraded only after `checks` slow results in a row"""
+        detector = AnomalyDetector(sigma=4.0, checks=3)
+        warm(detector)
+        
+        assert detector.observe(1, 'up', 3.0) == 'up'
+        assert detector.observe(1, 'up', 0.2) == 'up'
+        assert [detector.observe(1, 'up', 3.0) for _ in range(3)] == ['up', 'up', 'degraded']
+        assert detector.baseline(1).typical == pytest.approx(0.2, rel=0.2)
+    
+    def test_recovers_after_normal_results(self):
+        """Test a degraded site is up again after `checks` normal results"""
+        detector = AnomalyDetector(sigma=4.0, checks=2)
+        warm(detector)
+        for _ in range(2):
+            detector.observe(1, 'up', 3.0)
+        
+        assert [detector.observe(1, 'up', 0.2) for _ in range(2)] == ['degraded', 'up']
+    
+    def test_down_resets_state(self):
+        """Test a down result ends the degraded state and is not a latency sample"""
+        detector = AnomalyDetector(sigma=4.0, checks=1)
+        warm(detector)
+        assert detector.observe(1, 'up', 3.0) == 'degraded'
+        count = detector.baseline(1).count
+        
+        assert detector.observe(1, 'down', None) == 'down'
+        assert detector.baseline(1).count == count
+        assert detector.observe(1, 'up', 0.2) == 'up'
+    
+    def test_no_alarm_before_warmup_or_for_small_changes(self):
+        """Test new sites and modest slowdowns stay up"""
+        detector = AnomalyDetector(sigma=4.0, checks=1)
+        assert detector.observe(1, 'up', 0.2) == 'up'
+        assert detector.observe(1, 'up', 5.0) == 'up'
+        
+        warm(detector, website_id=2)
+        assert detector.observe(2, 'up', 0.3) == 'up'
+    
+    def test_keeps_stored_degraded_state_during_warmup(self):
+        """Test a site degraded before a restart stays degraded while its baseline is learned"""
+        detector = AnomalyDetector(sigma=4.0, checks=3)
+        
+        states = [detector.observe(1, 'up', 8.0, last_status='degraded') for _ in range(WARMUP)]
+        assert states == ['degraded'] * WARMUP
+        assert detector.observe(2, 'up', 8.0, last_status='up') == 'up'
+
+
+@pytest.mark.parametrize('backend', ['sqlite', 'memory'])
+def test_states_persist_degraded(backend, tmp_path):
+    """Test states override the stored website status but not history"""
+    db = DatabaseRepository(str(tmp_path / 'monitor.db')) if backend == 'sqlite' else MemoryRepository()
+    website = db.add_website(1, "https://a.example.com")
+    result = History(id=None, website_id=website.id, status='up', response_time=3.0,
+                     error_message=None, checked_at=datetime.now())
+    
+    db.record_checks([result], states={website.id: 'degraded'})
+    
+    assert db.get_website(website.id).last_status == 'degraded'
+    assert db.get_website_history(website.id)[0].status == 'up'
+    assert db.count_user_websites(1) == {'degraded': 1}
+
+
+class TestDegradedAlerts:
+    """Test degraded transitions through the scheduler and AlertManager"""
+    
+    @pytest.mark.asyncio
+    async def test_alerts_on_degraded_and_back(self, tmp_path):
+        """Test one alert when a site turns degraded and one when it is normal again"""
+        db = MemoryRepository()
+        website = db.add_website(1, "https://a.example.com")
+        bot = MagicMock()
+        bot.send_message = AsyncMock()
+        alert_manager = AlertManager(bot, db)
+        alert_manager.last_alert_status[website.id] = 'up'
+        
+        settings = config.Settings(data_dir=tmp_path, degraded_checks=2, cert_check_hours=0)
+        scheduler = MonitorScheduler(db, alert_manager, settings)
+        await scheduler.checker.close()
+        latencies = [0.2, 0.19, 0.21] * WARMUP + [3.0, 3.0, 3.0, 0.2, 0.2]
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(
+            side_effect=[CheckResult(website.id, website.url, 'up', response_time=t) for t in latencies]
+        )
+        
+        statuses = []
+        for _ in latencies:
+            await scheduler.check_website(db.get_website(website.id))
+            statuses.append(db.get_website(website.id).last_status)
+        
+        assert statuses[-5:] == ['up', 'degraded', 'degraded', 'degraded', 'up']
+        messages = [call.kwargs['text'] for call in bot.send_message.call_args_list]
+        assert len(messages) == 2
+        assert "Degraded" in messages[0] and "(usually 0.2" in messages[0]
+        assert "Back to Normal" in messages[1]
+        
+        reloaded = AlertManager(bot, db)
+        reloaded.load_previous_statuses()
+        assert reloaded.last_alert_status[website.id] == 'up'
+    
+    @pytest.mark.asyncio
+    async def test_restart_keeps_degraded_without_alert(self, tmp_path):
+        """Test a restart while degraded neither sends 'Back to Normal' nor clears the state"""
+        db = MemoryRepository()
+        website = db.add_website(1, "https://a.example.com")
+        result = History(id=None, website_id=website.id, status='up', response_time=8.0,
+                         error_message=None, checked_at=datetime.now())
+        db.record_checks([result], states={website.id: 'degraded'})
+        
+        bot = MagicMock()
+        bot.send_message = AsyncMock()
+        alert_manager = AlertManager(bot, db)
+        alert_manager.load_previous_statuses()
+        
+        settings = config.Settings(data_dir=tmp_path, degraded_checks=3, cert_check_hours=0)
+        scheduler = MonitorScheduler(db, alert_manager, settings)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(return_value=CheckResult(website.id, website.url, 'up', response_time=8.0))
+        
+        for _ in range(3):
+            await scheduler.check_website(db.get_website(website.id))
+        
+        assert db.get_website(website.id).last_status == 'degraded'
+        bot.send_message.assert_not_called()
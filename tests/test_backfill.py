@@ -0,0 +1,112 @@
+# tests/test_backfill.py
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.backfill import derive_incidents, run_backfill
+from src.cli import main as cli_main
+from src.database import DatabaseRepository
+from src.database.runs import RunHistoryStore, build_runs
+from tests.helpers import checks
+
+STEP = timedelta(minutes=2)
+
+
+@pytest.fixture
+def start():
+    return datetime.now().replace(microsecond=0) - timedelta(days=1)
+
+
+@pytest.fixture
+def db(tmp_path, start):
+    """Database with history of five websites and no incidents"""
+    db = DatabaseRepository(str(tmp_path / 'monitor.db'))
+    for i in range(5):
+        website = db.add_website(1, f"https://{i}.example.com")
+        db.record_checks(checks(website.id, ['up', 'down', 'down', 'up', 'down', 'up', 'up', 'down'], start, step=STEP))
+    return db
+
+
+class TestDerivations:
+    """Test derived rows computed from history"""
+    
+    def test_incidents(self, start):
+        """Test closed outages become incidents and an ongoing one is skipped"""
+        history = checks(1, ['up', 'down', 'down', 'up', 'down'], start, step=STEP)
+        
+        rows = list(derive_incidents(history))
+        
+        assert len(rows) == 1
+        website_id, started_at, ended_at, error_message, count = rows[0]
+        assert (website_id, error_message, count) == (1, "Timeout", 2)
+        assert ended_at - started_at == 4 * 60 * 1000
+    
+    def test_runs_match_write_path(self, tmp_path, start):
+        """Test runs built from history equal the ones written check by check"""
+        history = checks(1, ['up'] * 40 + ['down'] * 3 + ['up'] * 5, start, step=STEP)
+        store = RunHistoryStore(str(tmp_path / 'runs.db'))
+        store.add_many(history)
+        with store._get_connection() as conn:
+            written = conn.execute(
+                'SELECT website_id, status, error_message, started_at, ended_at, checks, '
+                'latency_min, latency_max, latency_sum, latency_checks FROM history_runs ORDER BY id'
+            ).fetchall()
+        
+        assert list(build_runs(history)) == written
+
+
+class TestBackfill:
+    """Test run_backfill"""
+    
+    def test_rebuilds_incidents(self, db):
+        """Test incidents are derived for every website, leaving ongoing ones"""
+        out = io.StringIO()
+        
+        stats = run_backfill(db.db_path, 'incidents', workers=1, partition_size=2, batch_size=1, out=out)
+        
+        assert (stats.websites, stats.history_rows, stats.derived_rows) == (5, 40, 10)
+        assert out.getvalue().count("rows/s") == 3
+        incidents = db.get_incidents([1], limit=10)
+        assert [incident.checks for incident in incidents] == [1, 2]
+        assert db.get_incident_stats([1])['downtime'] == 360.0
+    
+    def test_resumes_from_checkpoints(self, db):
+        """Test finished websites are skipped unless restarted, without duplicating rows"""
+        run_backfill(db.db_path, 'incidents', workers=1, out=io.StringIO())
+        with db._get_connection() as conn:
+            conn.execute("DELETE FROM backfill_progress WHERE website_id > 3")
+        
+        stats = run_backfill(db.db_path, 'incidents', workers=1, out=io.StringIO())
+        
+        assert (stats.websites, stats.skipped) == (2, 3)
+        assert len(db.get_incidents([4, 5], limit=10)) == 4
+        
+        stats = run_backfill(db.db_path, 'incidents', workers=1, restart=True, out=io.StringIO())
+        assert (stats.websites, stats.skipped) == (5, 0)
+        assert db.get_incident_stats(range(1, 6))['incidents'] == 10
+    
+    def test_process_pool_from_cli(self, db, capsys):
+        """Test the CLI backfills runs with several worker processes"""
+        assert cli_main(['--db', db.db_path, 'backfill', 'runs', '--workers', '2', '--partition-size', '2']) == 0
+        
+        assert "Backfilled runs for 5 websites" in capsys.readouterr().err
+        runs = RunHistoryStore(db.db_path)
+        assert [run.checks for run in runs.get_runs(1)] == [1, 2, 1, 1, 2, 1]
+        assert len(runs.get_website_history(1)) == 8
+    
+    def test_runs_use_configured_sample_interval(self, tmp_path, start, monkeypatch, capsys):
+        """Test the CLI splits runs at RUN_SAMPLE_MINUTES like the live store"""
+        monkeypatch.setenv('RUN_SAMPLE_MINUTES', '10')
+        db = DatabaseRepository(str(tmp_path / 'monitor.db'))
+        website = db.add_website(1, "https://example.com")
+        history = checks(website.id, ['up'] * 90, start, step=STEP)
+        db.record_checks(history)
+        live = RunHistoryStore(str(tmp_path / 'live.db'), sample_interval=600)
+        live.add_many(history)
+        
+        assert cli_main(['--db', db.db_path, 'backfill', 'runs', '--workers', '1']) == 0
+        
+        backfilled = RunHistoryStore(db.db_path).get_runs(website.id, limit=100)
+        assert len(backfilled) == 18
+        assert [run.checks for run in backfilled] == [run.checks for run in live.get_runs(website.id, limit=100)]
@@ -0,0 +1,183 @@
+# tests/test_bot.py
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from src.bot.cache import RenderCache
+from src.bot.handlers import invalidate_pages, remove_command, render_page
+from src.bot.keyboard import get_page_keyboard
+from src.bot.views import PAGE_SIZE, render_incidents, render_list_page, render_status_page
+from src.database import Incident, MemoryRepository, Website, WebsitePage
+from src.monitor.circuit import CircuitBreaker
+
+
+def make_page(count: int, has_prev: bool = False, has_next: bool = False, url_length: int = 20) -> WebsitePage:
+    """Build a page of websites with long URLs"""
+    websites = [
+        Website(id=100 - i, chat_id=1, url=f"https://{'x' * url_length}{i}.com/?a=1&b=2", last_status="up")
+        for i in range(count)
+    ]
+    return WebsitePage(websites=websites, has_prev=has_prev, has_next=has_next)
+
+
+class TestViews:
+    """Test page rendering"""
+    
+    def test_list_page_is_bounded(self):
+        """Test a full page of very long URLs fits in one message"""
+        page = make_page(PAGE_SIZE, has_next=True, url_length=2000)
+        
+        text = render_list_page(page, page_no=3, total=500)
+        
+        assert len(text) < 4096
+        assert "21. 🟢" in text  # numbering continues from previous pages
+        assert "Page 3/50" in text
+    
+    def test_urls_are_escaped(self):
+        """Test URLs cannot break HTML parse mode"""
+        text = render_list_page(make_page(1), page_no=1, total=1)
+        
+        assert "?a=1&amp;b=2" in text
+        assert "Page" not in text
+    
+    def test_status_page_summary(self):
+        """Test status summary uses totals, not the page"""
+        page = make_page(3)
+        
+        text = render_status_page(page, page_no=1, counts={"up": 40, "down": 2, None: 1}, backed_off=2)
+        
+        assert "<b>Summary:</b> 40 up, 2 down, 2 backed off" in text
+        assert "Page 1/5" in text
+        assert len(text) < 4096
+    
+    def test_incidents(self):
+        """Test ongoing and resolved incidents are rendered with errors escaped"""
+        incidents = [
+            Incident(id=2, website_id=1, started_at=datetime(2024, 3, 1, 12, 0), checks=3,
+                     error_message="HTTP <503>"),
+            Incident(id=1, website_id=2, started_at=datetime(2024, 2, 1, 8, 0),
+                     ended_at=datetime(2024, 2, 1, 8, 15)),
+        ]
+        stats = {'incidents': 2, 'ongoing': 1, 'downtime': 900.0, 'mttr': 900.0}
+        
+        text = render_incidents(incidents, {1: "https://a.com", 2: "https://b.com"}, stats, "2 websites",
+                                {"HTTP 5xx": 3, "Timeout": 1})
+        
+        assert "Failed checks: HTTP 5xx 3 · Timeout 1" in text
+        assert "Ongoing</b> since 03/01 12:00" in text
+        assert "02/01 08:00 → 02/01 08:15 (15m)" in text
+        assert "HTTP &lt;503&gt;" in text
+        assert "MTTR 15m" in text
+
+
+class TestPageKeyboard:
+    """Test pagination keyboard"""
+    
+    def test_buttons_carry_cursors(self):
+        """Test prev/next callback data holds keyset cursors"""
+        page = make_page(PAGE_SIZE, has_prev=True, has_next=True)
+        
+        keyboard = get_page_keyboard("status", page, page_no=2)
+        buttons = keyboard.inline_keyboard[0]
+        
+        assert [b.callback_data for b in buttons] == ["status:prev:100:1", "status:next:91:3"]
+        assert all(len(b.callback_data.encode()) <= 64 for b in buttons)
+    
+    def test_single_page_has_no_keyboard(self):
+        """Test no keyboard when everything fits on one page"""
+        assert get_page_keyboard("list", make_page(3), page_no=1) is None
+
+
+class TestRenderCache:
+    """Test RenderCache class"""
+    
+    def test_hit_miss_and_invalidate(self):
+        """Test counters and per-chat invalidation"""
+        cache = RenderCache()
+        
+        assert cache.get(1, "status") is None
+        cache.put(1, "status", "page-1")
+        cache.put(2, "status", "page-2")
+        
+        assert cache.get(1, "status") == "page-1"
+        cache.invalidate(1)
+        
+        assert cache.get(1, "status") is None
+        assert cache.get(2, "status") == "page-2"
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 2
+        assert cache.stats()["invalidations"] == 1
+    
+    def test_lru_eviction(self):
+        """Test least recently used entry is evicted"""
+        cache = RenderCache(max_entries=2)
+        cache.put(1, "a", 1)
+        cache.put(1, "b", 2)
+        cache.get(1, "a")
+        cache.put(1, "c", 3)
+        
+        assert cache.get(1, "b") is None
+        assert cache.get(1, "a") == 1
+        assert cache.get(1, "c") == 3
+    
+    def test_ttl(self):
+        """Test entries expire after ttl"""
+        now = [0.0]
+        cache = RenderCache(ttl=120, clock=lambda: now[0])
+        cache.put(1, "list", "page")
+        
+        now[0] = 119
+        assert cache.get(1, "list") == "page"
+        now[0] = 120
+        assert cache.get(1, "list") is None
+    
+    def test_render_page_uses_cache(self):
+        """Test second render is served without querying the database"""
+        db = MagicMock()
+        db.get_user_websites_page.return_value = make_page(3)
+        db.count_user_websites.return_value = {"up": 3}
+        context = SimpleNamespace(bot_data={'db': db, 'render_cache': RenderCache()})
+        
+        first = render_page(context, 1, 'status')
+        second = render_page(context, 1, 'status')
+        
+        assert first == second
+        assert db.get_user_websites_page.call_count == 1
+        
+        invalidate_pages(context, 1)
+        render_page(context, 1, 'status')
+        assert db.get_user_websites_page.call_count == 2
+    
+    def test_backed_off_count_covers_whole_chat(self):
+        """Test the summary counts backed-off websites of every page of the chat"""
+        db = MemoryRepository()
+        websites = [db.add_website(1, f"https://{i}.example.com") for i in range(PAGE_SIZE + 2)]
+        other = db.add_website(2, "https://other.example.com")
+        breaker = CircuitBreaker(base_interval=60, threshold=1)
+        for website_id in (websites[0].id, websites[-1].id, other.id):
+            breaker.record(website_id, 'down')
+        context = SimpleNamespace(bot_data={'db': db, 'scheduler': SimpleNamespace(breaker=breaker)})
+        
+        text, _ = render_page(context, 1, 'status')
+        
+        assert ", 2 backed off" in text
+        assert text.count("Backed off:") == 1
+    
+    @pytest.mark.asyncio
+    async def test_remove_forgets_backoff(self):
+        """Test removing a website drops its circuit breaker state"""
+        db = MemoryRepository()
+        website = db.add_website(1, "https://example.com")
+        breaker = CircuitBreaker(base_interval=60, threshold=1)
+        breaker.record(website.id, 'down')
+        context = SimpleNamespace(args=[website.url], bot_data={
+            'db': db, 'render_cache': RenderCache(), 'scheduler': SimpleNamespace(breaker=breaker)
+        })
+        update = SimpleNamespace(effective_chat=SimpleNamespace(id=1), message=MagicMock(reply_text=AsyncMock()))
+        
+        await remove_command(update, context)
+        
+        assert db.get_website_by_url(1, website.url) is None
+        assert breaker.failures(website.id) == 0
+        assert breaker.allow(website.id)
@@ -0,0 +1,127 @@
+# tests/test_bulk.py
+import io
+import json
+import os
+import tempfile
+
+import pytest
+
+from src.bot.validators import is_valid_url, parse_url_list
+from src.cli import main as cli_main
+from src.database import DatabaseRepository
+from src.exports import HISTORY_WRITERS, write_websites_csv
+
+
+class TestParseUrlList:
+    """Test URL list parsing"""
+    
+    def test_newline_list(self):
+        """Test plain list with blanks, comments and duplicates"""
+        lines = [
+            "https://a.example.com\n",
+            "\n",
+            "# comment\n",
+            "https://b.example.com\n",
+            "https://a.example.com\n",
+            "not-a-url\n",
+        ]
+        
+        valid, invalid = parse_url_list(lines)
+        
+        assert valid == ["https://a.example.com", "https://b.example.com"]
+        assert invalid == ["not-a-url"]
+    
+    def test_csv_with_header(self):
+        """Test URL is taken from the first CSV column"""
+        text = "url,name\nhttps://a.example.com,Site A\n\"https://b.example.com/?q=1,2\",B\n"
+        
+        valid, invalid = parse_url_list(io.StringIO(text, newline=''))
+        
+        assert valid == ["https://a.example.com", "https://b.example.com/?q=1,2"]
+        assert invalid == []
+    
+    def test_is_valid_url(self):
+        """Test URL validation"""
+        assert is_valid_url("https://example.com")
+        assert is_valid_url("http://localhost:8080/health")
+        assert not is_valid_url("ftp://example.com")
+        assert not is_valid_url("example.com")
+    
+    def test_is_valid_tcp_url(self):
+        """Test tcp://host:port monitors need a port in range"""
+        assert is_valid_url("tcp://db.example.com:5432")
+        assert is_valid_url("tcp://127.0.0.1:25?banner=220")
+        assert not is_valid_url("tcp://db.example.com")
+        assert not is_valid_url("tcp://db.example.com:70000")
+
+
+class TestBulkRepository:
+    """Test bulk repository operations"""
+    
+    @pytest.fixture
+    def db_path(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        yield path
+        os.unlink(path)
+    
+    @pytest.fixture
+    def db(self, db_path):
+        return DatabaseRepository(db_path)
+    
+    def test_add_websites_skips_existing(self, db):
+        """Test bulk insert counts only new websites"""
+        db.add_website(1, "https://a.example.com")
+        
+        added = db.add_websites(1, ["https://a.example.com", "https://b.example.com", "https://c.example.com"])
+        
+        assert added == 2
+        assert db.get_user(1) is not None
+        assert len(db.get_user_websites(1)) == 3
+    
+    def test_export_round_trip(self, db):
+        """Test exported CSV imports back to the same URLs"""
+        urls = [f"https://site{i}.example.com" for i in range(1200)]
+        db.add_websites(1, urls)
+        
+        out = io.StringIO(newline='')
+        count = write_websites_csv(db.iter_user_websites(1, batch_size=100), out)
+        
+        out.seek(0)
+        valid, invalid = parse_url_list(out)
+        
+        assert count == 1200
+        assert valid == urls
+        assert invalid == []
+    
+    def test_cli_import_export(self, db_path, tmp_path, capsys):
+        """Test import-sites and export-sites commands"""
+        source = tmp_path / "urls.txt"
+        source.write_text("https://a.example.com\nhttps://b.example.com\nbad\n")
+        target = tmp_path / "out.csv"
+        
+        assert cli_main(['--db', db_path, 'import-sites', '--chat-id', '7', str(source)]) == 0
+        assert "Added 2 websites" in capsys.readouterr().out
+        
+        assert cli_main(['--db', db_path, 'export-sites', '--chat-id', '7', '-o', str(target)]) == 0
+        assert target.read_text().splitlines()[1:] == [
+            "https://a.example.com,https://a.example.com,1,,",
+            "https://b.example.com,https://b.example.com,1,,",
+        ]
+    
+    def test_history_export_formats(self, db):
+        """Test history streams into CSV and NDJSON"""
+        website = db.add_website(1, "https://a.example.com")
+        db.add_history(website.id, "up", 0.25)
+        db.add_history(website.id, "down", None, "Timeout after 10s")
+        
+        csv_out = io.StringIO(newline='')
+        ndjson_out = io.StringIO()
+        
+        assert HISTORY_WRITERS['csv'](db.iter_website_history(website.id, chunk_size=1), csv_out) == 2
+        assert HISTORY_WRITERS['ndjson'](db.iter_website_history(website.id, chunk_size=1), ndjson_out) == 2
+        
+        rows = [json.loads(line) for line in ndjson_out.getvalue().splitlines()]
+        assert [r['status'] for r in rows] == ['up', 'down']
+        assert rows[1]['error_message'] == "Timeout after 10s"
+        assert csv_out.getvalue().splitlines()[0] == "checked_at,status,response_time,error_message"
@@ -1,6 +1,11 @@
 # tests/test_checker.py
 import pytest
+import pytest_asyncio
 import asyncio
+import shutil
+import socket
+import ssl
+import subprocess
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from src.monitor.checker import WebsiteChecker, CheckResult
@@ -85,3 +90,111 @@ class TestCheckResult:
         assert result.website_id == 1
         assert result.status == "up"
         assert result.response_time == 0.5
+
+
+class TestTcpCheck:
+    """Test tcp://host:port checks against a local server"""
+    
+    @pytest_asyncio.fixture
+    async def server(self):
+        async def handle(reader, writer):
+            writer.write(b"220 mail.example.com ESMTP ready\r\n")
+            await writer.drain()
+            writer.close()
+        
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        yield server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+    
+    @pytest.mark.asyncio
+    async def test_open_port_is_up(self, server):
+        """Test a bare connect is enough without a banner"""
+        checker = WebsiteChecker(timeout=5)
+        result = await checker.check(Website(id=1, chat_id=1, url=f"tcp://127.0.0.1:{server}"))
+        await checker.close()
+        
+        assert result.status == 'up'
+        assert result.response_time is not None
+        assert result.status_code is None
+    
+    @pytest.mark.asyncio
+    async def test_banner_must_match(self, server):
+        """Test the banner read decides the status when asked for"""
+        checker = WebsiteChecker(timeout=5)
+        up = await checker.check(Website(id=1, chat_id=1, url=f"tcp://127.0.0.1:{server}?banner=ESMTP"))
+        down = await checker.check(Website(id=2, chat_id=1, url=f"tcp://127.0.0.1:{server}?banner=SSH-2.0"))
+        await checker.close()
+        
+        assert up.status == 'up'
+        assert down.status == 'down'
+        assert '220 mail.example.com' in down.error_message
+    
+    @pytest.mark.asyncio
+    async def test_closed_port_is_down(self):
+        """Test a refused connection is reported down"""
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        
+        checker = WebsiteChecker(timeout=5)
+        result = await checker.check(Website(id=1, chat_id=1, url=f"tcp://127.0.0.1:{port}"))
+        await checker.close()
+        
+        assert result.status == 'down'
+        assert result.error_message
+
+
+class TestCertificateCheck:
+    """Test certificate checks against a local TLS server"""
+    
+    @pytest.fixture
+    def certificate(self, tmp_path):
+        """Self-signed certificate for localhost valid for 10 days"""
+        if shutil.which('openssl') is None:
+            pytest.skip("openssl not available")
+        cert, key = tmp_path / 'cert.pem', tmp_path / 'key.pem'
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', str(key), '-out', str(cert),
+             '-days', '10', '-subj', '/O=Test Org/CN=localhost', '-addext', 'subjectAltName=DNS:localhost'],
+            check=True, capture_output=True
+        )
+        return cert, key
+    
+    @pytest_asyncio.fixture
+    async def server(self, certificate):
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(*certificate)
+        
+        async def handle(reader, writer):
+            writer.close()
+        
+        server = await asyncio.start_server(handle, '127.0.0.1', 0, ssl=context)
+        yield server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+    
+    @pytest.mark.asyncio
+    async def test_reads_expiry_and_issuer(self, certificate, server):
+        """Test a trusted certificate's expiry and issuer are read"""
+        checker = WebsiteChecker(timeout=5)
+        checker._ssl_context = ssl.create_default_context(cafile=str(certificate[0]))
+        
+        result = await checker.check_certificate('localhost', server)
+        await checker.close()
+        
+        assert result.error is None
+        assert result.issuer == 'Test Org'
+        assert 9 < result.days_left() <= 10
+    
+    @pytest.mark.asyncio
+    async def test_untrusted_certificate_is_an_error(self, server):
+        """Test a rejected certificate is reported with the verification error"""
+        checker = WebsiteChecker(timeout=5)
+        
+        result = await checker.check_certificate('localhost', server)
+        await checker.close()
+        
+        assert result.not_after is None
+        assert 'self' in result.error.lower()
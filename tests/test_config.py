@@ -0,0 +1,115 @@
+# tests/test_config.py
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import config
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestSettings:
+    """Test Settings loading"""
+    
+    def test_defaults_without_token(self):
+        """Test settings load without a bot token"""
+        settings = config.Settings.from_env({})
+        
+        assert settings.telegram_bot_token is None
+        assert settings.check_interval_minutes == 2
+        assert settings.request_timeout_seconds == 10
+        assert settings.database_path == config.DATA_DIR / 'monitor.db'
+    
+    def test_from_env(self, tmp_path):
+        """Test values are read from the environment mapping"""
+        settings = config.Settings.from_env({
+            'TELEGRAM_BOT_TOKEN': 'token',
+            'CHECK_INTERVAL_MINUTES': '5',
+            'DATA_DIR': str(tmp_path),
+        })
+        
+        assert settings.require_token() == 'token'
+        assert settings.check_interval_minutes == 5
+        assert settings.database_path == tmp_path / 'monitor.db'
+    
+    def test_profiling_and_admin(self):
+        """Test profiling flag and admin user parsing"""
+        settings = config.Settings.from_env({'PROFILING': 'true', 'TELEGRAM_USER_ID': '42'})
+        
+        assert settings.profiling is True
+        assert config.Settings.from_env({'PROFILING': '0'}).profiling is False
+        assert settings.is_admin(42)
+        assert not settings.is_admin(7)
+        assert not config.Settings.from_env({}).is_admin(42)
+    
+    def test_supervised_child(self, tmp_path):
+        """Test the variables the supervisor sets for its child"""
+        settings = config.Settings.from_env({'LOG_TO_FILE': 'false', 'HEARTBEAT_FILE': str(tmp_path / 'beat')})
+        
+        assert settings.log_to_file is False
+        assert settings.heartbeat_file == tmp_path / 'beat'
+        assert config.Settings.from_env({}).log_to_file is True
+        assert config.Settings.from_env({}).heartbeat_file is None
+    
+    def test_chat_weights_and_quotas(self):
+        """Test per-chat weights and quotas, unlimited by default"""
+        settings = config.Settings.from_env({'CHAT_WEIGHTS': '42:2, 7:0.5', 'MAX_SITES_PER_CHAT': '100'})
+        
+        assert settings.chat_weights == {42: 2.0, 7: 0.5}
+        assert settings.max_sites_per_chat == 100
+        assert settings.max_checks_per_minute_per_chat == 0
+        with pytest.raises(ValueError):
+            config.Settings.from_env({'CHAT_WEIGHTS': '42:0'})
+    
+    def test_require_token(self):
+        """Test missing token only fails when it is required"""
+        settings = config.Settings.from_env({})
+        
+        with pytest.raises(ValueError):
+            settings.require_token()
+
+
+class TestImports:
+    """Test importing the core layers has no side effects"""
+    
+    def test_import_is_side_effect_free(self, tmp_path):
+        """Test imports load no heavy modules and create no files"""
+        code = (
+            "import sys, json, logging\n"
+            "import config, src.database, src.monitor\n"
+            "heavy = [m for m in ('telegram', 'httpx', 'dotenv') if m in sys.modules]\n"
+            "print(json.dumps({'heavy': heavy, 'handlers': len(logging.getLogger().handlers)}))\n"
+        )
+        env = {k: v for k, v in os.environ.items() if k != 'TELEGRAM_BOT_TOKEN'}
+        env['DATA_DIR'] = str(tmp_path / 'data')
+        
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=PROJECT_ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        result = json.loads(output)
+        
+        assert result == {'heavy': [], 'handlers': 0}
+        assert not (tmp_path / 'data').exists()
+    
+    def test_handlers_do_not_load_numpy(self):
+        """Test numpy is only imported by the commands that need it"""
+        code = "import sys\nimport src.bot.handlers\nprint('numpy' in sys.modules)\n"
+        
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        
+        assert output.strip() == 'False'
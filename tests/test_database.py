@@ -1,10 +1,12 @@
 # tests/test_database.py
 import pytest
 import os
+import sqlite3
 import tempfile
 from datetime import datetime
 
-from src.database import DatabaseRepository, User, Website, History
+from src.database import Certificate, DatabaseRepository, User, Website, History
+from src.database.schema import SCHEMA_VERSION
 
 
 class TestDatabaseRepository:
@@ -135,3 +137,229 @@ class TestDatabaseRepository:
         db.add_history(website.id, "down", None, "Connection error")
         last = db.get_website_last_status(website.id)
         assert last == "down"
+    
+    def test_iter_website_history(self, db):
+        """Test chunked history streaming with equal timestamps"""
+        website = db.add_website(12345, "https://example.com")
+        other = db.add_website(12345, "https://other.com")
+        
+        # Equal timestamps must not be skipped or repeated across chunk edges
+        base = int(datetime(2024, 1, 1).timestamp() * 1000)
+        with db._get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO history (website_id, status, response_time, checked_at) VALUES (?, 1, ?, ?)',
+                [(website.id, i / 100, base + (i // 3) * 1000) for i in range(25)]
+            )
+            conn.execute(
+                'INSERT INTO history (website_id, status, checked_at) VALUES (?, 0, ?)',
+                (other.id, base + 5000)
+            )
+        
+        streamed = list(db.iter_website_history(website.id, chunk_size=4))
+        
+        assert len(streamed) == 25
+        assert [h.response_time for h in streamed] == [i / 100 for i in range(25)]
+        assert all(h.website_id == website.id for h in streamed)
+        
+        # Time range filters
+        ranged = list(db.iter_website_history(
+            website.id, since=datetime(2024, 1, 1, 0, 0, 2), until=datetime(2024, 1, 1, 0, 0, 4), chunk_size=2
+        ))
+        assert len(ranged) == 6
+    
+    def test_websites_page(self, db):
+        """Test keyset pagination of a user's websites"""
+        chat_id = 12345
+        db.add_websites(chat_id, [f"https://site{i}.com" for i in range(25)])
+        db.add_website(999, "https://other.com")
+        
+        first = db.get_user_websites_page(chat_id, limit=10)
+        second = db.get_user_websites_page(chat_id, after_id=first.last_id, limit=10)
+        third = db.get_user_websites_page(chat_id, after_id=second.last_id, limit=10)
+        
+        assert [w.url for w in first.websites] == [f"https://site{i}.com" for i in range(24, 14, -1)]
+        assert (first.has_prev, first.has_next) == (False, True)
+        assert (second.has_prev, second.has_next) == (True, True)
+        assert len(third.websites) == 5
+        assert (third.has_prev, third.has_next) == (True, False)
+        
+        # Going back returns the same page as going forward
+        back = db.get_user_websites_page(chat_id, before_id=third.first_id, limit=10)
+        assert back.websites == second.websites
+        assert (back.has_prev, back.has_next) == (True, True)
+        
+        back = db.get_user_websites_page(chat_id, before_id=second.first_id, limit=10)
+        assert back.websites == first.websites
+        assert back.has_prev is False
+    
+    def test_count_user_websites(self, db):
+        """Test counting websites by status"""
+        chat_id = 12345
+        up = db.add_website(chat_id, "https://up.com")
+        down = db.add_website(chat_id, "https://down.com")
+        db.add_website(chat_id, "https://new.com")
+        db.update_website_status(up.id, "up")
+        db.update_website_status(down.id, "down")
+        
+        assert db.count_user_websites(chat_id) == {"up": 1, "down": 1, None: 1}
+    
+    def test_migrate_legacy_database(self):
+        """Test text timestamps and statuses are converted in place"""
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(path)
+            conn.executescript('''
+                CREATE TABLE users (chat_id INTEGER PRIMARY KEY, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+                CREATE TABLE websites (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER NOT NULL, url TEXT NOT NULL,
+                    name TEXT, enabled INTEGER DEFAULT 1, last_status TEXT, last_checked TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(chat_id, url)
+                );
+                CREATE TABLE history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, website_id INTEGER NOT NULL, status TEXT NOT NULL,
+                    response_time REAL, error_message TEXT, checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                INSERT INTO users (chat_id) VALUES (12345);
+                INSERT INTO websites (chat_id, url, last_status, last_checked)
+                    VALUES (12345, 'https://example.com', 'down', '2024-03-01 12:30:00.250000');
+                INSERT INTO history (website_id, status, response_time, checked_at)
+                    VALUES (1, 'up', 0.5, '2024-03-01 12:28:00.000000');
+                INSERT INTO history (website_id, status, error_message, checked_at)
+                    VALUES (1, 'down', 'Timeout', '2024-03-01 12:30:00.250000');
+            ''')
+            conn.commit()
+            conn.close()
+            
+            db = DatabaseRepository(path)
+            website = db.get_website(1)
+            assert website.last_status == "down"
+            assert website.last_checked == datetime(2024, 3, 1, 12, 30, 0, 250000)
+            assert isinstance(website.created_at, datetime)
+            
+            history = db.get_website_history(1)
+            assert [h.status for h in history] == ["down", "up"]
+            assert history[1].checked_at == datetime(2024, 3, 1, 12, 28)
+            assert db.get_user(12345) is not None
+            
+            with db._get_connection() as conn:
+                assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+                assert conn.execute('SELECT typeof(checked_at), typeof(status) FROM history').fetchone() == ('integer', 'integer')
+            
+            # Incidents are derived from the migrated history
+            incident = db.get_open_incident(1)
+            assert incident.started_at == datetime(2024, 3, 1, 12, 30, 0, 250000)
+            assert incident.error_message == "Timeout"
+            
+            # Opening again is a no-op
+            assert DatabaseRepository(path).get_website(1) == website
+        finally:
+            os.unlink(path)
+
+    def test_migrate_error_messages(self):
+        """Test a version 3 history moves its error texts into the dictionary"""
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(path)
+            conn.executescript('''
+                CREATE TABLE history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, website_id INTEGER NOT NULL, status INTEGER NOT NULL,
+                    response_time REAL, error_message TEXT, checked_at INTEGER NOT NULL
+                );
+                INSERT INTO history (website_id, status, error_message, checked_at) VALUES (1, 0, 'HTTP 502', 1000);
+                INSERT INTO history (website_id, status, error_message, checked_at) VALUES (1, 0, 'HTTP 502', 2000);
+                INSERT INTO history (website_id, status, response_time, checked_at) VALUES (1, 1, 0.5, 3000);
+                PRAGMA user_version = 3;
+            ''')
+            conn.commit()
+            conn.close()
+            
+            db = DatabaseRepository(path)
+            
+            assert [h.error_message for h in db.get_website_history(1)] == [None, "HTTP 502", "HTTP 502"]
+            assert db.get_error_counts([1]) == {"HTTP 5xx": 2}
+            with db._get_connection() as conn:
+                assert conn.execute('SELECT message, code FROM error_messages').fetchall() == [("HTTP 502", 7)]
+                columns = [row[1] for row in conn.execute('PRAGMA table_info(history)')]
+                assert 'error_message' not in columns and 'error_id' in columns
+        finally:
+            os.unlink(path)
+    
+    def test_error_messages_are_interned(self, db):
+        """Test each distinct error text is stored once"""
+        website = db.add_website(12345, "https://example.com")
+        for _ in range(3):
+            db.add_history(website.id, "down", error_message="Timeout after 10s")
+        db.record_checks([History(id=None, website_id=website.id, status="down", error_message="Timeout after 10s")])
+        
+        with db._get_connection() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM error_messages').fetchone()[0] == 1
+        assert db._error_ids == {"Timeout after 10s": 1}
+        assert {h.error_message for h in db.get_website_history(website.id)} == {"Timeout after 10s"}
+    
+    def test_incident_lifecycle(self, db):
+        """Test incidents open on failure, count checks and close on recovery"""
+        website = db.add_website(12345, "https://example.com")
+        start = datetime(2024, 3, 1, 12, 0)
+        
+        db.update_incident(website.id, "down", "Timeout", start)
+        db.update_incident(website.id, "down", "Connection error", start.replace(minute=2))
+        
+        incident = db.get_open_incident(website.id)
+        assert incident.started_at == start
+        assert incident.error_message == "Timeout"
+        assert incident.checks == 2
+        
+        db.update_incident(website.id, "up", checked_at=start.replace(minute=4))
+        assert db.get_open_incident(website.id) is None
+        
+        db.update_incident(website.id, "down", "HTTP 503", start.replace(minute=10))
+        
+        incidents = db.get_incidents([website.id])
+        assert [i.is_open for i in incidents] == [True, False]
+        assert incidents[1].duration().total_seconds() == 240
+        
+        stats = db.get_incident_stats([website.id])
+        assert stats == {'incidents': 2, 'ongoing': 1, 'downtime': 240.0, 'mttr': 240.0}
+        
+        # Closed before since
+        assert len(db.get_incidents([website.id], since=start.replace(minute=5))) == 1
+        
+        db.remove_website(12345, "https://example.com")
+        assert db.get_incidents([website.id]) == []
+
+    def test_record_checks_batch(self, db):
+        """Test a batch writes history, statuses and incidents together"""
+        up_site = db.add_website(12345, "https://up.example.com")
+        down_site = db.add_website(12345, "https://down.example.com")
+        checked_at = datetime(2024, 3, 1, 12, 0)
+        
+        up = History(id=None, website_id=up_site.id, status="up", response_time=0.2, checked_at=checked_at)
+        down = History(id=None, website_id=down_site.id, status="down",
+                       error_message="Timeout", checked_at=checked_at)
+        db.record_checks([up, down], incidents=[down])
+        
+        assert db.get_website(up_site.id).last_status == "up"
+        assert db.get_website(down_site.id).last_checked == checked_at
+        
+        history = db.get_website_history(up_site.id)
+        assert len(history) == 1
+        assert history[0].response_time == 0.2
+        
+        assert db.get_open_incident(up_site.id) is None
+        assert db.get_open_incident(down_site.id).started_at == checked_at
+
+    def test_certificate_cache(self, db):
+        """Test certificates are cached per host and port and replaced on save"""
+        expires = datetime(2025, 1, 1, 0, 0)
+        db.save_certificate(Certificate(host="example.com", not_after=expires, issuer="Test CA"))
+        db.save_certificate(Certificate(host="example.com", port=8443, error="Connection refused"))
+        
+        cached = db.get_certificates([("example.com", 443), ("example.com", 8443), ("other.com", 443)])
+        assert set(cached) == {("example.com", 443), ("example.com", 8443)}
+        assert cached[("example.com", 443)].not_after == expires
+        assert cached[("example.com", 8443)].not_after is None
+        
+        db.save_certificate(Certificate(host="example.com", not_after=expires, issuer="Test CA", alerted_days=30))
+        assert db.get_certificates([("example.com", 443)])[("example.com", 443)].alerted_days == 30
@@ -0,0 +1,152 @@
+# tests/test_fairness.py
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import config
+from src.bot.views import render_lag
+from src.database.models import Website
+from src.monitor.checker import CheckResult
+from src.monitor.fairness import CheckQuota, FairLimiter
+from src.monitor.scheduler import MonitorScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+async def run_in_order(limiter, chats):
+    """Queue one job per entry in chats and return the order they ran in"""
+    order = []
+    gate = asyncio.Event()
+    
+    async def job(chat_id):
+        async with limiter.slot(chat_id):
+            order.append(chat_id)
+            await gate.wait()
+    
+    async def blocker():
+        # Holds the only slot until every job is queued
+        async with limiter.slot(None):
+            await gate.wait()
+    
+    blocking = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(job(chat_id)) for chat_id in chats]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(blocking, *tasks)
+    return order
+
+
+class TestFairLimiter:
+    """Test FairLimiter class"""
+    
+    @pytest.mark.asyncio
+    async def test_small_chat_not_stuck_behind_big_one(self):
+        """Test a chat queued after many of another chat's checks runs early"""
+        limiter = FairLimiter(1)
+        order = await run_in_order(limiter, [1] * 50 + [2] * 3)
+        
+        assert order.index(2) <= 2
+        assert order[:6].count(2) == 3
+    
+    @pytest.mark.asyncio
+    async def test_weights_share_slots(self):
+        """Test a chat with weight 2 gets two slots for each of a weight 1 chat"""
+        limiter = FairLimiter(1, weights={1: 2.0})
+        order = await run_in_order(limiter, [1] * 20 + [2] * 20)
+        
+        assert order[:12].count(1) == 8
+        assert order[:12].count(2) == 4
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_frees_nothing(self):
+        """Test cancelling a queued check neither leaks nor duplicates slots"""
+        limiter = FairLimiter(1)
+        await limiter.acquire(1)
+        
+        waiter = asyncio.create_task(limiter.acquire(2))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        
+        await asyncio.wait_for(limiter.acquire(3), 1)
+        assert limiter.waiting == 0
+        assert limiter._free == 0
+    
+    @pytest.mark.asyncio
+    async def test_lag_report_worst_first(self):
+        """Test per-chat lag is measured from queueing to getting a slot"""
+        clock = FakeClock()
+        limiter = FairLimiter(1, clock=clock)
+        await limiter.acquire(1)
+        
+        waiter = asyncio.create_task(limiter.acquire(2))
+        await asyncio.sleep(0)
+        clock.now = 4.0
+        limiter.release()
+        await waiter
+        
+        report = limiter.lag_report()
+        assert [chat_id for chat_id, _ in report] == [2, 1]
+        assert report[0][1]['p95'] == 4.0
+        assert "p95 4.00s" in render_lag({}, [], debug=False, tenants=report)
+
+
+class TestCheckQuota:
+    """Test CheckQuota class"""
+    
+    def test_refills_per_minute(self):
+        """Test each chat has its own budget that refills over time"""
+        clock = FakeClock()
+        quota = CheckQuota(60, burst=2, clock=clock)
+        
+        assert quota.take(1) and quota.take(1)
+        assert not quota.take(1)
+        assert quota.take(2)
+        
+        clock.now = 1.0
+        assert quota.take(1)
+        assert not quota.take(1)
+
+
+class TestSchedulerQuota:
+    """Test per-chat quotas in MonitorScheduler"""
+    
+    @pytest.mark.asyncio
+    async def test_checks_over_quota_are_deferred(self, tmp_path):
+        """Test a chat over its checks budget has its least recently checked sites checked"""
+        now = datetime.now()
+        websites = [
+            Website(id=1, chat_id=1, url="https://a.example.com", last_checked=now),
+            Website(id=2, chat_id=1, url="https://b.example.com", last_checked=now - timedelta(minutes=5)),
+            Website(id=3, chat_id=1, url="https://c.example.com", last_checked=None),
+            Website(id=4, chat_id=2, url="https://d.example.com", last_checked=now),
+        ]
+        db = MagicMock()
+        db.get_all_websites.return_value = websites
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        
+        settings = config.Settings(data_dir=tmp_path, check_interval_minutes=1,
+                                   max_checks_per_minute_per_chat=2, cert_check_hours=0)
+        scheduler = MonitorScheduler(db, alert_manager, settings)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(
+            side_effect=lambda website: CheckResult(website.id, website.url, 'up')
+        )
+        
+        await scheduler.check_all_websites()
+        
+        checked = sorted(call.args[0].id for call in scheduler.checker.check.call_args_list)
+        assert checked == [2, 3, 4]
@@ -0,0 +1,90 @@
+# tests/test_logs.py
+import json
+import logging
+import sys
+
+import pytest
+
+from src.logs import JsonFormatter, SamplingFilter, start_logging
+
+
+def record(message="hello", level=logging.INFO, **extra):
+    return logging.makeLogRecord({'name': 'test', 'levelno': level, 'levelname': logging.getLevelName(level),
+                                  'msg': message, **extra})
+
+
+class TestJsonFormatter:
+    """Test JsonFormatter class"""
+    
+    def test_includes_extra_fields(self):
+        """Test extra= fields become JSON keys and the sample marker does not"""
+        line = JsonFormatter().format(record("site up", website_id=3, response_time=0.25, sample=True))
+        entry = json.loads(line)
+        
+        assert entry['message'] == "site up"
+        assert entry['level'] == 'INFO'
+        assert entry['website_id'] == 3
+        assert entry['response_time'] == 0.25
+        assert 'sample' not in entry
+    
+    def test_includes_traceback(self):
+        """Test exceptions are kept in their own field"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            line = JsonFormatter().format(record("failed", level=logging.ERROR, exc_info=sys.exc_info()))
+        
+        assert 'ValueError: boom' in json.loads(line)['exc']
+
+
+class TestSamplingFilter:
+    """Test SamplingFilter class"""
+    
+    def test_keeps_one_in_n_routine_records(self):
+        """Test marked records are sampled and the kept ones carry the rate"""
+        sampler = SamplingFilter(sample_every=10)
+        routine = [record(sample=True) for _ in range(25)]
+        
+        kept = [r for r in routine if sampler.filter(r)]
+        
+        assert len(kept) == 3
+        assert all(r.sampled == 10 for r in kept)
+        assert sampler.dropped == 22
+    
+    def test_never_drops_other_records(self):
+        """Test transitions, warnings and unmarked records always pass"""
+        sampler = SamplingFilter(sample_every=1000)
+        sampler.filter(record(sample=True))
+        
+        assert sampler.filter(record("transition"))
+        assert sampler.filter(record("down", level=logging.WARNING, sample=True))
+
+
+class TestStartLogging:
+    """Test queued logging setup"""
+    
+    @pytest.fixture(autouse=True)
+    def restore_root(self):
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        yield
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+    
+    def test_writes_sampled_json_lines(self, tmp_path):
+        """Test records reach the file through the listener, routine ones sampled"""
+        log_file = tmp_path / 'monitor.log'
+        listener = start_logging(logging.INFO, '%(message)s', log_file=log_file, sample_every=5)
+        logger = logging.getLogger('test.logs')
+        
+        for i in range(10):
+            logger.info(f"site {i} up", extra={'sample': True, 'website_id': i})
+        logger.warning("site 3 down", extra={'website_id': 3})
+        listener.stop()
+        
+        entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+        assert [entry['message'] for entry in entries] == ["site 0 up", "site 5 up", "site 3 down"]
+        assert entries[0]['sampled'] == 5
@@ -0,0 +1,108 @@
+# tests/test_partitions.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import config
+from src.database import DatabaseRepository
+from src.database.partitions import PartitionedHistoryStore, add_months
+from tests.helpers import checks
+
+
+# Two checks at the end of January, three in February and one in March
+TIMES = [
+    datetime(2024, 1, 31, 23, 50), datetime(2024, 1, 31, 23, 58),
+    datetime(2024, 2, 1, 0, 6), datetime(2024, 2, 15), datetime(2024, 2, 29, 12),
+    datetime(2024, 3, 1, 8),
+]
+
+
+class TestPartitionedHistoryStore:
+    """Test PartitionedHistoryStore class"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = PartitionedHistoryStore(tmp_path / 'partitions')
+        store.add_many(checks(1, ['up'] * len(TIMES), times=TIMES) + checks(2, ['down'] * 3, times=TIMES[:3]))
+        return store
+    
+    def test_one_file_per_month(self, store):
+        """Test results are written to the partition of their month"""
+        assert store.partitions() == [(2024, 1), (2024, 2), (2024, 3)]
+        assert store.partition_path((2024, 2)).name == 'history-2024-02.db'
+    
+    def test_latest_history_across_partitions(self, store):
+        """Test newest first reads continue into older months"""
+        history = store.get_website_history(1, limit=5)
+        
+        assert [h.checked_at for h in history] == TIMES[:0:-1]
+        assert store.get_website_last_status(1) == 'up'
+        assert store.get_website_last_status(2) == 'down'
+        assert store.get_website_last_status(3) is None
+    
+    def test_range_scan_across_partitions(self, store):
+        """Test streaming visits only the months in range, oldest first"""
+        since, until = datetime(2024, 1, 31, 23, 55), datetime(2024, 3, 1)
+        
+        ranged = list(store.iter_website_history(1, since=since, until=until, chunk_size=2))
+        
+        assert [h.checked_at for h in ranged] == TIMES[1:5]
+    
+    def test_history_arrays_sorted_by_site(self, store):
+        """Test arrays from several partitions are sorted by (website_id, checked_at)"""
+        arrays = store.get_history_arrays([1, 2])
+        
+        assert arrays['website_id'].tolist() == [1] * 6 + [2] * 3
+        assert np.all(np.diff(arrays['checked_at'][:6]) > 0)
+        assert arrays['status'].tolist() == [1] * 6 + [0] * 3
+    
+    def test_delete_website_history(self, store):
+        """Test a website's rows are removed from every partition"""
+        store.delete_website_history(1)
+        
+        assert store.get_website_history(1) == []
+        assert len(store.get_website_history(2)) == 3
+    
+    def test_retention_unlinks_old_partitions(self, store):
+        """Test partitions before the retention period are dropped as files"""
+        store.retention_months = 1
+        
+        expired = store.expire(now=datetime(2024, 3, 10))
+        
+        assert expired == [(2024, 1)]
+        assert store.partitions() == [(2024, 2), (2024, 3)]
+        assert not store.partition_path((2024, 1)).exists()
+        assert [h.checked_at for h in store.iter_website_history(1)] == TIMES[2:]
+    
+    def test_new_month_expires(self, tmp_path):
+        """Test writing the first result of a month drops expired months"""
+        store = PartitionedHistoryStore(tmp_path, retention_months=1)
+        now = datetime.now()
+        store.add_many(checks(1, ['up'], times=[datetime(2000, 1, 1)]))
+        
+        store.add_many(checks(1, ['up'], times=[now]))
+        
+        assert store.partitions() == [(now.year, now.month)]
+    
+    def test_add_months(self):
+        assert add_months((2024, 1), -1) == (2023, 12)
+        assert add_months((2024, 11), 3) == (2025, 2)
+
+
+class TestPartitionedBackend:
+    """Test DatabaseRepository with HISTORY_BACKEND=partitioned"""
+    
+    def test_record_checks(self, tmp_path):
+        """Test batched results land in partitions and read back through the repository"""
+        settings = config.Settings(data_dir=tmp_path, history_backend='partitioned')
+        db = DatabaseRepository.from_settings(settings)
+        website = db.add_website(1, "https://example.com")
+        start = datetime.now().replace(microsecond=0) - timedelta(minutes=10)
+        
+        db.record_checks(checks(website.id, ['up', 'up'], start, step=timedelta(minutes=2)))
+        
+        assert (tmp_path / 'partitions').is_dir()
+        assert len(db.get_website_history(website.id)) == 2
+        db.remove_website(1, "https://example.com")
+        assert db.history_store.get_website_history(website.id) == []
@@ -0,0 +1,114 @@
+# tests/test_profiling.py
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import config
+from src.database.models import Website
+from src.monitor.checker import CheckResult
+from src.monitor.profiling import CycleProfiler, SamplingProfiler
+from src.monitor.scheduler import MonitorScheduler
+
+
+def busy_wait(seconds: float):
+    """Hold the thread without sleeping"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def read_snapshots(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestSamplingProfiler:
+    """Test SamplingProfiler class"""
+    
+    def test_samples_busy_function(self):
+        """Test the function holding the thread dominates the samples"""
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        busy_wait(0.2)
+        profiler.stop()
+        
+        assert profiler.samples > 10
+        top = profiler.top(3)
+        assert 'busy_wait' in top[0]['function']
+        assert top[0]['self'] > 0.5
+
+
+class TestCycleProfiler:
+    """Test CycleProfiler class"""
+    
+    def test_snapshot_ranks_sites_and_stages(self, tmp_path):
+        """Test slowest sites and stages are ranked and written as JSON lines"""
+        profiler = CycleProfiler(tmp_path / 'profile.jsonl', top_n=2, sample_interval=0.002)
+        
+        profiler.begin_cycle()
+        for website_id, delay in [(1, 0.001), (2, 0.03), (3, 0.01)]:
+            with profiler.stage(website_id, 'check'):
+                busy_wait(delay)
+            with profiler.stage(website_id, 'persist'):
+                pass
+        snapshot = profiler.end_cycle({1: "https://a.com", 2: "https://b.com", 3: "https://c.com"})
+        profiler.close()
+        
+        assert snapshot['sites'] == 3
+        assert [site['website_id'] for site in snapshot['slowest_sites']] == [2, 3]
+        assert snapshot['slowest_stages'][0]['stage'] == 'check'
+        assert snapshot['slowest_stages'][0]['url'] == "https://b.com"
+        assert snapshot['stages']['check']['max'] >= 0.03
+        assert snapshot['stages']['alert']['total'] == 0
+        
+        assert read_snapshots(tmp_path / 'profile.jsonl') == [snapshot]
+    
+    def test_file_rotates(self, tmp_path):
+        """Test snapshots rotate at max_bytes"""
+        profiler = CycleProfiler(tmp_path / 'profile.jsonl', max_bytes=200, backup_count=2)
+        for _ in range(5):
+            profiler.begin_cycle()
+            profiler.end_cycle()
+        profiler.close()
+        
+        assert (tmp_path / 'profile.jsonl.1').exists()
+        assert (tmp_path / 'profile.jsonl.2').exists()
+        assert not (tmp_path / 'profile.jsonl.3').exists()
+
+
+class TestSchedulerProfiling:
+    """Test profiling of scheduler cycles"""
+    
+    @pytest.mark.asyncio
+    async def test_cycle_is_profiled(self, tmp_path):
+        """Test enabled profiling times every stage of every check"""
+        settings = config.Settings(data_dir=tmp_path, profiling=True)
+        websites = [Website(id=i, chat_id=1, url=f"https://site{i}.com") for i in (1, 2)]
+        
+        db = MagicMock()
+        db.get_all_websites.return_value = websites
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        
+        scheduler = MonitorScheduler(db, alert_manager, settings)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(
+            side_effect=lambda website: CheckResult(website.id, website.url, 'up', 0.1)
+        )
+        
+        await scheduler.check_all_websites()
+        snapshot = scheduler.profiler.last_snapshot
+        
+        assert snapshot['sites'] == 2
+        assert {site['url'] for site in snapshot['slowest_sites']} == {"https://site1.com", "https://site2.com"}
+        # check and alert per site, the cycle's writes are one batched persist
+        assert len(snapshot['slowest_stages']) == 4
+        assert snapshot['stages']['persist']['batched'] > 0
+        
+        scheduler.disable_profiling()
+        await scheduler.check_all_websites()
+        
+        assert scheduler.profiler is None
+        assert len(read_snapshots(settings.profile_file)) == 1
@@ -0,0 +1,127 @@
+# tests/test_reports.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.bot.validators import parse_duration
+from src.bot.views import format_duration, render_reports
+from src.database import DatabaseRepository, Website
+from src.database.arrays import HISTORY_DTYPE
+from src.database.segments import SegmentHistoryStore
+from src.reports import build_reports, summarize
+
+# (website_id, status, latency) at one minute intervals per website
+HISTORY = [
+    (1, 1, 0.1), (1, 1, 0.2), (1, 0, None), (1, 0, None),
+    (1, 1, 0.3), (1, 1, 0.4), (1, 0, None), (1, 1, 0.5),
+    (2, 0, None), (2, 0, None),
+    (3, 1, 1.0), (3, 1, 3.0),
+]
+
+
+def make_history(rows):
+    history = np.empty(len(rows), dtype=HISTORY_DTYPE)
+    for i, (website_id, status, latency) in enumerate(rows):
+        index = sum(1 for other in rows[:i] if other[0] == website_id)
+        history[i] = (website_id, index * 60000, status, np.nan if latency is None else latency)
+    return history
+
+
+class TestSummarize:
+    """Test vectorized SLA statistics"""
+    
+    def test_recovered_outages(self):
+        """Test uptime, MTTR and MTBF of a website that recovered twice"""
+        report = summarize(make_history(HISTORY))[1]
+        
+        assert report.checks == 8
+        assert report.uptime == pytest.approx(5 / 8)
+        assert report.outages == 2
+        assert report.downtime == pytest.approx(180)
+        assert report.mttr == pytest.approx(90)
+        # 420s observed, 180s of it down, over 2 failures
+        assert report.mtbf == pytest.approx(120)
+    
+    def test_percentiles_match_numpy(self):
+        """Test grouped percentiles against np.percentile per website"""
+        reports = summarize(make_history(HISTORY))
+        
+        expected = np.percentile([0.1, 0.2, 0.3, 0.4, 0.5], [50, 95, 99])
+        assert [reports[1].p50, reports[1].p95, reports[1].p99] == pytest.approx(list(expected))
+        assert reports[3].p95 == pytest.approx(np.percentile([1.0, 3.0], 95))
+    
+    def test_ongoing_and_no_outage(self):
+        """Test an unresolved outage and a website that never failed"""
+        reports = summarize(make_history(HISTORY))
+        
+        down = reports[2]
+        assert (down.outages, down.downtime, down.mttr) == (1, 60, None)
+        assert down.p50 is None
+        
+        up = reports[3]
+        assert (up.outages, up.mttr, up.mtbf) == (0, None, None)
+    
+    def test_empty(self):
+        """Test empty history"""
+        assert summarize(np.empty(0, dtype=HISTORY_DTYPE)) == {}
+
+
+class TestHistoryArrays:
+    """Test columnar history from both backends"""
+    
+    @pytest.mark.parametrize('backend', ['sqlite', 'segments'])
+    def test_build_reports(self, tmp_path, backend):
+        """Test reports are built from repository history"""
+        store = SegmentHistoryStore(tmp_path / 'history') if backend == 'segments' else None
+        db = DatabaseRepository(str(tmp_path / 'monitor.db'), history_store=store)
+        first = db.add_website(1, "https://one.com")
+        second = db.add_website(1, "https://two.com")
+        
+        db.add_history(first.id, 'up', 0.5)
+        db.add_history(first.id, 'down', None, "Timeout after 10s")
+        db.add_history(second.id, 'up', 0.25)
+        
+        history = db.get_history_arrays([second.id, first.id])
+        assert history['website_id'].tolist() == [first.id, first.id, second.id]
+        assert np.isnan(history['response_time'][1])
+        
+        reports = build_reports(db, [first.id, second.id], timedelta(days=1),
+                                now=datetime.now() + timedelta(minutes=1))
+        assert reports[first.id].uptime == 0.5
+        assert reports[first.id].outages == 1
+        assert reports[second.id].p50 == pytest.approx(0.25)
+        
+        # Outside the range
+        assert build_reports(db, [first.id], timedelta(hours=1),
+                             now=datetime.now() - timedelta(hours=2)) == {}
+
+
+class TestReportViews:
+    """Test /report parsing and rendering"""
+    
+    def test_parse_duration(self):
+        """Test range arguments"""
+        assert parse_duration("24h") == timedelta(hours=24)
+        assert parse_duration("7D") == timedelta(days=7)
+        assert parse_duration("4w") == timedelta(weeks=4)
+        assert parse_duration("0d") is None
+        assert parse_duration("400d") is None
+        assert parse_duration("https://example.com") is None
+    
+    def test_format_duration(self):
+        """Test duration formatting"""
+        assert format_duration(None) == "N/A"
+        assert format_duration(42) == "42s"
+        assert format_duration(125) == "2m"
+        assert format_duration(7500) == "2h 5m"
+        assert format_duration(90000) == "1d 1h"
+    
+    def test_render_reports(self):
+        """Test all-sites report lists worst uptime first"""
+        websites = [Website(id=i, chat_id=1, url=f"https://site{i}.com") for i in (1, 2, 3, 4)]
+        message = render_reports(websites, summarize(make_history(HISTORY)), "30d")
+        
+        assert "4 websites" in message
+        assert message.index("site2.com") < message.index("site1.com") < message.index("site3.com")
+        assert "1 websites without checks" in message
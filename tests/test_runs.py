@@ -0,0 +1,103 @@
+# tests/test_runs.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import config
+from src.database import DatabaseRepository
+from src.database.runs import RunHistoryStore
+from tests.helpers import checks
+
+# Checks every 2 minutes, 30 per sampling interval
+STEP = timedelta(minutes=2)
+
+
+class TestRunHistoryStore:
+    """Test RunHistoryStore class"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        return RunHistoryStore(str(tmp_path / 'monitor.db'), sample_interval=3600)
+    
+    @pytest.fixture
+    def start(self):
+        return datetime(2024, 1, 1, 12, 0)
+    
+    def test_runs_split_on_transition(self, store, start):
+        """Test equal results extend a run and transitions start a new one"""
+        results = checks(1, ['up'] * 5 + ['down'] * 2 + ['up'], start, step=STEP, latency=0.2)
+        results[1].response_time = 0.1
+        results[2].response_time = 0.6
+        store.add_many(results)
+        
+        runs = store.get_runs(1)
+        
+        assert [(run.status, run.checks) for run in runs] == [('up', 1), ('down', 2), ('up', 5)]
+        first = runs[-1]
+        assert first.started_at == start
+        assert first.ended_at == start + timedelta(minutes=8)
+        assert (first.latency_min, first.latency_max) == (0.1, 0.6)
+        assert first.latency_avg == pytest.approx(0.26)
+        assert runs[1].latency_avg is None
+        assert runs[1].error_message == "Timeout"
+        assert store.get_website_last_status(1) == 'up'
+    
+    def test_runs_split_after_sample_interval(self, store, start):
+        """Test a long run is split into rows of at most the sampling interval"""
+        store.add_many(checks(1, ['up'] * 90, start, step=STEP))
+        
+        assert [run.checks for run in store.get_runs(1)] == [30, 30, 30]
+    
+    def test_open_run_survives_restart(self, store, start):
+        """Test a new store continues the open run from the database"""
+        store.add_many(checks(1, ['up'] * 3, start, step=STEP))
+        
+        reopened = RunHistoryStore(store.db_path)
+        reopened.add_many(checks(1, ['up'], start + timedelta(minutes=6), step=STEP))
+        
+        assert [run.checks for run in reopened.get_runs(1)] == [4]
+    
+    def test_history_is_reconstructed(self, store, start):
+        """Test runs expand back into one row per check"""
+        store.add_many(checks(1, ['up'] * 4 + ['down'] + ['up'] * 3, start, step=STEP, latency=0.2))
+        
+        latest = store.get_website_history(1, limit=5)
+        assert [h.status for h in latest] == ['up', 'up', 'up', 'down', 'up']
+        assert [h.checked_at for h in latest] == [start + timedelta(minutes=2 * i) for i in (7, 6, 5, 4, 3)]
+        
+        since, until = start + timedelta(minutes=4), start + timedelta(minutes=10)
+        ranged = list(store.iter_website_history(1, since=since, until=until, chunk_size=1))
+        assert [h.checked_at for h in ranged] == [start + timedelta(minutes=2 * i) for i in (2, 3, 4)]
+        
+        arrays = store.get_history_arrays([1], since=since)
+        assert arrays['status'].tolist() == [1, 1, 0, 1, 1, 1]
+        assert np.isnan(arrays['response_time'][2])
+        assert arrays['response_time'][0] == pytest.approx(0.2)
+    
+    def test_delete_website_history(self, store, start):
+        """Test deleting a website's runs forgets its open run"""
+        store.add_many(checks(1, ['up'] * 3, start, step=STEP))
+        
+        store.delete_website_history(1)
+        store.add_many(checks(1, ['up'], start, step=STEP))
+        
+        assert [run.checks for run in store.get_runs(1)] == [1]
+
+
+class TestRunsBackend:
+    """Test DatabaseRepository with HISTORY_BACKEND=runs"""
+    
+    def test_record_checks(self, tmp_path):
+        """Test batched results are stored as runs and read back as rows"""
+        db = DatabaseRepository.from_settings(config.Settings(data_dir=tmp_path, history_backend='runs'))
+        website = db.add_website(1, "https://example.com")
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+        
+        db.record_checks(checks(website.id, ['up'] * 10, start, step=STEP))
+        
+        with db._get_connection() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM history').fetchone()[0] == 0
+            assert conn.execute('SELECT COUNT(*) FROM history_runs').fetchone()[0] == 1
+        assert len(db.get_website_history(website.id)) == 10
+        assert db.get_website(website.id).last_status == 'up'
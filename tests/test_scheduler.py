@@ -0,0 +1,317 @@
+# tests/test_scheduler.py
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import config
+from src.monitor.circuit import CircuitBreaker
+from src.monitor.checker import CheckResult
+from src.monitor.scheduler import MonitorScheduler
+from src.bot.cache import RenderCache
+from src.bot.handlers import render_page
+from src.database import MemoryRepository
+from src.database.models import Certificate, Website
+
+
+class FakeClock:
+    """Manually advanced clock"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test CircuitBreaker class"""
+    
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+    
+    @pytest.fixture
+    def breaker(self, clock):
+        return CircuitBreaker(base_interval=120, threshold=3, max_interval=960, clock=clock)
+    
+    def test_closed_until_threshold(self, breaker):
+        """Test failures below threshold keep normal interval"""
+        breaker.record(1, 'down')
+        breaker.record(1, 'down')
+        
+        assert not breaker.is_open(1)
+        assert breaker.allow(1)
+        assert breaker.current_interval(1) == 120
+    
+    def test_backoff_grows_and_caps(self, breaker, clock):
+        """Test interval doubles per failure up to the cap"""
+        intervals = []
+        for _ in range(6):
+            breaker.record(1, 'down')
+            intervals.append(breaker.current_interval(1))
+        
+        assert intervals == [120, 120, 240, 480, 960, 960]
+        assert breaker.is_open(1)
+        
+        # Not due until the backed-off interval has passed
+        assert not breaker.allow(1)
+        clock.now += 959
+        assert not breaker.allow(1)
+        clock.now += 1
+        assert breaker.allow(1)
+    
+    def test_success_resets(self, breaker):
+        """Test first success snaps back to normal"""
+        for _ in range(4):
+            breaker.record(1, 'down')
+        assert breaker.is_open(1)
+        
+        changed = breaker.record(1, 'up')
+        
+        assert changed is True
+        assert not breaker.is_open(1)
+        assert breaker.allow(1)
+        assert breaker.failures(1) == 0
+    
+    def test_record_reports_opening(self, breaker):
+        """Test record returns True only when breaker opens"""
+        assert breaker.record(1, 'down') is False
+        assert breaker.record(1, 'down') is False
+        assert breaker.record(1, 'down') is True
+        assert breaker.record(1, 'down') is False
+
+
+class TestMonitorScheduler:
+    """Test MonitorScheduler backoff"""
+    
+    @pytest.mark.asyncio
+    async def test_skips_backed_off_websites(self):
+        """Test backed-off websites are not checked"""
+        up_site = Website(id=1, chat_id=1, url="https://up.example.com")
+        dead_site = Website(id=2, chat_id=1, url="https://dead.example.com")
+        
+        db = MagicMock()
+        db.get_all_websites.return_value = [up_site, dead_site]
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        
+        scheduler = MonitorScheduler(db, alert_manager)
+        await scheduler.checker.close()
+        
+        async def fake_check(website):
+            status = 'up' if website.id == 1 else 'down'
+            return CheckResult(website_id=website.id, url=website.url, status=status)
+        
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(side_effect=fake_check)
+        
+        for _ in range(scheduler.breaker.threshold):
+            await scheduler.check_all_websites()
+        assert scheduler.breaker.is_open(2)
+        
+        scheduler.checker.check.reset_mock()
+        await scheduler.check_all_websites()
+        
+        checked = [call.args[0].id for call in scheduler.checker.check.call_args_list]
+        assert checked == [1]
+    
+    @pytest.mark.asyncio
+    async def test_invalidates_pages_on_status_change(self):
+        """Test rendered pages are dropped only when status changes"""
+        website = Website(id=1, chat_id=7, url="https://example.com", last_status="up")
+        
+        db = MagicMock()
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        render_cache = MagicMock()
+        
+        scheduler = MonitorScheduler(db, alert_manager, render_cache=render_cache)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        
+        scheduler.checker.check = AsyncMock(return_value=CheckResult(1, website.url, 'up'))
+        await scheduler.check_website(website)
+        render_cache.invalidate.assert_not_called()
+        
+        scheduler.checker.check = AsyncMock(return_value=CheckResult(1, website.url, 'down'))
+        await scheduler.check_website(website)
+        render_cache.invalidate.assert_called_once_with(7)
+    
+    @pytest.mark.asyncio
+    async def test_pages_rendered_mid_cycle_are_dropped_after_write(self):
+        """Test a page cached before the cycle's write is rendered again after it"""
+        db = MemoryRepository()
+        website = db.add_website(7, "https://example.com")
+        render_cache = RenderCache()
+        context = SimpleNamespace(bot_data={'db': db, 'render_cache': render_cache})
+        
+        pages = []
+        
+        async def open_status(website, result):
+            # The chat opens /status as the alert arrives, before the cycle is written
+            pages.append(render_page(context, 7, 'status')[0])
+            return True
+        
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(side_effect=open_status)
+        scheduler = MonitorScheduler(db, alert_manager, render_cache=render_cache)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(return_value=CheckResult(website.id, website.url, 'down'))
+        
+        await scheduler.check_all_websites()
+        
+        assert "DOWN" not in pages[0]
+        assert "Status: DOWN" in render_page(context, 7, 'status')[0]
+
+    @pytest.mark.asyncio
+    async def test_tracks_incidents_on_failures_and_recovery(self):
+        """Test incidents are written for failures and the first recovery only"""
+        db = MagicMock()
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        
+        scheduler = MonitorScheduler(db, alert_manager)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        
+        for last_status, status in [('up', 'up'), ('up', 'down'), ('down', 'down'), ('down', 'up')]:
+            website = Website(id=1, chat_id=7, url="https://example.com", last_status=last_status)
+            result = CheckResult(1, website.url, status, error_message=None if status == 'up' else "Timeout")
+            scheduler.checker.check = AsyncMock(return_value=result)
+            await scheduler.check_website(website)
+        
+        statuses = [history.status for call in db.record_checks.call_args_list for history in call.args[1]]
+        assert statuses == ['down', 'down', 'up']
+
+    @pytest.mark.asyncio
+    async def test_cycle_writes_results_in_one_batch(self):
+        """Test a check cycle makes one batched write with every result"""
+        websites = [Website(id=i, chat_id=1, url=f"https://{i}.example.com") for i in range(1, 6)]
+        
+        db = MagicMock()
+        db.get_all_websites.return_value = websites
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        
+        scheduler = MonitorScheduler(db, alert_manager)
+        await scheduler.checker.close()
+        
+        async def fake_check(website):
+            return CheckResult(website_id=website.id, url=website.url, status='up')
+        
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(side_effect=fake_check)
+        
+        await scheduler.check_all_websites()
+        
+        db.record_checks.assert_called_once()
+        results, incidents = db.record_checks.call_args.args
+        assert sorted(history.website_id for history in results) == [1, 2, 3, 4, 5]
+        assert incidents == []
+        db.add_history.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_touches_heartbeat_file(self, tmp_path):
+        """Test checks touch the heartbeat file the supervisor watches"""
+        settings = config.Settings(data_dir=tmp_path, heartbeat_file=tmp_path / 'heartbeat')
+        website = Website(id=1, chat_id=7, url="https://example.com")
+        
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        scheduler = MonitorScheduler(MagicMock(), alert_manager, settings)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(return_value=CheckResult(1, website.url, 'up'))
+        
+        await scheduler.check_website(website)
+        
+        assert settings.heartbeat_file.exists()
+
+    @pytest.mark.asyncio
+    async def test_tcp_monitors_checked_between_full_cycles(self, tmp_path):
+        """Test ticks between full cycles only check tcp:// monitors"""
+        settings = config.Settings(data_dir=tmp_path, check_interval_minutes=1, tcp_check_interval_seconds=20)
+        db = MagicMock()
+        db.get_all_websites.return_value = []
+        scheduler = MonitorScheduler(db, MagicMock(), settings)
+        await scheduler.checker.close()
+        
+        now = [0.0]
+        
+        async def fake_sleep(seconds):
+            now[0] += seconds
+            if db.get_all_websites.call_count >= 4:
+                scheduler.running = False
+        
+        scheduler._sleep = fake_sleep
+        loop = asyncio.get_running_loop()
+        real_time = loop.time
+        loop.time = lambda: now[0]
+        try:
+            await scheduler.start()
+        finally:
+            loop.time = real_time
+        
+        prefixes = [call.kwargs.get('url_prefix') for call in db.get_all_websites.call_args_list]
+        assert prefixes == [None, 'tcp://', 'tcp://', None]
+    
+    @pytest.mark.asyncio
+    async def test_tcp_ticks_skip_cycle_bookkeeping(self, tmp_path):
+        """Test tcp-only ticks are not profiled, lag-reported, quota-charged or certificate-checked"""
+        settings = config.Settings(data_dir=tmp_path, check_interval_minutes=1, max_checks_per_minute_per_chat=1)
+        website = Website(id=1, chat_id=7, url="tcp://db.example.com:5432")
+        db = MagicMock()
+        db.get_all_websites.return_value = [website]
+        alert_manager = MagicMock()
+        alert_manager.send_alert = AsyncMock(return_value=False)
+        
+        scheduler = MonitorScheduler(db, alert_manager, settings)
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check = AsyncMock(return_value=CheckResult(1, website.url, 'up'))
+        scheduler.profiler = MagicMock()
+        scheduler._log_lag = MagicMock()
+        scheduler.check_certificates = AsyncMock()
+        
+        for _ in range(3):
+            await scheduler.check_all_websites(tcp_only=True)
+        
+        assert scheduler.checker.check.call_count == 3
+        scheduler.profiler.begin_cycle.assert_not_called()
+        scheduler._log_lag.assert_not_called()
+        scheduler.check_certificates.assert_not_called()
+        
+        await scheduler.check_all_websites()
+        assert scheduler.checker.check.call_count == 4
+        scheduler.profiler.begin_cycle.assert_called_once()
+        scheduler.check_certificates.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_certificates_checked_once_per_host_and_period(self, tmp_path):
+        """Test only HTTPS hosts without a recent cached certificate are checked"""
+        websites = [
+            Website(id=1, chat_id=7, url="https://a.example.com/"),
+            Website(id=2, chat_id=8, url="https://a.example.com/api"),
+            Website(id=3, chat_id=7, url="https://b.example.com"),
+            Website(id=4, chat_id=7, url="http://plain.example.com"),
+        ]
+        db = MagicMock()
+        db.get_certificates.return_value = {("b.example.com", 443): Certificate(host="b.example.com")}
+        alert_manager = MagicMock()
+        alert_manager.send_certificate_alert = AsyncMock(return_value=False)
+        
+        scheduler = MonitorScheduler(db, alert_manager, config.Settings(data_dir=tmp_path))
+        await scheduler.checker.close()
+        scheduler.checker = MagicMock()
+        scheduler.checker.check_certificate = AsyncMock(
+            side_effect=lambda host, port: Certificate(host=host, port=port)
+        )
+        
+        await scheduler.check_certificates(websites)
+        
+        scheduler.checker.check_certificate.assert_called_once_with("a.example.com", 443)
+        alerted_websites = alert_manager.send_certificate_alert.call_args.args[0]
+        assert [website.id for website in alerted_websites] == [1, 2]
+        db.save_certificate.assert_called_once()
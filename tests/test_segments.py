@@ -0,0 +1,128 @@
+# tests/test_segments.py
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.database import DatabaseRepository
+from src.database.errors import (
+    CODE_DNS, CODE_HTTP_5XX, CODE_TIMEOUT, CODE_UP, classify_error
+)
+from src.database.segments import RECORD, SegmentHistoryStore
+
+
+def write_records(store, website_id, records):
+    """Append (timestamp, status) records directly"""
+    for timestamp, status in records:
+        with patch('src.database.segments.datetime') as fake:
+            fake.now.return_value = datetime.fromtimestamp(timestamp)
+            fake.fromtimestamp = datetime.fromtimestamp
+            store.add_history(website_id, status, 0.5 if status == 'up' else None,
+                              None if status == 'up' else "Timeout after 10s")
+
+
+class TestSegmentHistoryStore:
+    """Test SegmentHistoryStore class"""
+    
+    @pytest.fixture
+    def store(self, tmp_path):
+        return SegmentHistoryStore(tmp_path, segment_records=4)
+    
+    def test_add_and_get(self, store):
+        """Test history is returned newest first across segments"""
+        for i in range(10):
+            store.add_history(1, 'up' if i % 2 else 'down', 0.25 if i % 2 else None,
+                              None if i % 2 else "Timeout after 10s")
+        
+        history = store.get_website_history(1, limit=5)
+        
+        assert [h.id for h in history] == [9, 8, 7, 6, 5]
+        assert history[0].status == 'up'
+        assert history[0].response_time == 0.25
+        assert history[1].status == 'down'
+        assert history[1].response_time is None
+        assert history[1].error_message == "Timeout"
+        assert len(os.listdir(store.base_dir / '1')) == 3
+        assert store.get_website_last_status(1) == 'up'
+        assert store.get_website_history(2) == []
+        assert store.get_website_last_status(2) is None
+    
+    def test_range_scan_and_uptime(self, store):
+        """Test time range scans and uptime over mapped segments"""
+        base = 1_700_000_000
+        write_records(store, 1, [(base + i * 120, 'down' if i in (3, 4) else 'up') for i in range(10)])
+        
+        since = datetime.fromtimestamp(base + 2 * 120)
+        until = datetime.fromtimestamp(base + 6 * 120)
+        
+        ranged = list(store.iter_website_history(1, since=since, until=until, chunk_size=3))
+        
+        assert [h.status for h in ranged] == ['up', 'down', 'down', 'up']
+        assert store.uptime(1) == pytest.approx(0.8)
+        assert store.uptime(1, since=since, until=until) == pytest.approx(0.5)
+        assert store.uptime(2) is None
+    
+    def test_paused_stream_holds_no_mapping(self, store):
+        """Test a stream between chunks keeps no segment mapped"""
+        for i in range(10):
+            store.add_history(1, 'up', 0.25)
+        
+        mapped = store._mapped
+        active = []
+        
+        @contextmanager
+        def tracked(website_id, segment):
+            active.append(segment)
+            try:
+                with mapped(website_id, segment) as view:
+                    yield view
+            finally:
+                active.remove(segment)
+        
+        store._mapped = tracked
+        stream = store.iter_website_history(1, chunk_size=2)
+        
+        first = next(stream)
+        assert active == []
+        assert [first.id] + [h.id for h in stream] == list(range(10))
+    
+    def test_torn_record_is_ignored(self, store):
+        """Test partial trailing write does not break reads"""
+        store.add_history(1, 'up', 0.1)
+        with open(store.base_dir / '1' / '00000000.seg', 'ab') as f:
+            f.write(RECORD.pack(0, 0.0, CODE_UP)[:7])
+        
+        assert len(store.get_website_history(1)) == 1
+        assert store.uptime(1) == 1.0
+    
+    def test_repository_delegates(self, tmp_path):
+        """Test repository history methods use the store"""
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            db = DatabaseRepository(path, history_store=SegmentHistoryStore(tmp_path / 'history'))
+            website = db.add_website(1, "https://example.com")
+            db.add_history(website.id, 'up', 0.5)
+            db.add_history(website.id, 'down', None, "HTTP 503")
+            
+            assert [h.status for h in db.get_website_history(website.id)] == ['down', 'up']
+            assert db.get_website_last_status(website.id) == 'down'
+            assert (tmp_path / 'history' / str(website.id)).exists()
+            
+            db.remove_website(1, "https://example.com")
+            assert not (tmp_path / 'history' / str(website.id)).exists()
+        finally:
+            os.unlink(path)
+
+
+class TestClassifyError:
+    """Test error classification"""
+    
+    def test_codes(self):
+        assert classify_error('up', None) == CODE_UP
+        assert classify_error('down', "Timeout after 10s") == CODE_TIMEOUT
+        assert classify_error('down', "HTTP 503") == CODE_HTTP_5XX
+        assert classify_error('down', "[Errno -2] Name or service not known") == CODE_DNS
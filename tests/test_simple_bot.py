@@ -0,0 +1,71 @@
+# tests/test_simple_bot.py
+import os
+import tempfile
+
+import pytest
+
+import simple_bot
+from src.database import DatabaseRepository
+
+
+class FakeBot:
+    """Records messages instead of calling the Bot API"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def send(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+def message(text, chat_id=42):
+    return {"update_id": 1, "message": {"text": text, "chat": {"id": chat_id}}}
+
+
+class TestSimpleBot:
+    """Test the lightweight bot on the shared repository"""
+    
+    @pytest.fixture
+    def db(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        yield DatabaseRepository(path)
+        os.unlink(path)
+    
+    @pytest.mark.asyncio
+    async def test_add_list_remove(self, db):
+        """Test commands read and write the shared schema"""
+        bot = FakeBot()
+        
+        await simple_bot.handle(bot, db, message("/add example.com"))
+        assert bot.sent[-1] == (42, "✅ Added: https://example.com")
+        assert [w.url for w in db.get_user_websites(42)] == ["https://example.com"]
+        
+        await simple_bot.handle(bot, db, message("/list"))
+        assert "https://example.com" in bot.sent[-1][1]
+        
+        await simple_bot.handle(bot, db, message("/remove https://example.com"))
+        assert db.get_user_websites(42) == []
+        
+        await simple_bot.handle(bot, db, message("/status"))
+        assert bot.sent[-1][1] == simple_bot.EMPTY_MESSAGE
+    
+    @pytest.mark.asyncio
+    async def test_rejects_invalid_url(self, db):
+        """Test invalid URLs are not stored"""
+        bot = FakeBot()
+        
+        await simple_bot.handle(bot, db, message("/add not a url"))
+        
+        assert bot.sent[-1][1].startswith("❌")
+        assert db.get_user_websites(42) == []
+    
+    @pytest.mark.asyncio
+    async def test_ignores_plain_text(self, db):
+        """Test messages that are not commands get the help hint"""
+        bot = FakeBot()
+        
+        await simple_bot.handle(bot, db, message("hello"))
+        await simple_bot.handle(bot, db, message("   "))
+        
+        assert bot.sent == [(42, "❓ Unknown. Try /help")]
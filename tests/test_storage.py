@@ -0,0 +1,167 @@
+# tests/test_storage.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import config
+from src.database import (
+    Certificate, DatabaseRepository, MemoryRepository, Storage, open_storage
+)
+from tests.helpers import checks
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def db(request, tmp_path):
+    """Each storage backend, empty"""
+    if request.param == 'sqlite':
+        return DatabaseRepository(str(tmp_path / 'monitor.db'))
+    return MemoryRepository()
+
+
+class TestStorageContract:
+    """Test both storage backends behave the same"""
+    
+    def test_websites(self, db):
+        """Test adding, paging, counting and removing websites"""
+        assert isinstance(db, Storage)
+        first = db.add_website(1, "https://a.example.com")
+        assert db.add_websites(1, ["https://a.example.com", "https://b.example.com", "tcp://c.example.com:25"]) == 2
+        db.add_website(2, "https://a.example.com")
+        
+        assert db.get_user(1).chat_id == 1
+        assert db.get_website(first.id).url == "https://a.example.com"
+        assert db.get_website_by_url(2, "https://a.example.com").chat_id == 2
+        assert [w.url for w in db.iter_user_websites(1)] == [
+            "https://a.example.com", "https://b.example.com", "tcp://c.example.com:25"
+        ]
+        assert [w.url for w in db.get_all_websites(url_prefix='tcp://')] == ["tcp://c.example.com:25"]
+        
+        page = db.get_user_websites_page(1, limit=2)
+        assert [w.url for w in page.websites] == ["tcp://c.example.com:25", "https://b.example.com"]
+        assert page.has_next and not page.has_prev
+        page = db.get_user_websites_page(1, after_id=page.last_id, limit=2)
+        assert [w.url for w in page.websites] == ["https://a.example.com"]
+        assert not page.has_next and page.has_prev
+        page = db.get_user_websites_page(1, before_id=page.first_id, limit=2)
+        assert [w.url for w in page.websites] == ["tcp://c.example.com:25", "https://b.example.com"]
+        assert not page.has_prev
+        
+        db.update_website_status(first.id, 'down')
+        assert db.count_user_websites(1) == {'down': 1, None: 2}
+        
+        assert db.remove_website(1, "https://a.example.com")
+        assert not db.remove_website(1, "https://a.example.com")
+        assert len(db.get_user_websites(1)) == 2
+    
+    def test_history_and_incidents(self, db):
+        """Test batched results update history, statuses and incidents"""
+        website = db.add_website(1, "https://a.example.com")
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+        results = checks(website.id, ['up', 'down', 'down', 'up'], start)
+        
+        db.record_checks(results, incidents=results[1:])
+        
+        assert db.get_website(website.id).last_status == 'up'
+        assert db.get_website_last_status(website.id) == 'up'
+        assert [h.status for h in db.get_website_history(website.id, limit=3)] == ['up', 'down', 'down']
+        assert [h.checked_at for h in db.iter_website_history(website.id, since=start + timedelta(minutes=2))] == [
+            start + timedelta(minutes=2), start + timedelta(minutes=3)
+        ]
+        
+        arrays = db.get_history_arrays([website.id])
+        assert arrays['status'].tolist() == [1, 0, 0, 1]
+        assert np.isnan(arrays['response_time'][1])
+        
+        incidents = db.get_incidents([website.id])
+        assert len(incidents) == 1
+        assert incidents[0].checks == 2
+        assert incidents[0].ended_at == start + timedelta(minutes=3)
+        assert db.get_open_incident(website.id) is None
+        
+        stats = db.get_incident_stats([website.id])
+        assert stats == {'incidents': 1, 'ongoing': 0, 'downtime': 120.0, 'mttr': 120.0}
+        
+        db.update_incident(website.id, 'down', "Refused")
+        assert db.get_open_incident(website.id).error_message == "Refused"
+    
+    def test_error_counts(self, db):
+        """Test failed checks are counted by error class"""
+        website = db.add_website(1, "https://a.example.com")
+        start = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+        results = checks(website.id, ['down', 'down', 'up', 'down', 'down'], start)
+        results[1].error_message = "HTTP 503"
+        results[3].error_message = "[Errno 111] Connection refused"
+        results[4].error_message = None
+        
+        db.record_checks(results)
+        
+        assert db.get_error_counts([website.id]) == {
+            "Timeout": 1, "HTTP 5xx": 1, "Connection error": 1, "Error": 1
+        }
+        assert db.get_error_counts([website.id], since=start + timedelta(minutes=2)) == {
+            "Connection error": 1, "Error": 1
+        }
+        assert [h.error_message for h in db.get_website_history(website.id)][:2] == [
+            None, "[Errno 111] Connection refused"
+        ]
+    
+    def test_certificates(self, db):
+        """Test certificate cache round trip"""
+        expiry = datetime.now().replace(microsecond=0) + timedelta(days=20)
+        db.save_certificate(Certificate(host="a.example.com", not_after=expiry, issuer="CA", alerted_days=30))
+        
+        cached = db.get_certificates([("a.example.com", 443), ("b.example.com", 443)])
+        
+        assert list(cached) == [("a.example.com", 443)]
+        assert cached[("a.example.com", 443)].not_after == expiry
+        assert cached[("a.example.com", 443)].alerted_days == 30
+
+
+class TestMemoryRepository:
+    """Test MemoryRepository snapshots"""
+    
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test state written to the snapshot is loaded back"""
+        path = tmp_path / 'snapshot.json'
+        db = MemoryRepository(path, snapshot_interval=3600)
+        website = db.add_website(1, "https://a.example.com")
+        start = datetime.now().replace(microsecond=0)
+        results = checks(website.id, ['down', 'up'], start)
+        db.record_checks(results, incidents=results)
+        assert not path.exists()
+        
+        db.close()
+        restored = MemoryRepository(path)
+        
+        assert restored.get_website(website.id).last_status == 'up'
+        assert [h.status for h in restored.get_website_history(website.id)] == ['up', 'down']
+        assert restored.get_incidents([website.id])[0].ended_at == start + timedelta(minutes=1)
+        assert restored.add_website(1, "https://b.example.com").id == website.id + 1
+    
+    def test_snapshots_periodically(self, tmp_path):
+        """Test writes snapshot once the interval has passed"""
+        path = tmp_path / 'snapshot.json'
+        db = MemoryRepository(path, snapshot_interval=0)
+        
+        db.add_website(1, "https://a.example.com")
+        
+        assert MemoryRepository(path).get_website_by_url(1, "https://a.example.com") is not None
+    
+    def test_history_is_bounded(self):
+        """Test each website keeps only its newest history_per_site results"""
+        db = MemoryRepository(history_per_site=3)
+        website = db.add_website(1, "https://a.example.com")
+        
+        db.record_checks(checks(website.id, ['up'] * 5, datetime.now()))
+        
+        assert len(db.get_website_history(website.id)) == 3
+    
+    def test_open_storage(self, tmp_path):
+        """Test the backend is selected from settings"""
+        assert isinstance(open_storage(config.Settings(data_dir=tmp_path)), DatabaseRepository)
+        memory = open_storage(config.Settings(data_dir=tmp_path, storage_backend='memory'))
+        assert isinstance(memory, MemoryRepository)
+        assert memory.snapshot_path == tmp_path / 'snapshot.json'
+        with pytest.raises(ValueError):
+            open_storage(config.Settings(data_dir=tmp_path, storage_backend='redis'))
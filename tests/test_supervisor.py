@@ -0,0 +1,102 @@
+# tests/test_supervisor.py
+import sys
+import time
+
+from src.supervisor import Supervisor, backoff_delay, rotate_copytruncate
+
+
+def supervisor(tmp_path, code, **kwargs):
+    """Supervisor running a Python snippet with fast polling"""
+    kwargs.setdefault('poll_interval', 0.05)
+    return Supervisor(
+        [sys.executable, '-c', code],
+        log_file=tmp_path / 'monitor.log',
+        heartbeat_file=tmp_path / 'heartbeat',
+        **kwargs
+    )
+
+
+class TestBackoff:
+    """Test restart backoff"""
+    
+    def test_doubles_up_to_cap(self):
+        """Test delay doubles per consecutive failure and is capped"""
+        delays = [backoff_delay(failures, base=1, cap=10) for failures in range(6)]
+        assert delays == [0, 1, 2, 4, 8, 10]
+
+
+class TestRotation:
+    """Test copytruncate rotation"""
+    
+    def test_open_writer_continues_at_start(self, tmp_path):
+        """Test an O_APPEND writer keeps writing to the truncated file"""
+        path = tmp_path / 'monitor.log'
+        with open(path, 'ab', buffering=0) as writer:
+            writer.write(b'old line\n')
+            rotate_copytruncate(path, backup_count=2)
+            writer.write(b'new line\n')
+        
+        assert path.read_bytes() == b'new line\n'
+        assert (tmp_path / 'monitor.log.1').read_bytes() == b'old line\n'
+    
+    def test_shifts_backups(self, tmp_path):
+        """Test older backups move up and the oldest is dropped"""
+        path = tmp_path / 'monitor.log'
+        for content in (b'1', b'2', b'3'):
+            path.write_bytes(content)
+            rotate_copytruncate(path, backup_count=2)
+        
+        assert (tmp_path / 'monitor.log.1').read_bytes() == b'3'
+        assert (tmp_path / 'monitor.log.2').read_bytes() == b'2'
+        assert not (tmp_path / 'monitor.log.3').exists()
+
+
+class TestSupervisor:
+    """Test supervising real child processes"""
+    
+    def test_crash_output_goes_to_log(self, tmp_path):
+        """Test child output lands in the log file and the exit code is reported"""
+        sup = supervisor(tmp_path, "import sys; print('hello'); sys.exit(3)")
+        
+        assert sup.run_once() == (3, 'exit')
+        assert 'hello' in (tmp_path / 'monitor.log').read_text()
+    
+    def test_stalled_child_is_stopped(self, tmp_path):
+        """Test a child that never beats is terminated after the stall timeout"""
+        sup = supervisor(tmp_path, "import time; time.sleep(30)", stall_timeout=0.3)
+        
+        started = time.monotonic()
+        returncode, reason = sup.run_once()
+        
+        assert reason == 'stall'
+        assert returncode != 0
+        assert time.monotonic() - started < 5
+    
+    def test_heartbeat_keeps_child_alive(self, tmp_path):
+        """Test a child touching HEARTBEAT_FILE outlives the stall timeout"""
+        code = (
+            "import os, pathlib, time\n"
+            "beat = pathlib.Path(os.environ['HEARTBEAT_FILE'])\n"
+            "for _ in range(10):\n"
+            "    beat.touch()\n"
+            "    time.sleep(0.1)\n"
+        )
+        sup = supervisor(tmp_path, code, stall_timeout=0.5)
+        
+        assert sup.run_once() == (0, 'exit')
+    
+    def test_restarts_with_backoff_until_clean_exit(self, tmp_path):
+        """Test crashed children are restarted until one exits cleanly"""
+        counter = tmp_path / 'runs'
+        code = (
+            f"import pathlib, sys\n"
+            f"runs = pathlib.Path({str(counter)!r})\n"
+            f"count = int(runs.read_text()) + 1 if runs.exists() else 1\n"
+            f"runs.write_text(str(count))\n"
+            f"sys.exit(0 if count == 3 else 1)\n"
+        )
+        sup = supervisor(tmp_path, code, backoff_base=0.01)
+        
+        assert sup.run() == 0
+        assert sup.restarts == 2
+        assert counter.read_text() == '3'
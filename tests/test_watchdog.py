@@ -0,0 +1,61 @@
+# tests/test_watchdog.py
+import asyncio
+import time
+
+import pytest
+
+from src.bot.views import render_lag
+from src.monitor.watchdog import LoopLagMonitor
+
+
+def block_loop(seconds: float):
+    """Blocking call holding the event loop"""
+    time.sleep(seconds)
+
+
+class TestLoopLagMonitor:
+    """Test LoopLagMonitor class"""
+    
+    @pytest.mark.asyncio
+    async def test_measures_lag(self):
+        """Test a blocked loop shows up as lag"""
+        monitor = LoopLagMonitor(interval=0.01)
+        await monitor.start()
+        
+        await asyncio.sleep(0.05)
+        block_loop(0.15)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        
+        stats = monitor.percentiles()
+        assert stats['max'] >= 0.1
+        assert stats['p50'] < 0.1
+        assert monitor.recent_stalls() == []
+    
+    @pytest.mark.asyncio
+    async def test_debug_captures_blocking_stack(self):
+        """Test debug mode records the stack of the blocking call"""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05, debug=True)
+        await monitor.start()
+        
+        await asyncio.sleep(0.03)
+        block_loop(0.3)
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+        assert not asyncio.get_running_loop().get_debug()
+        
+        stalls = monitor.recent_stalls()
+        assert len(stalls) == 1
+        assert 'block_loop' in stalls[0]['stack']
+        assert stalls[0]['blocked'] >= 0.05
+        
+        text = render_lag(monitor.percentiles(), stalls, debug=True)
+        assert "Recent stalls (1)" in text
+        assert "block_loop" in text
+    
+    def test_no_samples(self):
+        """Test percentiles are empty before the first probe"""
+        monitor = LoopLagMonitor()
+        
+        assert monitor.percentiles() == {}
+        assert "No samples yet" in render_lag({}, [], debug=False)
@@ -0,0 +1,98 @@
+# tests/test_webhook.py
+import asyncio
+import socket
+import pytest
+import pytest_asyncio
+import httpx
+from unittest.mock import AsyncMock, MagicMock
+
+from src.bot.webhook import WebhookServer, run_webhook, webhook_path
+
+
+class TestWebhookServer:
+    """Test WebhookServer with a local client standing in for Telegram"""
+    
+    @pytest_asyncio.fixture
+    async def server(self):
+        self.updates = []
+        
+        async def handler(update):
+            self.updates.append(update)
+        
+        server = WebhookServer(handler, secret_token="s3cret", path="/hook", host="127.0.0.1", port=0)
+        await server.start()
+        yield server
+        await server.stop()
+    
+    @pytest_asyncio.fixture
+    async def client(self, server):
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.port}") as client:
+            yield client
+    
+    @pytest.mark.asyncio
+    async def test_accepts_update_with_secret(self, server, client):
+        """Test valid update is handed to the handler"""
+        update = {"update_id": 1, "message": {"text": "/start", "chat": {"id": 42}}}
+        
+        response = await client.post(
+            "/hook",
+            json=update,
+            headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+        )
+        await asyncio.sleep(0)
+        
+        assert response.status_code == 200
+        assert self.updates == [update]
+    
+    @pytest.mark.asyncio
+    async def test_rejects_wrong_secret(self, server, client):
+        """Test update with invalid secret is rejected"""
+        response = await client.post(
+            "/hook",
+            json={"update_id": 1},
+            headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}
+        )
+        missing = await client.post("/hook", json={"update_id": 2})
+        
+        assert response.status_code == 403
+        assert missing.status_code == 403
+        assert self.updates == []
+    
+    @pytest.mark.asyncio
+    async def test_keep_alive_and_errors(self, server, client):
+        """Test several requests over one connection"""
+        headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+        
+        bad_json = await client.post("/hook", content=b"{not json", headers=headers)
+        wrong_path = await client.post("/other", json={}, headers=headers)
+        wrong_method = await client.get("/hook")
+        health = await client.get("/health")
+        
+        assert bad_json.status_code == 400
+        assert wrong_path.status_code == 404
+        assert wrong_method.status_code == 405
+        assert health.status_code == 200
+    
+    def test_webhook_path(self):
+        """Test path is taken from the public URL"""
+        assert webhook_path("https://bot.example.com/tg/hook") == "/tg/hook"
+        assert webhook_path("https://bot.example.com") == "/"
+    
+    @pytest.mark.asyncio
+    async def test_failed_registration_closes_server(self):
+        """Test the server and application stop when set_webhook fails"""
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        
+        application = MagicMock()
+        application.start = AsyncMock()
+        application.stop = AsyncMock()
+        application.bot.set_webhook = AsyncMock(side_effect=RuntimeError("Bad Request: bad webhook"))
+        
+        with pytest.raises(RuntimeError):
+            await run_webhook(application, "https://bot.example.com", "secret", host='127.0.0.1', port=port)
+        
+        application.stop.assert_awaited_once()
+        with socket.socket() as again:
+            again.bind(('127.0.0.1', port))